@@ -0,0 +1,278 @@
+"""Binding table issuing minimal multi-bind calls per draw
+
+Switching a draw's textures is a glActiveTexture plus glBindTexture pair
+per unit, and its uniform/storage buffers a glBindBufferBase per index,
+each through the full wrappers.  A BindingTable records the bindings a
+draw wants (textures, samplers, indexed buffers and image units) and on
+apply() compares them with what it last bound, issuing for each kind of
+binding at most one GL 4.4 / ARB_multi_bind call (glBindTextures,
+glBindSamplers, glBindBuffersBase/Range, glBindImageTextures) covering
+the span of units which changed, from preallocated ctypes arrays.  Draws
+which share most of their resources thus cost little or nothing.
+
+Without multi-bind each changed unit is bound individually (texture
+fallbacks leave the last changed unit active).
+
+The table assumes it owns the units it is told about: bindings made by
+other means are not noticed until invalidate() is called, and units
+inside a changed span which were never set are bound to 0.
+
+Usage:
+
+    table = bindingtables.BindingTable()
+    for draw in draws:
+        table.textures( 0, draw.textures )
+        table.sampler( 0, LINEAR_CLAMP )
+        table.buffer( GL_UNIFORM_BUFFER, 0, draw.ubo, draw.offset, draw.size )
+        table.apply()
+        glDrawElements( ... )
+"""
+import ctypes
+from OpenGL.extensions import alternate
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_3, GL_1_5, GL_3_0, GL_4_2, GL_4_4
+from OpenGL.raw.GL.ARB import multi_bind as _multi_bind
+from OpenGL.raw.GL import _types
+from OpenGL.GL import samplers as _samplers
+
+__all__ = (
+    'BindingTable',
+)
+
+glBindTextures = alternate( GL_4_4.glBindTextures, _multi_bind.glBindTextures )
+glBindSamplers = alternate( GL_4_4.glBindSamplers, _multi_bind.glBindSamplers )
+glBindBuffersBase = alternate( GL_4_4.glBindBuffersBase, _multi_bind.glBindBuffersBase )
+glBindBuffersRange = alternate( GL_4_4.glBindBuffersRange, _multi_bind.glBindBuffersRange )
+glBindImageTextures = alternate( GL_4_4.glBindImageTextures, _multi_bind.glBindImageTextures )
+
+class _Slots( object ):
+    """Bound and desired values of one kind of indexed binding
+
+    low/high delimit the (inclusive) span of desired values that
+    differed from the bound ones when set, low > high when clean; top
+    is the highest index ever set.
+    """
+    def __init__( self, count, fill=0 ):
+        self.count = count
+        self.current = [None] * count
+        self.desired = [fill] * count
+        self.low, self.high = count, -1
+        self.top = -1
+
+    def set( self, index, value ):
+        self.desired[ index ] = value
+        if index > self.top:
+            self.top = index
+        if self.current[ index ] != value:
+            if index < self.low:
+                self.low = index
+            if index > self.high:
+                self.high = index
+
+    def commit( self ):
+        self.current[ self.low:self.high+1 ] = self.desired[ self.low:self.high+1 ]
+        self.low, self.high = self.count, -1
+
+    def invalidate( self ):
+        self.current = [None] * self.count
+        if self.top >= 0:
+            self.low, self.high = 0, self.top
+
+class BindingTable( object ):
+    """Desired versus bound resource bindings for a context
+
+    Attributes of note:
+
+        multiBind -- whether the ARB_multi_bind entry points are used
+        calls -- number of binding calls issued by apply() so far
+        textureUnits, bufferIndices, imageUnits -- table sizes
+    """
+    TEXTURE_UNITS = 32
+    BUFFER_INDICES = 16
+    IMAGE_UNITS = 8
+    def __init__(
+        self, textureUnits=TEXTURE_UNITS, bufferIndices=BUFFER_INDICES,
+        imageUnits=IMAGE_UNITS, multiBind=None,
+    ):
+        self.multiBind = bool( glBindTextures ) if multiBind is None else multiBind
+        self.textureUnits = textureUnits
+        self.bufferIndices = bufferIndices
+        self.imageUnits = imageUnits
+        self._textures = _Slots( textureUnits )
+        self._targets = [GL_1_1.GL_TEXTURE_2D] * textureUnits
+        self._samplers = _Slots( textureUnits )
+        self._images = _Slots( imageUnits )
+        self._imageFormats = [GL_1_1.GL_RGBA8] * imageUnits
+        self._buffers = {}
+        size = max( textureUnits, bufferIndices, imageUnits )
+        self._ids = (_types.GLuint * size)()
+        self._offsets = (_types.GLintptr * bufferIndices)()
+        self._sizes = (_types.GLsizeiptr * bufferIndices)()
+        self.calls = 0
+
+    def texture( self, unit, texture, target=GL_1_1.GL_TEXTURE_2D ):
+        """Want texture (id or object with __int__, None for 0) on unit
+
+        target is only used when falling back to glBindTexture, the
+        multi-bind path binds each texture to its own target.
+        """
+        self._targets[ unit ] = target
+        self._textures.set( unit, 0 if texture is None else int( texture ))
+
+    def textures( self, first, textures, target=GL_1_1.GL_TEXTURE_2D ):
+        """Want textures[i] on unit first+i"""
+        slots, targets = self._textures, self._targets
+        current, desired = slots.current, slots.desired
+        unit = first - 1
+        for unit,texture in enumerate( textures, first ):
+            targets[ unit ] = target
+            texture = 0 if texture is None else int( texture )
+            desired[ unit ] = texture
+            if current[ unit ] != texture:
+                if unit < slots.low:
+                    slots.low = unit
+                if unit > slots.high:
+                    slots.high = unit
+        if unit > slots.top:
+            slots.top = unit
+
+    def sampler( self, unit, sampler ):
+        """Want sampler on unit
+
+        sampler -- sampler object id, samplers.samplerKey() result
+            (resolved through the context's samplers.SamplerCache) or
+            None for no sampler
+        """
+        if isinstance( sampler, tuple ):
+            sampler = _samplers.currentCache().sampler( sampler )
+        self._samplers.set( unit, sampler or 0 )
+
+    def samplers( self, first, samplers ):
+        """Want samplers[i] on unit first+i"""
+        for offset,sampler in enumerate( samplers ):
+            self.sampler( first+offset, sampler )
+
+    def buffer( self, target, index, buffer, offset=0, size=0 ):
+        """Want buffer bound at index of the indexed target
+
+        target -- GL_UNIFORM_BUFFER, GL_SHADER_STORAGE_BUFFER...
+        size -- 0 binds the whole buffer (glBindBufferBase), otherwise
+            offset/size bind a range
+        """
+        slots = self._buffers.get( target )
+        if slots is None:
+            slots = self._buffers[ target ] = _Slots( self.bufferIndices, (0,0,0) )
+        slots.set( index, (0 if buffer is None else int( buffer ), offset, size) )
+
+    def image( self, unit, texture, format=GL_1_1.GL_RGBA8 ):
+        """Want level 0 of texture (all layers, read-write) on image unit
+
+        format is only used when falling back to glBindImageTexture, the
+        multi-bind path uses the texture's internal format.
+        """
+        self._imageFormats[ unit ] = format
+        self._images.set( unit, 0 if texture is None else int( texture ))
+
+    def apply( self ):
+        """Issue the binding calls for everything that changed
+
+        returns the number of GL calls issued
+        """
+        calls = 0
+        slots = self._textures
+        if slots.high >= slots.low:
+            calls += self._applyTextures( slots )
+        slots = self._samplers
+        if slots.high >= slots.low:
+            calls += self._applyIds( slots, glBindSamplers, _samplers.glBindSampler )
+        for target,slots in self._buffers.items():
+            if slots.high >= slots.low:
+                calls += self._applyBuffers( target, slots )
+        slots = self._images
+        if slots.high >= slots.low:
+            calls += self._applyImages( slots )
+        self.calls += calls
+        return calls
+
+    def _applyIds( self, slots, multi, single ):
+        low, high = slots.low, slots.high
+        if self.multiBind:
+            count = high - low + 1
+            ids = self._ids
+            ids[:count] = slots.desired[ low:high+1 ]
+            multi( low, count, ids )
+            calls = 1
+        else:
+            calls = 0
+            current, desired = slots.current, slots.desired
+            for index in range( low, high+1 ):
+                if current[ index ] != desired[ index ]:
+                    single( index, desired[ index ] )
+                    calls += 1
+        slots.commit()
+        return calls
+
+    def _applyTextures( self, slots ):
+        if self.multiBind:
+            return self._applyIds( slots, glBindTextures, None )
+        calls = 0
+        current, desired = slots.current, slots.desired
+        for unit in range( slots.low, slots.high+1 ):
+            if current[ unit ] != desired[ unit ]:
+                GL_1_3.glActiveTexture( GL_1_3.GL_TEXTURE0 + unit )
+                GL_1_1.glBindTexture( self._targets[ unit ], desired[ unit ] )
+                calls += 2
+        slots.commit()
+        return calls
+
+    def _applyImages( self, slots ):
+        if self.multiBind:
+            return self._applyIds( slots, glBindImageTextures, None )
+        calls = 0
+        current, desired = slots.current, slots.desired
+        for unit in range( slots.low, slots.high+1 ):
+            if current[ unit ] != desired[ unit ]:
+                GL_4_2.glBindImageTexture(
+                    unit, desired[ unit ], 0, True, 0, GL_1_5.GL_READ_WRITE,
+                    self._imageFormats[ unit ],
+                )
+                calls += 1
+        slots.commit()
+        return calls
+
+    def _applyBuffers( self, target, slots ):
+        low, high = slots.low, slots.high
+        entries = slots.desired[ low:high+1 ]
+        count = len( entries )
+        if self.multiBind:
+            ids = self._ids
+            if not any( size for buffer,offset,size in entries ):
+                ids[:count] = [ buffer for buffer,offset,size in entries ]
+                glBindBuffersBase( target, low, count, ids )
+                slots.commit()
+                return 1
+            if all( size or not buffer for buffer,offset,size in entries ):
+                offsets, sizes = self._offsets, self._sizes
+                for i,(buffer,offset,size) in enumerate( entries ):
+                    ids[i], offsets[i], sizes[i] = buffer, offset, size
+                glBindBuffersRange( target, low, count, ids, offsets, sizes )
+                slots.commit()
+                return 1
+        calls = 0
+        current = slots.current
+        for index,entry in enumerate( entries, low ):
+            if current[ index ] != entry:
+                buffer, offset, size = entry
+                if size:
+                    GL_3_0.glBindBufferRange( target, index, buffer, offset, size )
+                else:
+                    GL_3_0.glBindBufferBase( target, index, buffer )
+                calls += 1
+        slots.commit()
+        return calls
+
+    def invalidate( self ):
+        """Forget the bound state, the next apply() rebinds everything set"""
+        for slots in (self._textures, self._samplers, self._images):
+            slots.invalidate()
+        for slots in self._buffers.values():
+            slots.invalidate()
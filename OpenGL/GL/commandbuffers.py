@@ -0,0 +1,313 @@
+"""Record sequences of GL calls for low-overhead replay
+
+Every call made through OpenGL.GL goes through PyOpenGL's wrapper
+machinery (argument conversion, pointer storage, a glGetError round-trip
+when ERROR_CHECKING is on...), which dominates the cost of immediate-mode
+code issuing thousands of glVertex/glColor calls per frame.
+
+A CommandBuffer records calls as an opcode (index into a table of
+resolved, un-checked ctypes function pointers) plus the C-level
+arguments, pre-converted to their ctypes types.  Replaying a buffer is a
+tight loop straight into the C entry points with a single error check at
+the end, or, once compiled on contexts with display lists, a single
+glCallList.  Buffers are re-usable across frames; call clear() (or
+build a new buffer) when the recorded geometry changes.
+
+Wrapped entry points (glVertex3fv, glLightfv...) have their argument
+conversions (sequence to array, size inference) applied once, when the
+call is recorded, and array arguments are resolved to pointers then as
+well, so recorded arrays must not be modified afterwards.  Output
+conveniences of the wrappers (returned arrays etc.) are not applied.
+
+Arguments are kept as tuples of ctypes values rather than packed into a
+single typed array: ctypes can only call with Python-level arguments, so
+a packed buffer would have to be unpacked again on every replay, which
+costs more than the packing saves.
+
+Usage:
+
+    ring = commandbuffers.CommandBuffer()
+    ring.glBegin( GL_POINTS )
+    for x,y in points:
+        ring.glVertex3i( x, y, 0 )
+    ring.glEnd()
+    ring.compile()
+    ...
+    # each frame
+    glColor3f( *colour )
+    ring.execute()
+"""
+import ctypes
+from array import array
+from OpenGL import error, logs
+from OpenGL.latebind import LateBind
+from OpenGL.wrapper import Wrapper
+from OpenGL._null import NULL
+from OpenGL.platform import baseplatform
+from OpenGL.raw.GL.VERSION import GL_1_1
+from OpenGL.raw.GL import _errors
+from OpenGL._bytes import bytes, unicode
+
+__all__ = (
+    'CommandBuffer',
+)
+
+def _wrapperArguments( wrapper ):
+    """Record-time argument conversion for a Wrapper
+
+    returns convert( args ) -> C-level arguments for
+    wrapper.wrappedOperation, applying the wrapper's pyConverters,
+    cConverters and cResolvers just as a call would (storeValues and
+    returnValues are not applied, as nothing is called at record time)
+    """
+    wrapper.getFinalCall() # finalises converters
+    name = wrapper.wrappedOperation.__name__
+    pyConverters = getattr( wrapper, 'pyConverters', None )
+    cConverters = getattr( wrapper, 'cConverters', None )
+    cResolvers = getattr( wrapper, 'cResolvers', None )
+    def convert( args ):
+        if pyConverters:
+            if len(args) > len(pyConverters):
+                raise TypeError(
+                    """%s takes %s arguments, %s recorded"""%(
+                        name, len(pyConverters), len(args),
+                    )
+                )
+            pyArgs = []
+            for index,converter in enumerate( pyConverters ):
+                if converter is None:
+                    pyArgs.append( args[index] )
+                else:
+                    try:
+                        pyArgs.append( converter( args[index], wrapper, args ))
+                    except IndexError:
+                        if getattr( converter, 'optional', False ):
+                            pyArgs.append( NULL )
+                        else:
+                            raise TypeError(
+                                """%s requires %s arguments, %s recorded"""%(
+                                    name, len(pyConverters), len(args),
+                                )
+                            )
+        else:
+            pyArgs = args
+        if cConverters:
+            cArgs = [
+                converter( pyArgs, index, wrapper ) if hasattr( converter, '__call__' ) else converter
+                for index,converter in enumerate( cConverters )
+            ]
+        else:
+            cArgs = pyArgs
+        if cResolvers:
+            cArgs = [
+                arg if converter is None else converter( arg )
+                for arg,converter in zip( cArgs, cResolvers )
+            ]
+        return tuple( cArgs )
+    return convert
+
+def _baseFunction( function ):
+    """Resolve a (possibly wrapped) entry point to its ctypes function
+
+    function -- OpenGL.GL/GLU/GLUT entry point, or the name of a function
+        in OpenGL.GL, OpenGL.GLU or OpenGL.GLUT
+
+    returns (base, conversions, argtypes) where base is a new ctypes
+    function pointer for the same C entry point with no errcheck installed
+    and with array/pointer arguments declared as c_void_p, conversions
+    the record-time argument conversions of any Wrappers around it
+    (outermost first) and argtypes the C function's declared argtypes
+
+    raises error.NullFunctionError if the function is not available
+    """
+    if isinstance( function, (bytes,unicode) ):
+        if function.startswith( 'glut' ):
+            from OpenGL import GLUT as module
+        elif function.startswith( 'glu' ):
+            from OpenGL import GLU as module
+        else:
+            from OpenGL import GL as module
+        function = getattr( module, function )
+    conversions = []
+    while not isinstance( function, ctypes._CFuncPtr ):
+        if isinstance( function, logs._LoggedFunction ):
+            function = getattr( function, '' )
+        elif isinstance( function, baseplatform._CheckContext ):
+            function = function.func
+        elif isinstance( function, Wrapper ):
+            # before LateBind, the final call of a Wrapper is a closure
+            conversions.append( _wrapperArguments( function ))
+            function = function.wrappedOperation
+        elif isinstance( function, LateBind ):
+            function = function.getFinalCall()
+        elif isinstance( function, baseplatform._NullFunctionPointer ):
+            loaded = function.load()
+            if not loaded:
+                raise error.NullFunctionError(
+                    """Attempt to record an undefined function %s"""%( function.__name__, )
+                )
+            function = loaded
+        elif hasattr( function, 'wrappedOperation' ):
+            function = function.wrappedOperation
+        else:
+            raise TypeError( """Cannot record non-ctypes function %r"""%( function, ))
+    argtypes = tuple( function.argtypes or () )
+    class prototype( ctypes._CFuncPtr ):
+        # array-typed arguments are resolved to pointers at record time,
+        # replay should not re-run their from_param
+        _argtypes_ = tuple([
+            typ if issubclass( typ, ctypes._SimpleCData ) else ctypes.c_void_p
+            for typ in argtypes
+        ])
+        _restype_ = function.restype
+        _flags_ = type( function )._flags_
+    address = ctypes.cast( function, ctypes.c_void_p ).value
+    base = prototype( address )
+    base.__name__ = function.__name__
+    return base, conversions, argtypes
+
+class CommandBuffer( object ):
+    """Recorded sequence of C-level GL calls
+
+    Attributes of note:
+
+        functions -- opcode-indexed table of resolved ctypes functions
+        opcodes -- array('H') of the recorded opcodes
+        arguments -- ctypes-converted argument tuples, 1:1 with opcodes
+        references -- recorded Python arguments (and converted arrays)
+            whose memory the recorded pointers refer to
+        displayList -- display-list id if compile() succeeded
+    """
+    # shared between buffers, functions only need resolving once
+    FUNCTIONS = []
+    CONVERSIONS = []
+    OPCODES = {}
+    def __init__( self ):
+        self.functions = self.FUNCTIONS
+        self.opcodes = array( 'H' )
+        self.arguments = []
+        self.references = []
+        self.displayList = None
+
+    @classmethod
+    def opcode( cls, function ):
+        """Lookup/allocate the opcode for the given function"""
+        opcode = cls.OPCODES.get( function )
+        if opcode is None:
+            base, conversions, argtypes = _baseFunction( function )
+            cls.FUNCTIONS.append( base )
+            cls.CONVERSIONS.append( (conversions, argtypes) )
+            cls.OPCODES[ function ] = opcode = len(cls.FUNCTIONS) - 1
+        return opcode
+
+    def record( self, function, *args ):
+        """Append a call of function( *args ) to the buffer
+
+        Wrapper argument conversions (e.g. sequence to array for
+        glVertex3fv) and array-to-pointer conversion happen here, once,
+        rather than on each replay.
+        """
+        opcode = self.opcode( function )
+        conversions, argtypes = self.CONVERSIONS[ opcode ]
+        converted = args
+        for convert in conversions:
+            converted = convert( converted )
+        if len(converted) != len(argtypes):
+            raise TypeError(
+                """%s takes %s arguments, %s recorded"""%(
+                    self.functions[opcode].__name__, len(argtypes), len(converted),
+                )
+            )
+        cArgs = []
+        pointers = False
+        for typ,arg in zip( argtypes, converted ):
+            if issubclass( typ, ctypes._SimpleCData ):
+                if not isinstance( arg, typ ):
+                    arg = typ( arg )
+            elif arg is not None:
+                arg = typ.from_param( arg )
+                if isinstance( arg, int ):
+                    arg = ctypes.c_void_p( arg )
+                pointers = True
+            cArgs.append( arg )
+        self.opcodes.append( opcode )
+        self.arguments.append( tuple( cArgs ))
+        if pointers:
+            self.references.append( (args, converted) )
+        self.invalidate()
+        return self
+
+    def __getattr__( self, key ):
+        """Allow buffer.glVertex3f( ... ) style recording"""
+        if key.startswith( 'gl' ):
+            def recorder( *args ):
+                return self.record( key, *args )
+            recorder.__name__ = key
+            return recorder
+        raise AttributeError( key )
+
+    def __len__( self ):
+        """Number of recorded commands"""
+        return len( self.opcodes )
+
+    def clear( self ):
+        """Discard all recorded commands"""
+        del self.opcodes[:]
+        del self.arguments[:]
+        del self.references[:]
+        self.invalidate()
+
+    def invalidate( self ):
+        """Release any compiled display list (recording has changed)"""
+        if self.displayList is not None:
+            try:
+                GL_1_1.glDeleteLists( self.displayList, 1 )
+            except (error.GLError, error.NullFunctionError):
+                pass
+            self.displayList = None
+
+    def _replay( self ):
+        """Issue every recorded call in order"""
+        functions = self.functions
+        for opcode,args in zip( self.opcodes, self.arguments ):
+            functions[opcode]( *args )
+
+    def compile( self ):
+        """Compile the buffer into a display list if the context allows
+
+        returns True if a display list is now in use, False if execute()
+        will fall back to the replay loop (e.g. core profiles)
+        """
+        self.invalidate()
+        try:
+            displayList = GL_1_1.glGenLists( 1 )
+        except (error.GLError, error.NullFunctionError):
+            return False
+        if not displayList:
+            return False
+        GL_1_1.glNewList( displayList, GL_1_1.GL_COMPILE )
+        try:
+            self._replay()
+        finally:
+            GL_1_1.glEndList()
+        self.displayList = displayList
+        return True
+
+    def execute( self ):
+        """Replay the recorded commands
+
+        Uses the compiled display list if there is one, otherwise runs
+        the recorded calls directly; in either case a single glGetError
+        check (if ERROR_CHECKING is enabled) is done at the end.
+        """
+        if self.displayList is not None:
+            GL_1_1.glCallList( self.displayList )
+            return
+        self._replay()
+        if _errors._error_checker:
+            _errors._error_checker.glCheckError( None, self.execute )
+    __call__ = execute
+
+    def delete( self ):
+        """Release GL resources held by the buffer"""
+        self.invalidate()
@@ -0,0 +1,276 @@
+"""KHR_debug message pipeline
+
+With GL 4.3 / KHR_debug / ARB_debug_output the driver reports errors,
+performance warnings and other diagnostics through a callback rather
+than only through glGetError.  DebugOutput installs one persistent
+callback per context which does nothing but copy each message into a
+preallocated ring (fixed-size enum arrays plus a slot list for the text)
+and flag the pipeline as pending.  Messages are drained on the thread
+which installed the pipeline and either raised as GLError (for
+GL_DEBUG_TYPE_ERROR) or forwarded to the 'OpenGL.GL.debugoutput' logger
+at a level chosen from their severity.
+
+The ring has a single producer (the callback) and a single consumer
+(drain()), each only advancing its own counter, so no lock is taken; if
+the consumer falls more than a ring's worth behind, new messages are
+counted in dropped rather than overwriting unread ones.
+
+Setting error.setCheckingMode( error.DEBUG_OUTPUT ) makes the wrapper's
+error checker skip glGetError entirely and instead test (in Python)
+whether any pipeline has pending messages after each call; with
+synchronous output (the default) an error message is thus raised from
+the exact call which caused it.
+
+Usage:
+
+    from OpenGL.GL import debugoutput
+    debugoutput.install()
+    debugoutput.currentOutput().filter(
+        severity=GL_DEBUG_SEVERITY_NOTIFICATION, enabled=False,
+    )
+    error.setCheckingMode( error.DEBUG_OUTPUT )
+"""
+import ctypes
+import logging
+import threading
+from array import array
+from collections import namedtuple
+from OpenGL import contextdata, error, platform
+from OpenGL.extensions import alternate
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_4_3
+from OpenGL.raw.GL.KHR import debug as _khr_debug
+from OpenGL.raw.GL.ARB import debug_output as _arb_debug_output
+from OpenGL.raw.GL import _types
+
+_log = logging.getLogger( 'OpenGL.GL.debugoutput' )
+
+__all__ = (
+    'DebugMessage',
+    'DebugOutput',
+    'install',
+    'uninstall',
+    'currentOutput',
+    'drain',
+)
+
+CONTEXT_KEY = 'OpenGL.GL.debugoutput'
+
+glDebugMessageCallback = alternate(
+    GL_4_3.glDebugMessageCallback,
+    _khr_debug.glDebugMessageCallbackKHR,
+    _arb_debug_output.glDebugMessageCallbackARB,
+)
+glDebugMessageControl = alternate(
+    GL_4_3.glDebugMessageControl,
+    _khr_debug.glDebugMessageControlKHR,
+    _arb_debug_output.glDebugMessageControlARB,
+)
+
+LOG_LEVELS = {
+    GL_4_3.GL_DEBUG_SEVERITY_HIGH: logging.ERROR,
+    GL_4_3.GL_DEBUG_SEVERITY_MEDIUM: logging.WARNING,
+    GL_4_3.GL_DEBUG_SEVERITY_LOW: logging.INFO,
+    GL_4_3.GL_DEBUG_SEVERITY_NOTIFICATION: logging.DEBUG,
+}
+
+# pipelines with undrained messages, tested by the error checker
+PENDING = set()
+
+DebugMessage = namedtuple( 'DebugMessage', ('source','type','id','severity','message') )
+
+class DebugOutput( object ):
+    """Ring buffer fed by a context's debug-message callback
+
+    Attributes of note:
+
+        capacity -- number of messages the ring holds
+        written, read -- producer and consumer message counters
+        dropped -- messages discarded because the ring was full
+        thread -- ident of the owning (installing) thread
+        installed -- whether the callback is currently registered
+    """
+    CAPACITY = 256
+    def __init__( self, capacity=CAPACITY ):
+        self.capacity = capacity
+        self.sources = array( 'I', [0]*capacity )
+        self.types = array( 'I', [0]*capacity )
+        self.ids = array( 'I', [0]*capacity )
+        self.severities = array( 'I', [0]*capacity )
+        self.messages = [None]*capacity
+        self.written = self.read = self.dropped = 0
+        self.thread = None
+        self.installed = False
+        # the GL holds only the C pointer, keep the ctypes thunk alive
+        self.callback = _types.GLDEBUGPROC( self._record )
+
+    def _record( self, source, type, id, severity, length, message, userParam ):
+        """The C callback, copies the message into the ring"""
+        written = self.written
+        if written - self.read >= self.capacity:
+            self.dropped += 1
+            return
+        slot = written % self.capacity
+        self.sources[slot] = source
+        self.types[slot] = type
+        self.ids[slot] = id
+        self.severities[slot] = severity
+        self.messages[slot] = ctypes.string_at( message, length ) if length >= 0 else ctypes.string_at( message )
+        self.written = written + 1
+        PENDING.add( self )
+
+    def install( self, synchronous=True ):
+        """Register the callback and enable debug output in the current context
+
+        synchronous -- enable GL_DEBUG_OUTPUT_SYNCHRONOUS so that messages
+            are delivered during the offending call
+
+        raises error.NullFunctionError if debug output is unsupported
+        """
+        if not glDebugMessageCallback:
+            raise error.NullFunctionError(
+                """Debug output requires GL 4.3, KHR_debug or ARB_debug_output"""
+            )
+        self.thread = threading.current_thread().ident
+        glDebugMessageCallback( self.callback, None )
+        GL_1_1.glEnable( GL_4_3.GL_DEBUG_OUTPUT )
+        if synchronous:
+            GL_1_1.glEnable( GL_4_3.GL_DEBUG_OUTPUT_SYNCHRONOUS )
+        else:
+            GL_1_1.glDisable( GL_4_3.GL_DEBUG_OUTPUT_SYNCHRONOUS )
+        self.installed = True
+        return self
+
+    def uninstall( self ):
+        """Unregister the callback in the current context"""
+        if self.installed:
+            glDebugMessageCallback( _types.GLDEBUGPROC(), None )
+            GL_1_1.glDisable( GL_4_3.GL_DEBUG_OUTPUT )
+            self.installed = False
+        PENDING.discard( self )
+
+    def filter(
+        self, source=GL_1_1.GL_DONT_CARE, type=GL_1_1.GL_DONT_CARE,
+        severity=GL_1_1.GL_DONT_CARE, enabled=True, ids=None,
+    ):
+        """Enable or disable messages by source/type/severity (and ids)
+
+        Filtering happens in the driver (glDebugMessageControl), so
+        disabled messages never reach the callback.  Note that the GL
+        requires severity to be GL_DONT_CARE when ids are given.
+        """
+        if ids:
+            ids = (_types.GLuint * len(ids))( *ids )
+            count = len( ids )
+        else:
+            ids, count = None, 0
+        glDebugMessageControl( source, type, severity, count, ids, bool(enabled) )
+
+    def pending( self ):
+        """Number of undrained messages"""
+        return self.written - self.read
+
+    def drain( self ):
+        """Retrieve (and consume) the queued messages as DebugMessages
+
+        Only the owning thread consumes messages, other threads get an
+        empty list.
+        """
+        if self.thread is not None and threading.current_thread().ident != self.thread:
+            return []
+        PENDING.discard( self )
+        result = []
+        read, written = self.read, self.written
+        while read < written:
+            slot = read % self.capacity
+            result.append( DebugMessage(
+                self.sources[slot], self.types[slot], self.ids[slot],
+                self.severities[slot], self.messages[slot],
+            ))
+            self.messages[slot] = None
+            read += 1
+        self.read = read
+        if self.written != written:
+            # produced while draining, leave for the next drain
+            PENDING.add( self )
+        return result
+
+    def dispatch( self, baseOperation=None, cArguments=None, getError=None ):
+        """Drain, logging messages and raising the first error as GLError
+
+        baseOperation, cArguments -- the call to blame for errors (as
+            passed by the error checker)
+        getError -- function retrieving (and clearing) the GL error flag
+            the error message corresponds to, default the unchecked
+            glGetError (the error checker passes its own, which is a
+            no-op inside glBegin/glEnd)
+
+        The raised GLError's err is the GL error code, the message id is
+        driver-specific and only reported in the description.
+        """
+        failure = None
+        for message in self.drain():
+            if message.type == GL_4_3.GL_DEBUG_TYPE_ERROR and failure is None:
+                failure = message
+                continue
+            _log.log(
+                LOG_LEVELS.get( message.severity, logging.INFO ),
+                'GL debug message %s (source 0x%x, type 0x%x): %s',
+                message.id, message.source, message.type,
+                message.message.decode( 'utf-8', 'replace' ),
+            )
+        if failure is not None:
+            if getError is None:
+                getError = platform.PLATFORM.GL.glGetError
+            # the message reported the error, the GL still has its flag set
+            code = getError()
+            raise error.GLError(
+                err = code or None,
+                cArguments = cArguments,
+                baseOperation = baseOperation,
+                description = '%s (debug message %s)'%(
+                    failure.message.decode( 'utf-8', 'replace' ), failure.id,
+                ),
+            )
+
+def install( context=None, synchronous=True, capacity=DebugOutput.CAPACITY ):
+    """Install (once) a DebugOutput for context (default current)
+
+    context must be current, as the callback is registered with it.
+
+    returns the context's DebugOutput
+    """
+    output = contextdata.getValue( CONTEXT_KEY, context )
+    if output is None:
+        output = DebugOutput( capacity )
+        contextdata.setValue( CONTEXT_KEY, output, context )
+    if not output.installed:
+        output.install( synchronous )
+    return output
+
+def uninstall( context=None ):
+    """Remove the DebugOutput (if any) from context (default current)"""
+    output = contextdata.getValue( CONTEXT_KEY, context )
+    if output is not None:
+        output.uninstall()
+        contextdata.delValue( CONTEXT_KEY, context )
+
+def currentOutput( context=None ):
+    """Retrieve the DebugOutput for context (default current) or None"""
+    return contextdata.getValue( CONTEXT_KEY, context )
+
+def drain( context=None ):
+    """Retrieve the queued DebugMessages for context (default current)"""
+    output = contextdata.getValue( CONTEXT_KEY, context )
+    if output is None:
+        return []
+    return output.drain()
+
+def dispatchPending( baseOperation=None, cArguments=None, getError=None ):
+    """Dispatch every pending pipeline owned by the current thread
+
+    Used by the error checker in error.DEBUG_OUTPUT mode.
+    """
+    thread = threading.current_thread().ident
+    for output in list( PENDING ):
+        if output.thread == thread:
+            output.dispatch( baseOperation, cArguments, getError )
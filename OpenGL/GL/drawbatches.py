@@ -0,0 +1,302 @@
+"""Batched draws submitted through (multi-)draw-indirect buffers
+
+Issuing thousands of glDrawArrays/glDrawElements per frame from Python
+costs one wrapped call (argument conversion plus error check) per draw.
+A DrawBatch instead keeps one DrawArraysIndirectCommand or
+DrawElementsIndirectCommand record per draw in a numpy structured array
+mirrored in a GL_DRAW_INDIRECT_BUFFER.  Callers add, update and remove
+draws by handle, only the records changed since the last frame are
+uploaded, and the whole batch is submitted with a single
+glMultiDrawArraysIndirect/glMultiDrawElementsIndirect.
+
+Without GL 4.3 / ARB_multi_draw_indirect the batch falls back to
+glMultiDrawArrays/glMultiDrawElementsBaseVertex when every record is a
+single non-instanced draw, or otherwise loops over the records with the
+most capable instanced entry point available.
+
+Records are kept densely packed, so removing a draw moves the last
+record into its slot; draw order within a batch is not preserved.
+
+Usage:
+
+    batch = drawbatches.DrawBatch( GL_TRIANGLES )
+    handles = [ batch.add( count, first=first ) for first,count in ranges ]
+    ...
+    batch.update( handles[3], instanceCount=0 ) # hide a draw
+    ...
+    # each frame, with the vertex arrays/VAO bound
+    batch.draw()
+"""
+import ctypes
+import numpy
+from OpenGL.extensions import alternate
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_4, GL_1_5, GL_3_1, GL_3_2, GL_4_0, GL_4_2, GL_4_3
+from OpenGL.raw.GL.ARB import multi_draw_indirect as _multi_draw_indirect
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'ARRAYS_COMMAND',
+    'ELEMENTS_COMMAND',
+    'DrawBatch',
+)
+
+ARRAYS_COMMAND = numpy.dtype( [
+    ('count','<u4'),
+    ('instanceCount','<u4'),
+    ('first','<u4'),
+    ('baseInstance','<u4'),
+] )
+ELEMENTS_COMMAND = numpy.dtype( [
+    ('count','<u4'),
+    ('instanceCount','<u4'),
+    ('firstIndex','<u4'),
+    ('baseVertex','<i4'),
+    ('baseInstance','<u4'),
+] )
+
+glMultiDrawArraysIndirect = alternate(
+    GL_4_3.glMultiDrawArraysIndirect, _multi_draw_indirect.glMultiDrawArraysIndirect,
+)
+glMultiDrawElementsIndirect = alternate(
+    GL_4_3.glMultiDrawElementsIndirect, _multi_draw_indirect.glMultiDrawElementsIndirect,
+)
+GL_DRAW_INDIRECT_BUFFER = GL_4_0.GL_DRAW_INDIRECT_BUFFER
+
+INDEX_SIZES = {
+    GL_1_1.GL_UNSIGNED_BYTE: 1,
+    GL_1_1.GL_UNSIGNED_SHORT: 2,
+    GL_1_1.GL_UNSIGNED_INT: 4,
+}
+
+class DrawBatch( object ):
+    """Handle-addressed array of indirect draw commands
+
+    Attributes of note:
+
+        mode -- primitive mode passed to every draw
+        indexType -- None for glDrawArrays-style batches, otherwise the
+            GL_UNSIGNED_* type of the bound GL_ELEMENT_ARRAY_BUFFER
+        records -- structured array (ARRAYS_COMMAND or ELEMENTS_COMMAND)
+            of which the first len(self) entries are live
+        indirect -- whether the multi-draw-indirect path is in use (None
+            until the first draw())
+    """
+    CAPACITY = 256
+    def __init__( self, mode=GL_1_1.GL_TRIANGLES, indexType=None, capacity=CAPACITY, indirect=None ):
+        self.mode = mode
+        self.indexType = indexType
+        dtype = ARRAYS_COMMAND if indexType is None else ELEMENTS_COMMAND
+        self.records = numpy.zeros( (capacity,), dtype=dtype )
+        self.size = 0
+        self.indirect = indirect
+        self.buffer = None
+        self.bufferCapacity = 0
+        self.slots = {}
+        self.handles = []
+        self.nextHandle = 1
+        self.dirtyStart = self.dirtyStop = 0
+
+    def __len__( self ):
+        """Number of live draws"""
+        return self.size
+
+    def __contains__( self, handle ):
+        return handle in self.slots
+
+    def _touch( self, slot ):
+        """Record that slot needs uploading"""
+        if self.dirtyStart == self.dirtyStop:
+            self.dirtyStart, self.dirtyStop = slot, slot+1
+        else:
+            self.dirtyStart = min( self.dirtyStart, slot )
+            self.dirtyStop = max( self.dirtyStop, slot+1 )
+
+    def add( self, count, first=0, instanceCount=1, baseInstance=0, baseVertex=0 ):
+        """Append a draw and return its handle
+
+        count -- vertices (or indices) to draw
+        first -- first vertex (or, for indexed batches, first index)
+        instanceCount -- instances to draw, 0 disables the draw
+        baseInstance -- base instance for instanced attributes
+        baseVertex -- value added to each index (indexed batches only)
+        """
+        if self.size == len( self.records ):
+            grown = numpy.zeros( (2*len(self.records),), dtype=self.records.dtype )
+            grown[:self.size] = self.records[:self.size]
+            self.records = grown
+        slot = self.size
+        record = self.records[ slot ]
+        record['count'] = count
+        record['instanceCount'] = instanceCount
+        record['baseInstance'] = baseInstance
+        if self.indexType is None:
+            if baseVertex:
+                raise ValueError( """baseVertex only applies to indexed batches""" )
+            record['first'] = first
+        else:
+            record['firstIndex'] = first
+            record['baseVertex'] = baseVertex
+        handle = self.nextHandle
+        self.nextHandle += 1
+        self.slots[ handle ] = slot
+        self.handles.append( handle )
+        self.size += 1
+        self._touch( slot )
+        return handle
+
+    def update( self, handle, **fields ):
+        """Change fields (count, first, instanceCount...) of a draw
+
+        raises KeyError for unknown handles
+        """
+        slot = self.slots[ handle ]
+        record = self.records[ slot ]
+        for key,value in fields.items():
+            if key == 'first' and self.indexType is not None:
+                key = 'firstIndex'
+            record[ key ] = value
+        self._touch( slot )
+
+    def remove( self, handle ):
+        """Remove a draw, the last draw takes over its slot
+
+        raises KeyError for unknown handles
+        """
+        slot = self.slots.pop( handle )
+        last = self.size - 1
+        if slot != last:
+            self.records[ slot ] = self.records[ last ]
+            moved = self.handles[ last ]
+            self.handles[ slot ] = moved
+            self.slots[ moved ] = slot
+            self._touch( slot )
+        self.handles.pop()
+        self.size = last
+
+    def clear( self ):
+        """Remove every draw"""
+        self.slots.clear()
+        del self.handles[:]
+        self.size = 0
+        self.dirtyStart = self.dirtyStop = 0
+
+    def upload( self ):
+        """Copy changed records into the indirect buffer (binds it)
+
+        The buffer is re-allocated (with every record) when it has become
+        too small, otherwise only the dirty range is re-uploaded.
+        """
+        if self.buffer is None:
+            buffer = _types.GLuint( 0 )
+            GL_1_5.glGenBuffers( 1, ctypes.byref( buffer ))
+            self.buffer = buffer.value
+        GL_1_5.glBindBuffer( GL_DRAW_INDIRECT_BUFFER, self.buffer )
+        stride = self.records.dtype.itemsize
+        if self.bufferCapacity < len( self.records ):
+            GL_1_5.glBufferData(
+                GL_DRAW_INDIRECT_BUFFER, self.records.nbytes,
+                self.records, GL_1_5.GL_DYNAMIC_DRAW,
+            )
+            self.bufferCapacity = len( self.records )
+        elif self.dirtyStop > self.dirtyStart:
+            stop = min( self.dirtyStop, self.size )
+            if stop > self.dirtyStart:
+                GL_1_5.glBufferSubData(
+                    GL_DRAW_INDIRECT_BUFFER, self.dirtyStart*stride,
+                    (stop-self.dirtyStart)*stride,
+                    self.records[self.dirtyStart:stop],
+                )
+        self.dirtyStart = self.dirtyStop = 0
+
+    def draw( self ):
+        """Submit every live draw
+
+        Uses one multi-draw-indirect call where available, otherwise see
+        the module docstring for the fallbacks.
+        """
+        if not self.size:
+            return
+        if self.indirect is None:
+            self.indirect = bool( glMultiDrawArraysIndirect )
+        if self.indirect:
+            self.upload()
+            if self.indexType is None:
+                glMultiDrawArraysIndirect( self.mode, None, self.size, 0 )
+            else:
+                glMultiDrawElementsIndirect( self.mode, self.indexType, None, self.size, 0 )
+            GL_1_5.glBindBuffer( GL_DRAW_INDIRECT_BUFFER, 0 )
+        elif self.indexType is None:
+            self._drawArrays()
+        else:
+            self._drawElements()
+
+    def _simple( self, live ):
+        """Whether every live record is a plain single-instance draw"""
+        return (
+            not live['baseInstance'].any() and
+            (live['instanceCount'] == 1).all()
+        )
+
+    def _drawArrays( self ):
+        live = self.records[:self.size]
+        if self._simple( live ):
+            GL_1_4.glMultiDrawArrays(
+                self.mode,
+                numpy.ascontiguousarray( live['first'], dtype=numpy.int32 ),
+                numpy.ascontiguousarray( live['count'], dtype=numpy.int32 ),
+                self.size,
+            )
+            return
+        baseInstance = bool( GL_4_2.glDrawArraysInstancedBaseInstance )
+        for count,instances,first,base in live.tolist():
+            if not instances:
+                continue
+            if base and baseInstance:
+                GL_4_2.glDrawArraysInstancedBaseInstance( self.mode, first, count, instances, base )
+            elif base:
+                raise RuntimeError( """baseInstance requires GL 4.2 or multi-draw-indirect""" )
+            elif instances == 1:
+                GL_1_1.glDrawArrays( self.mode, first, count )
+            else:
+                GL_3_1.glDrawArraysInstanced( self.mode, first, count, instances )
+
+    def _drawElements( self ):
+        live = self.records[:self.size]
+        indexSize = INDEX_SIZES[ self.indexType ]
+        if self._simple( live ) and GL_3_2.glMultiDrawElementsBaseVertex:
+            offsets = live['firstIndex'].astype( numpy.uintp ) * indexSize
+            GL_3_2.glMultiDrawElementsBaseVertex(
+                self.mode,
+                numpy.ascontiguousarray( live['count'], dtype=numpy.int32 ),
+                self.indexType,
+                offsets.ctypes.data_as( ctypes.POINTER( ctypes.c_void_p )),
+                self.size,
+                numpy.ascontiguousarray( live['baseVertex'], dtype=numpy.int32 ),
+            )
+            return
+        baseInstance = bool( GL_4_2.glDrawElementsInstancedBaseVertexBaseInstance )
+        for count,instances,first,baseVertex,base in live.tolist():
+            if not instances:
+                continue
+            offset = ctypes.c_void_p( first*indexSize )
+            if base and baseInstance:
+                GL_4_2.glDrawElementsInstancedBaseVertexBaseInstance(
+                    self.mode, count, self.indexType, offset, instances, baseVertex, base,
+                )
+            elif base:
+                raise RuntimeError( """baseInstance requires GL 4.2 or multi-draw-indirect""" )
+            elif baseVertex:
+                GL_3_2.glDrawElementsInstancedBaseVertex(
+                    self.mode, count, self.indexType, offset, instances, baseVertex,
+                )
+            elif instances == 1:
+                GL_1_1.glDrawElements( self.mode, count, self.indexType, offset )
+            else:
+                GL_3_1.glDrawElementsInstanced( self.mode, count, self.indexType, offset, instances )
+
+    def delete( self ):
+        """Release the indirect buffer"""
+        if self.buffer is not None:
+            GL_1_5.glDeleteBuffers( 1, ctypes.byref( _types.GLuint( self.buffer )))
+            self.buffer = None
+            self.bufferCapacity = 0
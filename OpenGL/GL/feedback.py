@@ -1,4 +1,11 @@
-"""Utility module to parse a Feedback buffer"""
+"""Utility module to parse a Feedback buffer
+
+parseFeedback produces a list of Python record tuples, while
+parseFeedbackColumnar produces FeedbackRecords, a numpy-backed form
+which avoids per-vertex objects (and still supports indexing into the
+same record tuples lazily).  glRenderMode uses the columnar form when
+OpenGL.COLUMNAR_RENDER_MODE is set.
+"""
 from OpenGL import contextdata
 from OpenGL.GL.VERSION import GL_1_1 as _simple
 
@@ -56,10 +63,24 @@ class Vertex( object ):
         self.vertex = vertex 
         self.color = color 
         self.texture = texture 
+def _colorSize( ):
+    """Number of color values per feedback vertex (1 in index mode)"""
+    from OpenGL.GL import limits
+    return [ 4,1 ][ bool(limits.currentLimits().index_mode) ]
+def _vertexLayout( mode, colorSize ):
+    """Determine (positionSize,colorSize,textureSize) for feedback mode"""
+    if mode == _simple.GL_2D:
+        return (2,0,0)
+    elif mode == _simple.GL_3D:
+        return (3,0,0)
+    elif mode == _simple.GL_3D_COLOR:
+        return (3,colorSize,0)
+    elif mode == _simple.GL_3D_COLOR_TEXTURE:
+        return (3,colorSize,4)
+    return (4,colorSize,4)
 def createGetVertex( ):
     mode = contextdata.getValue( "GL_FEEDBACK_BUFFER_TYPE" )
-    indexMode = _simple.glGetBooleanv( _simple.GL_INDEX_MODE )
-    colorSize = [ 4,1 ][ int(indexMode) ]
+    colorSize = _colorSize()
     if mode in (_simple.GL_2D,_simple.GL_3D):
         if mode == _simple.GL_2D:
             size = 2
@@ -84,3 +105,139 @@ def createGetVertex( ):
             textureEnd = colorEnd + 4
             return (buffer[bufferIndex:end],buffer[end:colorEnd],buffer[colorEnd:textureEnd]),textureEnd
     return getVertex
+
+class FeedbackRecords( object ):
+    """Columnar storage of a parsed feedback buffer
+
+    Attributes:
+
+        tokens -- uint32 array, the token of each record
+        offsets -- uint32 array of len(records)+1, the vertices of record i
+            are vertices[offsets[i]:offsets[i+1]]
+        vertices -- structured array with 'position' and (depending on the
+            feedback type) 'color' and 'texture' float32 fields
+        values -- float32 array, the GL_PASS_THROUGH_TOKEN value of each
+            record (NaN for other records)
+
+    Indexing produces the same tuples parseFeedback would return.
+    """
+    __slots__ = ('tokens','offsets','vertices','values')
+    def __init__( self, tokens, offsets, vertices, values ):
+        self.tokens = tokens
+        self.offsets = offsets
+        self.vertices = vertices
+        self.values = values
+    def __len__( self ):
+        return len( self.tokens )
+    def _vertex( self, index ):
+        row = self.vertices[index]
+        names = row.dtype.names
+        return Vertex(
+            row['position'].tolist(),
+            row['color'].tolist() if 'color' in names else None,
+            row['texture'].tolist() if 'texture' in names else None,
+        )
+    def __getitem__( self, index ):
+        """Produce the parseFeedback-style tuple for record index"""
+        if isinstance( index, slice ):
+            return [self[i] for i in range( *index.indices( len(self) ))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError( index )
+        token = int(self.tokens[index])
+        if token == _simple.GL_PASS_THROUGH_TOKEN:
+            return (_simple.GL_PASS_THROUGH_TOKEN, float(self.values[index]))
+        vertices = [
+            self._vertex( i )
+            for i in range( self.offsets[index], self.offsets[index+1] )
+        ]
+        if token == _simple.GL_POLYGON_TOKEN:
+            return tuple( [_simple.GL_POLYGON_TOKEN] + vertices )
+        return tuple( [token] + vertices )
+    def __iter__( self ):
+        for index in range( len(self) ):
+            yield self[index]
+
+def parseFeedbackColumnar( buffer, entryCount, mode=None ):
+    """Parse the feedback buffer into a FeedbackRecords instance
+
+    buffer -- the float feedback buffer
+    entryCount -- number of values written (glRenderMode's result)
+    mode -- feedback type (GL_2D ...), defaults to the type registered
+        with glFeedbackBuffer for the current context
+    """
+    import numpy
+    if mode is None:
+        mode = contextdata.getValue( "GL_FEEDBACK_BUFFER_TYPE" )
+    positionSize, colorSize, textureSize = _vertexLayout(
+        mode, _colorSize() if mode not in (_simple.GL_2D,_simple.GL_3D) else 4,
+    )
+    vertexSize = positionSize+colorSize+textureSize
+    data = numpy.asarray( buffer, dtype=numpy.float32 ).reshape( (-1,) )[:entryCount]
+    fields = [('position',numpy.float32,(positionSize,))]
+    if colorSize:
+        fields.append( ('color',numpy.float32,(colorSize,)) )
+    if textureSize:
+        fields.append( ('texture',numpy.float32,(4,)) )
+    vertexType = numpy.dtype( fields )
+
+    tokens = vertexStarts = counts = None
+    if entryCount:
+        # common case, a stream of only points or only lines is a simple
+        # stride of the buffer
+        first = int(data[0])
+        perRecord = 1 if first in SINGLE_VERTEX_TOKENS else 2 if first in DOUBLE_VERTEX_TOKENS else 0
+        stride = 1+perRecord*vertexSize
+        if perRecord and entryCount % stride == 0:
+            heads = data[::stride]
+            if (heads == first).all() or (
+                perRecord == 2 and numpy.isin( heads, list(DOUBLE_VERTEX_TOKENS) ).all()
+            ):
+                tokens = heads.astype( numpy.uint32 )
+                recordStarts = numpy.arange( 0, entryCount, stride, dtype=numpy.intp )
+                vertexStarts = (
+                    recordStarts[:,None] + 1 + numpy.arange( perRecord )[None,:]*vertexSize
+                ).reshape( (-1,) )
+                counts = numpy.full( (len(tokens),), perRecord, dtype=numpy.intp )
+                values = numpy.full( (len(tokens),), numpy.nan, dtype=numpy.float32 )
+    if tokens is None:
+        # general case, walk the token stream (plain Python floats are
+        # much cheaper to walk than numpy scalars)
+        stream = data.tolist()
+        tokenList, countList, startList, valueList = [], [], [], []
+        index = 0
+        nan = float('nan')
+        while index < entryCount:
+            token = int(stream[index])
+            index += 1
+            value = nan
+            if token in SINGLE_VERTEX_TOKENS:
+                count = 1
+            elif token in DOUBLE_VERTEX_TOKENS:
+                count = 2
+            elif token == _simple.GL_PASS_THROUGH_TOKEN:
+                count = 0
+                value = stream[index]
+                index += 1
+            elif token == _simple.GL_POLYGON_TOKEN:
+                count = int(stream[index])
+                index += 1
+            else:
+                raise ValueError(
+                    """Unrecognised token %r in feedback stream"""%(token,)
+                )
+            tokenList.append( token )
+            countList.append( count )
+            valueList.append( value )
+            startList.extend( range( index, index+count*vertexSize, vertexSize ))
+            index += count*vertexSize
+        tokens = numpy.array( tokenList, dtype=numpy.uint32 )
+        counts = numpy.array( countList, dtype=numpy.intp )
+        values = numpy.array( valueList, dtype=numpy.float32 )
+        vertexStarts = numpy.array( startList, dtype=numpy.intp )
+    offsets = numpy.zeros( (len(tokens)+1,), dtype=numpy.uint32 )
+    numpy.cumsum( counts, out=offsets[1:] )
+    gathered = data[ vertexStarts[:,None] + numpy.arange( vertexSize )[None,:] ]
+    vertices = numpy.ascontiguousarray( gathered ).view( vertexType ).reshape( (-1,) )
+    return FeedbackRecords( tokens, offsets, vertices, values )
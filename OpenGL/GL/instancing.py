@@ -0,0 +1,302 @@
+"""Instanced drawing of one mesh with per-instance attribute streams
+
+Drawing the same glyph or mesh for many objects with one draw call (plus
+uniform updates) per object costs several wrapped calls per object.  An
+InstancedMesh instead keeps one record per instance (by default a
+transform, a color and a scale) in a numpy structured array mirrored in
+a buffer object which is attached to a second vertex binding with an
+instance divisor of 1, the whole layout living in a VAO from
+vertexarrays.vertexArray() (created, divisors included, once per
+context).  Updating N instances is one numpy write plus one ranged
+glBufferSubData of the changed records, drawing them is a single
+glDrawArraysInstancedBaseInstance (or glDrawElementsInstancedBaseInstance).
+
+The per-instance record array grows (doubling) as instances are added,
+re-allocating the buffer object under the same name, so the VAO stays
+valid.
+
+Matrix fields are stored in GL memory layout (as produced by
+OpenGL.GL.transforms), each row of the numpy field feeding one column of
+the shader's mat4, which occupies 4 consecutive attribute locations.
+With the default INSTANCE record and locations the vertex shader
+declares:
+
+    layout(location=0) in vec3 position;
+    layout(location=4) in mat4 transform;
+    layout(location=8) in vec4 color;
+    layout(location=9) in vec3 scale;
+
+Usage:
+
+    markers = instancing.InstancedMesh( glyph ) # (N,3) float positions
+    ...
+    markers.update( { 'transform': matrices, 'color': colors, 'scale': scales } )
+    markers.draw()
+"""
+import ctypes
+import numpy
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_5, GL_3_0, GL_3_1, GL_4_2
+from OpenGL.raw.GL import _types
+from OpenGL.GL import vertexarrays
+
+__all__ = (
+    'INSTANCE',
+    'INSTANCE_LOCATIONS',
+    'attributes',
+    'InstancedMesh',
+)
+
+INSTANCE = numpy.dtype( [
+    ('transform','<f4',(4,4)),
+    ('color','<f4',(4,)),
+    ('scale','<f4',(3,)),
+] )
+INSTANCE_LOCATIONS = {
+    'transform': 4,
+    'color': 8,
+    'scale': 9,
+}
+
+# numpy scalar type: (GL type, normalized, integer)
+GL_TYPES = {
+    'f4': (GL_1_1.GL_FLOAT, False, False),
+    'u1': (GL_1_1.GL_UNSIGNED_BYTE, True, False),
+    'i1': (GL_1_1.GL_BYTE, True, False),
+    'u2': (GL_1_1.GL_UNSIGNED_SHORT, True, False),
+    'i2': (GL_1_1.GL_SHORT, True, False),
+    'u4': (GL_1_1.GL_UNSIGNED_INT, False, True),
+    'i4': (GL_1_1.GL_INT, False, True),
+}
+INDEX_TYPES = {
+    1: GL_1_1.GL_UNSIGNED_BYTE,
+    2: GL_1_1.GL_UNSIGNED_SHORT,
+    4: GL_1_1.GL_UNSIGNED_INT,
+}
+
+def attributes( dtype, locations, binding=0, divisor=0 ):
+    """VertexAttributes for fields of a structured dtype
+
+    locations -- mapping of field name: (first) attribute location,
+        fields of shape (rows,columns) use rows consecutive locations
+
+    8/16-bit integer fields are normalized, 32-bit ones are passed as
+    integer attributes.
+    """
+    result = []
+    for name,location in locations.items():
+        fieldType, offset = dtype.fields[ name ][:2]
+        base = fieldType.base
+        glType, normalized, integer = GL_TYPES[ '%s%s'%( base.kind, base.itemsize ) ]
+        shape = fieldType.shape
+        rows, components = (shape if len(shape) == 2 else (1, (shape or (1,))[0]))
+        for row in range( rows ):
+            result.append( vertexarrays.VertexAttribute(
+                location+row, components, glType, normalized=normalized,
+                offset=offset + row*components*base.itemsize,
+                divisor=divisor, binding=binding, integer=integer,
+            ))
+    return result
+
+def _genBuffer( target, data, usage ):
+    buffer = _types.GLuint( 0 )
+    GL_1_5.glGenBuffers( 1, ctypes.byref( buffer ))
+    GL_1_5.glBindBuffer( target, buffer.value )
+    GL_1_5.glBufferData( target, data.nbytes, data, usage )
+    return buffer.value
+
+class InstancedMesh( object ):
+    """A mesh drawn once per record of a growable instance array
+
+    Attributes of note:
+
+        vertices -- per-vertex structured array
+        indices -- element indices or None
+        records -- instance structured array, of which the first count
+            entries are drawn
+        count -- number of live instances
+        format -- the combined vertexarrays.VertexFormat (binding 0 per
+            vertex, binding 1 per instance)
+    """
+    CAPACITY = 64
+    def __init__(
+        self, vertices, indices=None, mode=GL_1_1.GL_TRIANGLES,
+        vertexLocations=None, instanceType=INSTANCE, instanceLocations=INSTANCE_LOCATIONS,
+        capacity=CAPACITY,
+    ):
+        """Describe the mesh (no GL calls are made)
+
+        vertices -- structured array, or (N,k) array of positions which
+            is converted to float32 field 'position'
+        indices -- optional unsigned 8/16/32-bit element indices
+        vertexLocations -- mapping of vertex field: location, default
+            {'position': 0}
+        instanceType, instanceLocations -- per-instance record dtype and
+            mapping of field: location
+        """
+        vertices = numpy.asarray( vertices )
+        if vertices.dtype.names is None:
+            vertices = numpy.ascontiguousarray( vertices, dtype='f4' )
+            vertices = vertices.view(
+                [('position','<f4',(vertices.shape[-1],))]
+            ).reshape( (-1,) )
+        self.vertices = vertices
+        if vertexLocations is None:
+            vertexLocations = { 'position': 0 }
+        if indices is not None:
+            indices = numpy.ascontiguousarray( indices ).reshape( (-1,) )
+            if indices.dtype.kind != 'u' or indices.dtype.itemsize not in INDEX_TYPES:
+                indices = indices.astype( 'u4' )
+        self.indices = indices
+        self.mode = mode
+        self.format = vertexarrays.VertexFormat(
+            attributes( vertices.dtype, vertexLocations, 0, 0 ) +
+            attributes( instanceType, instanceLocations, 1, 1 ),
+            strides=(vertices.dtype.itemsize, instanceType.itemsize),
+        )
+        self.records = numpy.zeros( (capacity,), dtype=instanceType )
+        self.count = 0
+        self.vertexBuffer = self.indexBuffer = self.instanceBuffer = None
+        self.bufferCapacity = 0
+        self.dirtyStart = self.dirtyStop = 0
+
+    def __len__( self ):
+        """Number of live instances"""
+        return self.count
+
+    @property
+    def instances( self ):
+        """View of the live instance records (call touch() after writing)"""
+        return self.records[:self.count]
+
+    def touch( self, start=0, stop=None ):
+        """Record that instances [start,stop) need uploading"""
+        if stop is None:
+            stop = self.count
+        if stop <= start:
+            return
+        if self.dirtyStart == self.dirtyStop:
+            self.dirtyStart, self.dirtyStop = start, stop
+        else:
+            self.dirtyStart = min( self.dirtyStart, start )
+            self.dirtyStop = max( self.dirtyStop, stop )
+
+    def resize( self, count ):
+        """Set the number of live instances, growing the record array"""
+        if count > len( self.records ):
+            capacity = len( self.records ) or 1
+            while capacity < count:
+                capacity *= 2
+            grown = numpy.zeros( (capacity,), dtype=self.records.dtype )
+            grown[:self.count] = self.records[:self.count]
+            self.records = grown
+        if count > self.count:
+            self.touch( self.count, count )
+        self.count = count
+
+    def update( self, values, start=0 ):
+        """Write instance records [start,start+len(values)) and mark them dirty
+
+        values -- structured array of the instance type, or mapping of
+            field: array (each with one entry per instance, fields left
+            out keep their current values)
+
+        Instances beyond the current count are added.
+        """
+        if hasattr( values, 'items' ):
+            fields = list( values.items() )
+            if not fields:
+                return
+            size = len( fields[0][1] )
+        else:
+            fields = None
+            size = len( values )
+        stop = start + size
+        if stop > self.count:
+            self.resize( stop )
+        target = self.records[ start:stop ]
+        if fields is None:
+            target[:] = values
+        else:
+            for name,value in fields:
+                target[ name ] = value
+        self.touch( start, stop )
+
+    def upload( self ):
+        """Create the buffers on first use and upload dirty instance records
+
+        The instance buffer is re-allocated (under the same name) when
+        the record array has outgrown it, otherwise only the dirty range
+        is uploaded.
+        """
+        if self.vertexBuffer is None:
+            self.vertexBuffer = _genBuffer( GL_1_5.GL_ARRAY_BUFFER, self.vertices, GL_1_5.GL_STATIC_DRAW )
+            if self.indices is not None:
+                # through the array target, binding an element buffer would
+                # change the currently bound VAO
+                self.indexBuffer = _genBuffer( GL_1_5.GL_ARRAY_BUFFER, self.indices, GL_1_5.GL_STATIC_DRAW )
+            buffer = _types.GLuint( 0 )
+            GL_1_5.glGenBuffers( 1, ctypes.byref( buffer ))
+            self.instanceBuffer = buffer.value
+        GL_1_5.glBindBuffer( GL_1_5.GL_ARRAY_BUFFER, self.instanceBuffer )
+        stride = self.records.dtype.itemsize
+        if self.bufferCapacity < len( self.records ):
+            GL_1_5.glBufferData(
+                GL_1_5.GL_ARRAY_BUFFER, self.records.nbytes, self.records, GL_1_5.GL_DYNAMIC_DRAW,
+            )
+            self.bufferCapacity = len( self.records )
+        elif self.dirtyStop > self.dirtyStart:
+            stop = min( self.dirtyStop, self.count )
+            if stop > self.dirtyStart:
+                GL_1_5.glBufferSubData(
+                    GL_1_5.GL_ARRAY_BUFFER, self.dirtyStart*stride,
+                    (stop-self.dirtyStart)*stride, self.records[self.dirtyStart:stop],
+                )
+        GL_1_5.glBindBuffer( GL_1_5.GL_ARRAY_BUFFER, 0 )
+        self.dirtyStart = self.dirtyStop = 0
+
+    def draw( self, count=None, first=0 ):
+        """Draw instances [first,first+count) (default all live ones)
+
+        Without GL 4.2 base-instance draws a non-zero first is applied
+        as an offset of the instance buffer binding instead.
+        """
+        if count is None:
+            count = self.count - first
+        if count <= 0:
+            return
+        self.upload()
+        baseInstance = bool( GL_4_2.glDrawArraysInstancedBaseInstance )
+        offsets = None
+        if first and not baseInstance:
+            offsets = (0, first*self.records.dtype.itemsize)
+        vertexarrays.vertexArray(
+            self.format, (self.vertexBuffer, self.instanceBuffer), offsets, self.indexBuffer,
+        )
+        if self.indices is None:
+            if baseInstance:
+                GL_4_2.glDrawArraysInstancedBaseInstance( self.mode, 0, len(self.vertices), count, first )
+            else:
+                GL_3_1.glDrawArraysInstanced( self.mode, 0, len(self.vertices), count )
+        else:
+            indexType = INDEX_TYPES[ self.indices.dtype.itemsize ]
+            if baseInstance:
+                GL_4_2.glDrawElementsInstancedBaseInstance(
+                    self.mode, len(self.indices), indexType, None, count, first,
+                )
+            else:
+                GL_3_1.glDrawElementsInstanced( self.mode, len(self.indices), indexType, None, count )
+        GL_3_0.glBindVertexArray( 0 )
+
+    def delete( self ):
+        """Release the buffer objects (the shared VAO stays cached)"""
+        buffers = [
+            buffer for buffer in (self.vertexBuffer, self.indexBuffer, self.instanceBuffer)
+            if buffer is not None
+        ]
+        if buffers:
+            ids = (_types.GLuint * len(buffers))( *buffers )
+            GL_1_5.glDeleteBuffers( len(buffers), ids )
+            vertexarrays.invalidate()
+        self.vertexBuffer = self.indexBuffer = self.instanceBuffer = None
+        self.bufferCapacity = 0
+        self.touch( 0, self.count )
@@ -0,0 +1,143 @@
+"""Per-context cache of implementation limits
+
+Values such as GL_MAX_TEXTURE_SIZE or GL_NUM_COMPRESSED_TEXTURE_FORMATS
+are fixed for the lifetime of a context, yet PyOpenGL's glGet output
+sizing (see OpenGL.raw.GL._lookupint) used to re-query them with a
+wrapped glGetIntegerv every time a data-dependent output array was
+allocated.  ImplementationLimits holds these values for one context,
+stored via OpenGL.contextdata so that making a different context current
+automatically selects (or creates) that context's cache.
+
+Values are queried lazily on first access; call populate() right after
+creating a context to fetch them all in one batch instead.
+
+Usage:
+
+    from OpenGL.GL import limits
+    caps = limits.currentLimits()
+    if width > caps.max_texture_size:
+        ...
+"""
+import ctypes
+from OpenGL import contextdata, error
+from OpenGL.raw.GL.VERSION import (
+    GL_1_1, GL_1_2, GL_1_3, GL_2_0, GL_3_0, GL_3_1, GL_4_1, GL_4_3,
+)
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'ImplementationLimits',
+    'currentLimits',
+    'invalidate',
+)
+
+CONTEXT_KEY = 'OpenGL.GL.limits'
+
+# attribute name: glGetIntegerv constant
+FIELDS = {
+    'max_texture_size': GL_1_1.GL_MAX_TEXTURE_SIZE,
+    'max_3d_texture_size': GL_1_2.GL_MAX_3D_TEXTURE_SIZE,
+    'max_cube_map_texture_size': GL_1_3.GL_MAX_CUBE_MAP_TEXTURE_SIZE,
+    'max_array_texture_layers': GL_3_0.GL_MAX_ARRAY_TEXTURE_LAYERS,
+    'max_texture_image_units': GL_2_0.GL_MAX_TEXTURE_IMAGE_UNITS,
+    'max_combined_texture_image_units': GL_2_0.GL_MAX_COMBINED_TEXTURE_IMAGE_UNITS,
+    'max_vertex_attribs': GL_2_0.GL_MAX_VERTEX_ATTRIBS,
+    'max_vertex_attrib_bindings': GL_4_3.GL_MAX_VERTEX_ATTRIB_BINDINGS,
+    'max_elements_vertices': GL_1_2.GL_MAX_ELEMENTS_VERTICES,
+    'max_elements_indices': GL_1_2.GL_MAX_ELEMENTS_INDICES,
+    'max_draw_buffers': GL_2_0.GL_MAX_DRAW_BUFFERS,
+    'max_color_attachments': GL_3_0.GL_MAX_COLOR_ATTACHMENTS,
+    'max_samples': GL_3_0.GL_MAX_SAMPLES,
+    'max_renderbuffer_size': GL_3_0.GL_MAX_RENDERBUFFER_SIZE,
+    'max_uniform_buffer_bindings': GL_3_1.GL_MAX_UNIFORM_BUFFER_BINDINGS,
+    'max_uniform_block_size': GL_3_1.GL_MAX_UNIFORM_BLOCK_SIZE,
+    'uniform_buffer_offset_alignment': GL_3_1.GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT,
+    'max_shader_storage_buffer_bindings': GL_4_3.GL_MAX_SHADER_STORAGE_BUFFER_BINDINGS,
+    'max_shader_storage_block_size': GL_4_3.GL_MAX_SHADER_STORAGE_BLOCK_SIZE,
+    'shader_storage_buffer_offset_alignment': GL_4_3.GL_SHADER_STORAGE_BUFFER_OFFSET_ALIGNMENT,
+    'num_compressed_texture_formats': GL_1_3.GL_NUM_COMPRESSED_TEXTURE_FORMATS,
+    'num_program_binary_formats': GL_4_1.GL_NUM_PROGRAM_BINARY_FORMATS,
+    'num_shader_binary_formats': GL_4_1.GL_NUM_SHADER_BINARY_FORMATS,
+    'num_extensions': GL_3_0.GL_NUM_EXTENSIONS,
+    'index_mode': GL_1_1.GL_INDEX_MODE,
+}
+# constants which LookupInt may answer from the cache
+CACHED = frozenset( FIELDS.values() )
+
+class ImplementationLimits( object ):
+    """Implementation-dependent integer limits of a single context
+
+    Each name in FIELDS is available as an attribute, limits the context
+    does not support (GL_INVALID_ENUM) read as 0 (re-queried on each
+    access, as an error may also have been transient).
+
+    Attributes of note:
+
+        values -- mapping of GL constant: queried integer value
+    """
+    def __init__( self ):
+        self.values = {}
+
+    def get( self, constant ):
+        """Retrieve the (cached) integer value of constant
+
+        The query is checked immediately even if deferred error checking
+        is active, a query which raised an error reads as 0 and is not
+        cached.
+        """
+        try:
+            return self.values[ constant ]
+        except KeyError:
+            pass
+        output = _types.GLint()
+        with error.fullChecking():
+            try:
+                GL_1_1.glGetIntegerv( constant, ctypes.byref( output ))
+            except error.GLError:
+                return 0
+        self.values[ constant ] = value = output.value
+        return value
+
+    def populate( self ):
+        """Query every limit in FIELDS in one batch
+
+        Errors for unsupported limits are checked (and discarded)
+        per-query even if deferred error checking is active.
+        """
+        with error.fullChecking():
+            for constant in FIELDS.values():
+                self.get( constant )
+        return self
+
+    def __getattr__( self, key ):
+        """Allow limits.max_texture_size style access"""
+        try:
+            constant = FIELDS[ key ]
+        except KeyError:
+            raise AttributeError( key )
+        return self.get( constant )
+
+    def __repr__( self ):
+        return '%s(%s)'%(
+            self.__class__.__name__,
+            ', '.join([
+                '%s=%s'%( key, self.values[constant] )
+                for key,constant in sorted( FIELDS.items() )
+                if constant in self.values
+            ]),
+        )
+
+def currentLimits( context=None ):
+    """Retrieve the ImplementationLimits for context (default current)
+
+    raises error.Error if there is no current context
+    """
+    limits = contextdata.getValue( CONTEXT_KEY, context )
+    if limits is None:
+        limits = ImplementationLimits()
+        contextdata.setValue( CONTEXT_KEY, limits, context )
+    return limits
+
+def invalidate( context=None ):
+    """Discard the cached limits for context (default current)"""
+    return contextdata.delValue( CONTEXT_KEY, context )
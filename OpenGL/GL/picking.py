@@ -0,0 +1,343 @@
+"""GPU object picking via an offscreen ID buffer
+
+Rather than re-rendering the scene under glRenderMode( GL_SELECT ) and
+parsing the selection buffer, each pickable object is drawn once (only
+when the scene changes) into an offscreen framebuffer with its object id
+as the "colour", and clicks or hovers are resolved by reading back the
+single pixel under the cursor.  The readback goes through a small ring
+of GL_PIXEL_PACK_BUFFERs guarded by fences, so a request made in a mouse
+callback is normally resolved on the next frame without ever stalling
+the pipeline.
+
+Two encodings are supported:
+
+    integer=False (default) -- GL_RGBA8 attachment, ids are encoded in
+        the red/green/blue bytes (see idToColor), so legacy
+        fixed-function code can write them with glColor3ub
+    integer=True -- GL_R32UI attachment, for shader code writing the id
+        to a uint output directly
+
+Id 0 is reserved for "nothing".
+
+Usage:
+
+    picker = picking.PickBuffer( width, height )
+    ...
+    if scene_changed:
+        with picker:
+            for id,obj in enumerate( objects, 1 ):
+                glColor3ub( *picking.idToColor( id ) )
+                obj.draw()
+    ...
+    # in the mouse callback, window coordinates (origin top-left)
+    picker.request( x, height-y-1, tag='click' )
+    ...
+    # once per frame
+    for tag,id in picker.poll():
+        ...
+"""
+import ctypes
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_3, GL_1_4, GL_1_5, GL_2_1, GL_3_0, GL_3_2
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'PickBuffer',
+    'idToColor',
+    'colorToId',
+)
+
+# capabilities which would corrupt the ids
+ID_PASS_DISABLE = (GL_1_1.GL_BLEND, GL_1_1.GL_DITHER, GL_1_3.GL_MULTISAMPLE)
+# fixed-function capabilities also disabled on compatibility contexts
+LEGACY_DISABLE = (GL_1_1.GL_LIGHTING, GL_1_1.GL_TEXTURE_2D, GL_1_1.GL_FOG, GL_1_1.GL_POINT_SMOOTH)
+# pack state for reading back exactly one pixel into a 4-byte buffer
+TIGHT_PACK = (
+    (GL_1_1.GL_PACK_ALIGNMENT, 1),
+    (GL_1_1.GL_PACK_ROW_LENGTH, 0),
+    (GL_1_1.GL_PACK_SKIP_ROWS, 0),
+    (GL_1_1.GL_PACK_SKIP_PIXELS, 0),
+)
+
+def idToColor( id ):
+    """Encode an object id (< 2**24) as an (r,g,b) unsigned byte triple"""
+    return ( id & 0xff, (id >> 8) & 0xff, (id >> 16) & 0xff )
+def colorToId( r, g, b ):
+    """Decode an (r,g,b) unsigned byte triple produced by idToColor"""
+    return r | (g << 8) | (b << 16)
+
+class PickBuffer( object ):
+    """Offscreen id framebuffer with asynchronous 1x1 readback
+
+    Attributes of note:
+
+        framebuffer -- GLuint framebuffer id (None until create())
+        dirty -- True until the id pass has been rendered for the current
+            size, callers may also set it when the scene changes
+        pending -- list of [tag,pbo,fence,inside,id] readback records,
+            oldest first, id is None until resolved
+    """
+    BUFFER_COUNT = 2
+    def __init__( self, width, height, integer=False, buffers=BUFFER_COUNT ):
+        self.width = int(width)
+        self.height = int(height)
+        self.integer = integer
+        self.buffer_count = max((int(buffers),1))
+        self.framebuffer = None
+        self.renderbuffers = []
+        self.buffers = []
+        self.free = []
+        self.pending = []
+        self.dirty = True
+        self._saved = None
+
+    def create( self ):
+        """Allocate the framebuffer, attachments and readback buffers"""
+        if self.framebuffer is not None:
+            return self
+        framebuffer = _types.GLuint()
+        GL_3_0.glGenFramebuffers( 1, ctypes.byref( framebuffer ))
+        self.framebuffer = framebuffer.value
+        self._allocate()
+        ids = (_types.GLuint * self.buffer_count)()
+        GL_1_5.glGenBuffers( self.buffer_count, ids )
+        self.buffers = list(ids)
+        for buffer in self.buffers:
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, buffer )
+            GL_1_5.glBufferData( GL_2_1.GL_PIXEL_PACK_BUFFER, 4, None, GL_1_5.GL_STREAM_READ )
+        GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, 0 )
+        self.free = list(self.buffers)
+        return self
+
+    def _allocate( self ):
+        """(Re)create the colour/depth renderbuffers at the current size"""
+        if self.renderbuffers:
+            ids = (_types.GLuint * len(self.renderbuffers))( *self.renderbuffers )
+            GL_3_0.glDeleteRenderbuffers( len(self.renderbuffers), ids )
+        ids = (_types.GLuint * 2)()
+        GL_3_0.glGenRenderbuffers( 2, ids )
+        self.renderbuffers = list(ids)
+        color, depth = self.renderbuffers
+        previous = _types.GLint()
+        GL_1_1.glGetIntegerv( GL_3_0.GL_DRAW_FRAMEBUFFER_BINDING, ctypes.byref( previous ))
+        GL_3_0.glBindFramebuffer( GL_3_0.GL_FRAMEBUFFER, self.framebuffer )
+        GL_3_0.glBindRenderbuffer( GL_3_0.GL_RENDERBUFFER, color )
+        GL_3_0.glRenderbufferStorage(
+            GL_3_0.GL_RENDERBUFFER,
+            GL_3_0.GL_R32UI if self.integer else GL_1_1.GL_RGBA8,
+            self.width, self.height,
+        )
+        GL_3_0.glFramebufferRenderbuffer(
+            GL_3_0.GL_FRAMEBUFFER, GL_3_0.GL_COLOR_ATTACHMENT0, GL_3_0.GL_RENDERBUFFER, color,
+        )
+        GL_3_0.glBindRenderbuffer( GL_3_0.GL_RENDERBUFFER, depth )
+        GL_3_0.glRenderbufferStorage(
+            GL_3_0.GL_RENDERBUFFER, GL_1_4.GL_DEPTH_COMPONENT24,
+            self.width, self.height,
+        )
+        GL_3_0.glFramebufferRenderbuffer(
+            GL_3_0.GL_FRAMEBUFFER, GL_3_0.GL_DEPTH_ATTACHMENT, GL_3_0.GL_RENDERBUFFER, depth,
+        )
+        GL_3_0.glBindRenderbuffer( GL_3_0.GL_RENDERBUFFER, 0 )
+        status = GL_3_0.glCheckFramebufferStatus( GL_3_0.GL_FRAMEBUFFER )
+        GL_3_0.glBindFramebuffer( GL_3_0.GL_FRAMEBUFFER, previous.value )
+        if status != GL_3_0.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError( """Picking framebuffer incomplete: 0x%x"""%(status,))
+        self.dirty = True
+
+    def resize( self, width, height ):
+        """Change the size of the id buffer (e.g. from a reshape callback)"""
+        width, height = int(width), int(height)
+        if (width,height) == (self.width,self.height):
+            return
+        self.width, self.height = width, height
+        if self.framebuffer is not None:
+            self._discard_pending()
+            self._allocate()
+        self.dirty = True
+
+    def delete( self ):
+        """Release all GL resources"""
+        self._discard_pending()
+        if self.buffers:
+            ids = (_types.GLuint * len(self.buffers))( *self.buffers )
+            GL_1_5.glDeleteBuffers( len(self.buffers), ids )
+            self.buffers = []
+            self.free = []
+        if self.renderbuffers:
+            ids = (_types.GLuint * len(self.renderbuffers))( *self.renderbuffers )
+            GL_3_0.glDeleteRenderbuffers( len(self.renderbuffers), ids )
+            self.renderbuffers = []
+        if self.framebuffer is not None:
+            GL_3_0.glDeleteFramebuffers( 1, ctypes.byref( _types.GLuint( self.framebuffer )))
+            self.framebuffer = None
+
+    def _compatibility( self ):
+        """Does the current context have the fixed-function pipeline?"""
+        from OpenGL.GL import limits
+        mask = limits.currentLimits().get( GL_3_2.GL_CONTEXT_PROFILE_MASK )
+        return not (mask & GL_3_2.GL_CONTEXT_CORE_PROFILE_BIT)
+
+    def begin( self ):
+        """Start rendering the id pass
+
+        Binds and clears (to id 0) the id framebuffer and disables state
+        which would corrupt the ids (blending, dithering, multisampling
+        and, on compatibility contexts, lighting, texturing, fog and
+        point smoothing, saved with glPushAttrib( GL_ENABLE_BIT ));
+        end() restores the previous framebuffer, viewport and state.
+        """
+        if self.framebuffer is None:
+            self.create()
+        framebuffer = _types.GLint()
+        GL_1_1.glGetIntegerv( GL_3_0.GL_DRAW_FRAMEBUFFER_BINDING, ctypes.byref( framebuffer ))
+        viewport = (_types.GLint * 4)()
+        GL_1_1.glGetIntegerv( GL_1_1.GL_VIEWPORT, viewport )
+        if self._compatibility():
+            GL_1_1.glPushAttrib( GL_1_1.GL_ENABLE_BIT )
+            enabled = None
+            disable = ID_PASS_DISABLE + LEGACY_DISABLE
+        else:
+            enabled = [
+                (capability, GL_1_1.glIsEnabled( capability ))
+                for capability in ID_PASS_DISABLE
+            ]
+            disable = ID_PASS_DISABLE
+        self._saved = (framebuffer.value, tuple(viewport), enabled)
+        GL_3_0.glBindFramebuffer( GL_3_0.GL_DRAW_FRAMEBUFFER, self.framebuffer )
+        GL_1_1.glViewport( 0, 0, self.width, self.height )
+        for capability in disable:
+            GL_1_1.glDisable( capability )
+        if self.integer:
+            GL_3_0.glClearBufferuiv( GL_1_1.GL_COLOR, 0, (_types.GLuint * 4)() )
+        else:
+            GL_3_0.glClearBufferfv( GL_1_1.GL_COLOR, 0, (_types.GLfloat * 4)() )
+        GL_3_0.glClearBufferfv( GL_1_1.GL_DEPTH, 0, (_types.GLfloat * 1)( 1.0 ) )
+        return self
+    def end( self ):
+        """Finish the id pass, restoring the previous render target"""
+        if self._saved is None:
+            return
+        framebuffer, viewport, enabled = self._saved
+        self._saved = None
+        GL_3_0.glBindFramebuffer( GL_3_0.GL_DRAW_FRAMEBUFFER, framebuffer )
+        GL_1_1.glViewport( *viewport )
+        if enabled is None:
+            GL_1_1.glPopAttrib()
+        else:
+            for capability,state in enabled:
+                if state:
+                    GL_1_1.glEnable( capability )
+        self.dirty = False
+
+    __enter__ = begin
+    def __exit__( self, exc_type=None, exc_val=None, exc_tb=None ):
+        """Context manager exit"""
+        self.end()
+        return False # do not supress exceptions...
+
+    def request( self, x, y, tag=None ):
+        """Queue an asynchronous readback of the id at (x,y)
+
+        x,y -- GL window coordinates (origin bottom-left), requests
+            outside the buffer resolve to id 0
+        tag -- arbitrary value returned with the result from poll()
+
+        If every readback buffer is in use the oldest request is resolved
+        (blocking) first; its result is kept for the next poll().
+        """
+        if self.framebuffer is None:
+            self.create()
+        if not self.free:
+            for entry in self.pending:
+                if entry[4] is None:
+                    self._resolve( entry, True )
+                    break
+        buffer = self.free.pop(0)
+        inside = 0 <= x < self.width and 0 <= y < self.height
+        if inside:
+            previous = _types.GLint()
+            GL_1_1.glGetIntegerv( GL_3_0.GL_READ_FRAMEBUFFER_BINDING, ctypes.byref( previous ))
+            GL_3_0.glBindFramebuffer( GL_3_0.GL_READ_FRAMEBUFFER, self.framebuffer )
+            GL_1_1.glReadBuffer( GL_3_0.GL_COLOR_ATTACHMENT0 )
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, buffer )
+            saved = []
+            value = _types.GLint()
+            for pname,tight in TIGHT_PACK:
+                GL_1_1.glGetIntegerv( pname, ctypes.byref( value ))
+                saved.append( value.value )
+                if value.value != tight:
+                    GL_1_1.glPixelStorei( pname, tight )
+            if self.integer:
+                GL_1_1.glReadPixels(
+                    int(x), int(y), 1, 1, GL_3_0.GL_RED_INTEGER, GL_1_1.GL_UNSIGNED_INT,
+                    ctypes.c_void_p( 0 ),
+                )
+            else:
+                GL_1_1.glReadPixels(
+                    int(x), int(y), 1, 1, GL_1_1.GL_RGBA, GL_1_1.GL_UNSIGNED_BYTE,
+                    ctypes.c_void_p( 0 ),
+                )
+            for (pname,tight),value in zip( TIGHT_PACK, saved ):
+                if value != tight:
+                    GL_1_1.glPixelStorei( pname, value )
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, 0 )
+            GL_3_0.glBindFramebuffer( GL_3_0.GL_READ_FRAMEBUFFER, previous.value )
+            fence = GL_3_2.glFenceSync( GL_3_2.GL_SYNC_GPU_COMMANDS_COMPLETE, 0 )
+        else:
+            fence = None
+        self.pending.append( [tag, buffer, fence, inside, None] )
+        return self
+
+    def _resolve( self, entry, wait ):
+        """Complete entry if its fence has signalled (or wait is True)"""
+        tag, buffer, fence, inside, result = entry
+        if result is not None:
+            return True
+        if fence:
+            status = GL_3_2.glClientWaitSync(
+                fence, GL_3_2.GL_SYNC_FLUSH_COMMANDS_BIT, 1000000000 if wait else 0,
+            )
+            if status not in (GL_3_2.GL_ALREADY_SIGNALED, GL_3_2.GL_CONDITION_SATISFIED):
+                if not wait:
+                    return False
+            GL_3_2.glDeleteSync( fence )
+            entry[2] = None
+        id = 0
+        if inside:
+            pixel = (ctypes.c_ubyte * 4)()
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, buffer )
+            GL_1_5.glGetBufferSubData( GL_2_1.GL_PIXEL_PACK_BUFFER, 0, 4, pixel )
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_PACK_BUFFER, 0 )
+            if self.integer:
+                id = ctypes.cast( pixel, ctypes.POINTER( ctypes.c_uint32 ))[0]
+            else:
+                id = colorToId( pixel[0], pixel[1], pixel[2] )
+        entry[4] = id
+        self.free.append( buffer )
+        return True
+
+    def poll( self ):
+        """Collect finished readbacks without blocking
+
+        returns list of (tag,id) in request order
+        """
+        results = []
+        while self.pending and self._resolve( self.pending[0], False ):
+            entry = self.pending.pop(0)
+            results.append( (entry[0], entry[4]) )
+        return results
+
+    def pick( self, x, y ):
+        """Synchronously read the id at (x,y), see request"""
+        self.request( x, y )
+        entry = self.pending.pop()
+        self._resolve( entry, True )
+        return entry[4]
+
+    def _discard_pending( self ):
+        for entry in self.pending:
+            if entry[2]:
+                GL_3_2.glDeleteSync( entry[2] )
+            if entry[4] is None:
+                self.free.append( entry[1] )
+        self.pending = []
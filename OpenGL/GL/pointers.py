@@ -16,7 +16,7 @@ def glVertexPointerd( array ):
     storedPointers[ GL_VERTEX_ARRAY ] = arg4
     return arg4
 """
-from OpenGL import platform, error, wrapper, contextdata, converters, constant
+from OpenGL import platform, error, wrapper, contextdata, converters, constant, _configflags
 from OpenGL.arrays import arrayhelpers, arraydatatype
 from OpenGL.raw.GL.VERSION import GL_1_1 as _simple
 import ctypes
@@ -280,10 +280,16 @@ def glRenderMode( newMode ):
         raise error.Error(
             """Returning from glRenderMode without a valid context!"""
         )
-    arrayConstant, wrapperFunction = {
-        _simple.GL_FEEDBACK: (_simple.GL_FEEDBACK_BUFFER_POINTER,feedback.parseFeedback),
-        _simple.GL_SELECT: (_simple.GL_SELECTION_BUFFER_POINTER, selection.GLSelectRecord.fromArray),
-    }[ currentMode ]
+    if _configflags.COLUMNAR_RENDER_MODE:
+        arrayConstant, wrapperFunction = {
+            _simple.GL_FEEDBACK: (_simple.GL_FEEDBACK_BUFFER_POINTER,feedback.parseFeedbackColumnar),
+            _simple.GL_SELECT: (_simple.GL_SELECTION_BUFFER_POINTER, selection.SelectionHits.fromArray),
+        }[ currentMode ]
+    else:
+        arrayConstant, wrapperFunction = {
+            _simple.GL_FEEDBACK: (_simple.GL_FEEDBACK_BUFFER_POINTER,feedback.parseFeedback),
+            _simple.GL_SELECT: (_simple.GL_SELECTION_BUFFER_POINTER, selection.GLSelectRecord.fromArray),
+        }[ currentMode ]
     current = contextdata.getValue( arrayConstant )
     # XXX check to see if it's the *same* array we set currently!
     if current is None:
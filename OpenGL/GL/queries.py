@@ -0,0 +1,277 @@
+"""Pooled timer/occlusion queries with non-blocking result harvesting
+
+Reading a query result with glGetQueryObjectui64v right after glEndQuery
+forces the CPU to wait for the GPU to finish all preceding work.
+QueryPool instead keeps queries in flight for as many frames as the GPU
+needs: results are only collected (by harvest(), normally from
+endFrame()) once GL_QUERY_RESULT_AVAILABLE says they can be read without
+waiting, and are then recorded in per-label rolling histories.  Query
+objects are generated in blocks and recycled rather than created and
+deleted per measurement.
+
+With GL 4.4 / ARB_query_buffer_object (useQueryBuffer=True), each result
+is instead written by the GPU into a buffer object; endFrame() fences
+the frame's results and once the fence has signalled they are read back
+with one glGetBufferSubData per query block, rather than one
+availability test plus one result query per measurement.
+
+Timer queries of one target cannot be nested, use separate labels in
+sequence (or separate pools for GL_SAMPLES_PASSED style occlusion
+queries, which measure the number of samples drawn).
+
+Usage:
+
+    timers = queries.QueryPool( GL_TIME_ELAPSED )
+    ...
+    with timers.scope( 'radar' ):
+        draw_radar()
+    with timers.scope( 'devices' ):
+        draw_devices()
+    timers.endFrame()
+    ...
+    print( timers.statistics( 'radar' ) ) # nanoseconds
+"""
+import ctypes
+from collections import deque
+from OpenGL import extensions
+from OpenGL.raw.GL.VERSION import GL_1_5, GL_3_2, GL_3_3, GL_4_4
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'QueryPool',
+)
+
+class _QueryBlock( object ):
+    """A bulk-generated set of query objects (and optional result buffer)"""
+    def __init__( self, size, useQueryBuffer ):
+        self.ids = (_types.GLuint * size)()
+        GL_1_5.glGenQueries( size, self.ids )
+        self.buffer = None
+        if useQueryBuffer:
+            buffer = _types.GLuint( 0 )
+            GL_1_5.glGenBuffers( 1, ctypes.byref( buffer ))
+            self.buffer = buffer.value
+            GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, self.buffer )
+            GL_1_5.glBufferData( GL_4_4.GL_QUERY_BUFFER, size*8, None, GL_1_5.GL_STREAM_READ )
+            GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, 0 )
+            self.results = (_types.GLuint64 * size)()
+    def delete( self ):
+        GL_1_5.glDeleteQueries( len(self.ids), self.ids )
+        if self.buffer is not None:
+            GL_1_5.glDeleteBuffers( 1, ctypes.byref( _types.GLuint( self.buffer )))
+            self.buffer = None
+
+class _Scope( object ):
+    def __init__( self, pool, label ):
+        self.pool = pool
+        self.label = label
+    def __enter__( self ):
+        self.pool.begin( self.label )
+        return self.pool
+    def __exit__( self, *args ):
+        self.pool.end()
+
+class QueryPool( object ):
+    """Recycling pool of query objects for a single query target
+
+    Attributes of note:
+
+        target -- GL_TIME_ELAPSED, GL_SAMPLES_PASSED,
+            GL_ANY_SAMPLES_PASSED...
+        history -- number of results kept per label
+        samples -- mapping of label: deque of recent results
+        frames -- deque of in-flight frames, each [fence, [(block,index,label)...]]
+        useQueryBuffer -- whether results are written to buffer objects
+            (falls back to False without query buffer support)
+    """
+    BLOCK = 32
+    HISTORY = 120
+    def __init__( self, target=GL_3_3.GL_TIME_ELAPSED, history=HISTORY, block=BLOCK, useQueryBuffer=False ):
+        self.target = target
+        self.history = history
+        self.block = block
+        if useQueryBuffer and not (
+            extensions.hasGLExtension( 'GL_VERSION_GL_4_4' ) or
+            extensions.hasGLExtension( 'GL_ARB_query_buffer_object' )
+        ):
+            useQueryBuffer = False
+        self.useQueryBuffer = useQueryBuffer
+        self.blocks = []
+        self.free = []
+        self.samples = {}
+        self.current = None
+        self.recording = []
+        self.frames = deque()
+
+    def _acquire( self ):
+        if not self.free:
+            block = _QueryBlock( self.block, self.useQueryBuffer )
+            self.blocks.append( block )
+            self.free.extend( (block,index) for index in range( self.block-1, -1, -1 ))
+        return self.free.pop()
+
+    def begin( self, label ):
+        """Start a measurement for label
+
+        raises RuntimeError if a measurement is already active
+        """
+        if self.current is not None:
+            raise RuntimeError(
+                """Query %r is still active, queries of one target cannot nest"""%( self.current[2], )
+            )
+        block, index = self._acquire()
+        GL_1_5.glBeginQuery( self.target, block.ids[index] )
+        self.current = (block, index, label)
+
+    def end( self ):
+        """Finish the active measurement
+
+        raises RuntimeError if no measurement is active
+        """
+        if self.current is None:
+            raise RuntimeError(
+                """No active query to end, call begin( label ) first"""
+            )
+        block, index, label = self.current
+        self.current = None
+        GL_1_5.glEndQuery( self.target )
+        if block.buffer is not None:
+            # GPU-side copy of the result, no CPU wait
+            GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, block.buffer )
+            GL_3_3.glGetQueryObjectui64v(
+                block.ids[index], GL_1_5.GL_QUERY_RESULT, ctypes.c_void_p( index*8 ),
+            )
+            GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, 0 )
+        self.recording.append( (block, index, label) )
+
+    def scope( self, label ):
+        """Context manager measuring the enclosed GL commands as label"""
+        return _Scope( self, label )
+
+    def endFrame( self ):
+        """Close the current frame's measurements and harvest finished ones
+
+        returns the [(label,value)] harvested
+        """
+        if self.recording:
+            fence = None
+            if self.useQueryBuffer:
+                fence = GL_3_2.glFenceSync( GL_3_2.GL_SYNC_GPU_COMMANDS_COMPLETE, 0 )
+            self.frames.append( [fence, self.recording] )
+            self.recording = []
+        return self.harvest()
+
+    def _record( self, label, value, results ):
+        samples = self.samples.get( label )
+        if samples is None:
+            self.samples[ label ] = samples = deque( maxlen=self.history )
+        samples.append( value )
+        results.append( (label, value) )
+
+    def harvest( self ):
+        """Collect every result which is available without waiting
+
+        Frames are harvested oldest first and harvesting stops at the
+        first frame that is not complete, so this never blocks.
+
+        returns the [(label,value)] harvested
+        """
+        results = []
+        available = _types.GLuint( 0 )
+        value = _types.GLuint64( 0 )
+        frames = self.frames
+        while frames:
+            fence, entries = frames[0]
+            if fence is not None:
+                status = GL_3_2.glClientWaitSync( fence, 0, 0 )
+                if status not in (GL_3_2.GL_ALREADY_SIGNALED, GL_3_2.GL_CONDITION_SATISFIED):
+                    break
+                GL_3_2.glDeleteSync( fence )
+                fence = frames[0][0] = None
+                self._readBuffers( entries, results )
+            else:
+                while entries:
+                    block, index, label = entries[0]
+                    if block.buffer is None:
+                        GL_1_5.glGetQueryObjectuiv(
+                            block.ids[index], GL_1_5.GL_QUERY_RESULT_AVAILABLE, ctypes.byref( available ),
+                        )
+                        if not available.value:
+                            return results
+                        GL_3_3.glGetQueryObjectui64v(
+                            block.ids[index], GL_1_5.GL_QUERY_RESULT, ctypes.byref( value ),
+                        )
+                        self._record( label, value.value, results )
+                    self.free.append( (block,index) )
+                    del entries[0]
+            frames.popleft()
+        return results
+
+    def _readBuffers( self, entries, results ):
+        """Read a signalled frame's results, one read per query block"""
+        byBlock = {}
+        for block, index, label in entries:
+            byBlock.setdefault( block, [] ).append( index )
+        for block, indices in byBlock.items():
+            start, stop = min( indices ), max( indices )+1
+            GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, block.buffer )
+            GL_1_5.glGetBufferSubData(
+                GL_4_4.GL_QUERY_BUFFER, start*8, (stop-start)*8,
+                ctypes.byref( block.results, start*8 ),
+            )
+        GL_1_5.glBindBuffer( GL_4_4.GL_QUERY_BUFFER, 0 )
+        for block, index, label in entries:
+            self._record( label, block.results[index], results )
+            self.free.append( (block,index) )
+        del entries[:]
+
+    def statistics( self, label ):
+        """Summary of label's recent results
+
+        returns dict of count, mean, min, max, median and p95 (in the
+        query's units, nanoseconds for timers), or None if no results
+        """
+        samples = self.samples.get( label )
+        if not samples:
+            return None
+        ordered = sorted( samples )
+        count = len( ordered )
+        return {
+            'count': count,
+            'mean': sum( ordered ) / float( count ),
+            'min': ordered[0],
+            'max': ordered[-1],
+            'median': ordered[ count//2 ],
+            'p95': ordered[ min( count-1, int( count*0.95 )) ],
+        }
+
+    def histogram( self, label, bins=10 ):
+        """Bucket label's recent results into bins equal-width buckets
+
+        returns [(lower,upper,count)...], empty if no results
+        """
+        samples = self.samples.get( label )
+        if not samples:
+            return []
+        low, high = min( samples ), max( samples )
+        width = (high - low) / float( bins ) or 1.0
+        counts = [0] * bins
+        for sample in samples:
+            counts[ min( int( (sample-low)/width ), bins-1 ) ] += 1
+        return [
+            (low + i*width, low + (i+1)*width, count)
+            for i,count in enumerate( counts )
+        ]
+
+    def delete( self ):
+        """Release all query objects, buffers and fences"""
+        for fence, entries in self.frames:
+            if fence is not None:
+                GL_3_2.glDeleteSync( fence )
+        self.frames.clear()
+        for block in self.blocks:
+            block.delete()
+        del self.blocks[:]
+        del self.free[:]
+        self.current = None
+        del self.recording[:]
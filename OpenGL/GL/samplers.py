@@ -0,0 +1,241 @@
+"""Shared sampler objects keyed by their parameter combination
+
+Applications commonly re-issue glTexParameter calls for filtering and
+wrapping every time they bind a texture, and glTexParameter dispatches on
+the Python type of its argument on each of those calls.  With GL 3.3 /
+ARB_sampler_objects the sampling state can instead live in sampler
+objects bound per texture unit, overriding the texture's own parameters.
+
+A SamplerCache hashes each parameter combination (see samplerKey) into a
+single sampler object which is created, and has its parameters set,
+exactly once.  Binding then costs one glBindSampler per unit whose
+sampler actually changed, or a single glBindSamplers (GL 4.4 /
+ARB_multi_bind) for a range of units.  On contexts without sampler
+objects the parameters are applied to the texture bound to the unit with
+glTexParameteri/f/fv instead.
+
+Usage:
+
+    LINEAR_CLAMP = samplers.samplerKey(
+        minFilter=GL_LINEAR, magFilter=GL_LINEAR,
+        wrapS=GL_CLAMP_TO_EDGE, wrapT=GL_CLAMP_TO_EDGE,
+    )
+    ...
+    glActiveTexture( GL_TEXTURE0 )
+    glBindTexture( GL_TEXTURE_2D, texture )
+    samplers.bindSampler( 0, LINEAR_CLAMP )
+"""
+import ctypes
+import numbers
+from OpenGL import contextdata
+from OpenGL.extensions import alternate
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_2, GL_1_3, GL_1_4, GL_3_3, GL_4_4, GL_4_6
+from OpenGL.raw.GL.ARB import sampler_objects as _sampler_objects
+from OpenGL.raw.GL.ARB import multi_bind as _multi_bind
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'samplerKey',
+    'SamplerCache',
+    'currentCache',
+    'bindSampler',
+    'bindSamplers',
+    'clearCache',
+)
+
+CONTEXT_KEY = 'OpenGL.GL.samplers'
+
+glGenSamplers = alternate( GL_3_3.glGenSamplers, _sampler_objects.glGenSamplers )
+glDeleteSamplers = alternate( GL_3_3.glDeleteSamplers, _sampler_objects.glDeleteSamplers )
+glBindSampler = alternate( GL_3_3.glBindSampler, _sampler_objects.glBindSampler )
+glSamplerParameteri = alternate( GL_3_3.glSamplerParameteri, _sampler_objects.glSamplerParameteri )
+glSamplerParameterf = alternate( GL_3_3.glSamplerParameterf, _sampler_objects.glSamplerParameterf )
+glSamplerParameterfv = alternate( GL_3_3.glSamplerParameterfv, _sampler_objects.glSamplerParameterfv )
+glBindSamplers = alternate( GL_4_4.glBindSamplers, _multi_bind.glBindSamplers )
+
+# keyword names accepted by samplerKey
+NAMES = {
+    'minFilter': GL_1_1.GL_TEXTURE_MIN_FILTER,
+    'magFilter': GL_1_1.GL_TEXTURE_MAG_FILTER,
+    'wrapS': GL_1_1.GL_TEXTURE_WRAP_S,
+    'wrapT': GL_1_1.GL_TEXTURE_WRAP_T,
+    'wrapR': GL_1_2.GL_TEXTURE_WRAP_R,
+    'minLod': GL_1_2.GL_TEXTURE_MIN_LOD,
+    'maxLod': GL_1_2.GL_TEXTURE_MAX_LOD,
+    'lodBias': GL_1_4.GL_TEXTURE_LOD_BIAS,
+    'compareMode': GL_1_4.GL_TEXTURE_COMPARE_MODE,
+    'compareFunc': GL_1_4.GL_TEXTURE_COMPARE_FUNC,
+    'borderColor': GL_1_1.GL_TEXTURE_BORDER_COLOR,
+    'maxAnisotropy': GL_4_6.GL_TEXTURE_MAX_ANISOTROPY,
+}
+
+def _normalise( value ):
+    """Reduce a parameter value to int, float or tuple of floats
+
+    Scalars are tested by numbers.Integral/Real so that numpy scalars
+    (and GL constants) key the same as the equivalent Python numbers.
+    """
+    if isinstance( value, numbers.Integral ):
+        return int( value )
+    if isinstance( value, numbers.Real ):
+        return float( value )
+    return tuple( float( item ) for item in value )
+
+def samplerKey( parameters=None, **named ):
+    """Build the hashable key for a sampler parameter combination
+
+    parameters -- mapping (or sequence of pairs) of GL pname: value
+    named -- parameters by the keyword names in NAMES (minFilter,
+        wrapS, borderColor...)
+
+    Integer values are set with glSamplerParameteri, floats with
+    glSamplerParameterf and sequences with glSamplerParameterfv, so pass
+    floats for float-valued parameters (e.g. maxAnisotropy=8.0).
+
+    returns a sorted tuple of (pname, value) pairs; keys built from the
+    same combination compare (and hash) equal whatever the argument order
+    """
+    combined = {}
+    if parameters:
+        if hasattr( parameters, 'items' ):
+            parameters = parameters.items()
+        for pname,value in parameters:
+            combined[ int( pname ) ] = _normalise( value )
+    for name,value in named.items():
+        combined[ int( NAMES[ name ] ) ] = _normalise( value )
+    return tuple( sorted( combined.items() ))
+
+def _asKey( parameters ):
+    return parameters if isinstance( parameters, tuple ) else samplerKey( parameters )
+
+class SamplerCache( object ):
+    """Per-context table of shared sampler objects and per-unit bindings
+
+    Attributes of note:
+
+        samplers -- mapping of samplerKey: sampler object id
+        bound -- mapping of texture unit: sampler id last bound there
+        supported -- whether sampler objects are available (otherwise
+            parameters are set on the bound texture)
+        multiBind -- whether glBindSamplers is available
+
+    The bindings are tracked here, so call invalidate() after binding
+    samplers by other means.
+    """
+    def __init__( self, supported=None, multiBind=None ):
+        self.supported = bool( glGenSamplers ) if supported is None else supported
+        self.multiBind = (
+            self.supported and bool( glBindSamplers )
+        ) if multiBind is None else multiBind
+        self.samplers = {}
+        self.bound = {}
+        self._ranges = {}
+
+    def sampler( self, parameters ):
+        """Get the sampler object for parameters, creating it on first use"""
+        key = _asKey( parameters )
+        sampler = self.samplers.get( key )
+        if sampler is None:
+            id = _types.GLuint( 0 )
+            glGenSamplers( 1, ctypes.byref( id ))
+            sampler = self.samplers[ key ] = id.value
+            for pname,value in key:
+                if isinstance( value, tuple ):
+                    glSamplerParameterfv( sampler, pname, (_types.GLfloat * len(value))( *value ))
+                elif isinstance( value, float ):
+                    glSamplerParameterf( sampler, pname, value )
+                else:
+                    glSamplerParameteri( sampler, pname, value )
+        return sampler
+
+    def apply( self, target, parameters ):
+        """Set parameters on the texture bound to target (glTexParameter path)"""
+        for pname,value in _asKey( parameters ):
+            if isinstance( value, tuple ):
+                GL_1_1.glTexParameterfv( target, pname, (_types.GLfloat * len(value))( *value ))
+            elif isinstance( value, float ):
+                GL_1_1.glTexParameterf( target, pname, value )
+            else:
+                GL_1_1.glTexParameteri( target, pname, value )
+
+    def bind( self, unit, parameters, target=GL_1_1.GL_TEXTURE_2D ):
+        """Use parameters for texture unit unit
+
+        parameters -- samplerKey() result (preferred) or mapping, None
+            unbinds the unit's sampler
+        target -- texture target to set parameters on when sampler
+            objects are unavailable (the unit becomes the active one)
+        """
+        if not self.supported:
+            if parameters is not None:
+                GL_1_3.glActiveTexture( GL_1_3.GL_TEXTURE0 + unit )
+                self.apply( target, parameters )
+            return
+        sampler = 0 if parameters is None else self.sampler( parameters )
+        if self.bound.get( unit ) != sampler:
+            glBindSampler( unit, sampler )
+            self.bound[ unit ] = sampler
+
+    def bindRange( self, first, parameters, target=GL_1_1.GL_TEXTURE_2D ):
+        """Use parameters[i] for texture unit first+i
+
+        Issues a single glBindSamplers when any unit in the range
+        changed (where available), otherwise per-unit bind() calls.
+        """
+        count = len( parameters )
+        if not self.multiBind:
+            for offset,unitParameters in enumerate( parameters ):
+                self.bind( first+offset, unitParameters, target )
+            return
+        samplers = [
+            0 if unitParameters is None else self.sampler( unitParameters )
+            for unitParameters in parameters
+        ]
+        bound = self.bound
+        for offset,sampler in enumerate( samplers ):
+            if bound.get( first+offset ) != sampler:
+                break
+        else:
+            return
+        ids = self._ranges.get( count )
+        if ids is None:
+            ids = self._ranges[ count ] = (_types.GLuint * count)()
+        ids[:] = samplers
+        glBindSamplers( first, count, ids )
+        for offset,sampler in enumerate( samplers ):
+            bound[ first+offset ] = sampler
+
+    def invalidate( self ):
+        """Forget the tracked per-unit bindings"""
+        self.bound.clear()
+
+    def delete( self ):
+        """Delete every cached sampler object"""
+        if self.samplers:
+            ids = (_types.GLuint * len(self.samplers))( *self.samplers.values() )
+            glDeleteSamplers( len(ids), ids )
+            self.samplers.clear()
+        self.bound.clear()
+
+def currentCache( context=None ):
+    """Retrieve (creating) the SamplerCache for context (default current)"""
+    cache = contextdata.getValue( CONTEXT_KEY, context )
+    if cache is None:
+        cache = SamplerCache()
+        contextdata.setValue( CONTEXT_KEY, cache, context )
+    return cache
+
+def bindSampler( unit, parameters, target=GL_1_1.GL_TEXTURE_2D, context=None ):
+    """Use parameters for unit via the context's SamplerCache"""
+    currentCache( context ).bind( unit, parameters, target )
+
+def bindSamplers( first, parameters, target=GL_1_1.GL_TEXTURE_2D, context=None ):
+    """Use parameters[i] for unit first+i via the context's SamplerCache"""
+    currentCache( context ).bindRange( first, parameters, target )
+
+def clearCache( context=None ):
+    """Delete the context's sampler objects and forget its SamplerCache"""
+    cache = contextdata.getValue( CONTEXT_KEY, context )
+    if cache is not None:
+        cache.delete()
+        contextdata.delValue( CONTEXT_KEY, context )
@@ -3,6 +3,12 @@
 This code is resonsible for turning gluint *
 arrays into structured representations for use
 by Python-level code.
+
+GLSelectRecord.fromArray produces a list of record objects, while
+SelectionHits.fromArray produces a columnar (numpy) representation which
+is far cheaper for large hit counts, and which still presents a lazy
+sequence-of-GLSelectRecord view for compatibility.  glRenderMode uses the
+columnar form when OpenGL.COLUMNAR_RENDER_MODE is set.
 """
 from OpenGL._bytes import integer_types
 
@@ -62,3 +68,101 @@ class GLSelectRecord( object ):
                 raise KeyError( """Don't have an index/key %r for %s instant"""%(
                     key, self.__class__,
                 ))
+
+    def fromValues( cls, near, far, names ):
+        """Create record from already-converted near/far floats"""
+        record = cls.__new__( cls )
+        record.near = near
+        record.far = far
+        record.names = names
+        return record
+    fromValues = classmethod( fromValues )
+
+class SelectionHits( object ):
+    """Columnar storage of a selection buffer's hit records
+
+    Attributes:
+
+        near, far -- float64 arrays of the (0.0-1.0) depth range per hit
+        offsets -- uint32 array of len(hits)+1, names for hit i are
+            names[offsets[i]:offsets[i+1]]
+        names -- uint32 array of all hit names, concatenated
+
+    Indexing/iterating produces GLSelectRecord instances on demand.
+    """
+    __slots__ = ('near','far','offsets','names')
+    def __init__( self, near, far, offsets, names ):
+        self.near = near
+        self.far = far
+        self.offsets = offsets
+        self.names = names
+    def fromArray( cls, array, total ):
+        """Parse the first total records of a selection buffer"""
+        import numpy
+        buffer = numpy.asarray( array ).reshape( (-1,) )
+        if buffer.dtype.itemsize == 4:
+            buffer = buffer.view( numpy.uint32 )
+        else:
+            buffer = buffer.astype( numpy.uint32 )
+        total = max((int(total),0))
+        starts = None
+        if total and len(buffer) >= 3:
+            # common case, every hit has the same name-stack depth,
+            # records are then a simple stride of the buffer
+            count = int(buffer[0])
+            stride = 3+count
+            candidates = buffer[0:total*stride:stride]
+            if len(candidates) == total and (candidates == count).all() and total*stride <= len(buffer):
+                starts = numpy.arange( 0, total*stride, stride, dtype=numpy.intp )
+                counts = numpy.full( (total,), count, dtype=numpy.intp )
+        if starts is None:
+            # general case, only the counts need a sequential walk
+            values = buffer.tolist()
+            arrayLength = len(values)
+            startList = []
+            index = 0
+            for item in range( total ):
+                if index + 2 >= arrayLength:
+                    break
+                startList.append( index )
+                index += 3+values[index]
+            starts = numpy.array( startList, dtype=numpy.intp )
+            counts = buffer[starts].astype( numpy.intp )
+            # final record may be truncated by the buffer end
+            counts = numpy.minimum( counts, arrayLength - (starts+3) )
+        offsets = numpy.zeros( (len(starts)+1,), dtype=numpy.uint32 )
+        numpy.cumsum( counts, out=offsets[1:] )
+        nameCount = int(offsets[-1])
+        indices = numpy.repeat( starts+3-offsets[:-1].astype(numpy.intp), counts )
+        indices += numpy.arange( nameCount, dtype=numpy.intp )
+        divisor = GLSelectRecord.DISTANCE_DIVISOR
+        return cls(
+            buffer[starts+1] / divisor,
+            buffer[starts+2] / divisor,
+            offsets,
+            buffer[indices],
+        )
+    fromArray = classmethod( fromArray )
+    def __len__( self ):
+        return len( self.near )
+    def __getitem__( self, index ):
+        """Produce a GLSelectRecord view of hit index (or a list for slices)"""
+        if isinstance( index, slice ):
+            return [self[i] for i in range( *index.indices( len(self) ))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError( index )
+        return GLSelectRecord.fromValues(
+            float(self.near[index]),
+            float(self.far[index]),
+            self.names[self.offsets[index]:self.offsets[index+1]].tolist(),
+        )
+    def __iter__( self ):
+        for index in range( len(self) ):
+            yield self[index]
+    def nearest( self ):
+        """Index of the hit with the smallest near depth (None if no hits)"""
+        if not len(self):
+            return None
+        return int(self.near.argmin())
@@ -6,15 +6,23 @@ even if the local hardware only supports ARB extension-based
 shader rendering.
 
 There are also two utility methods compileProgram and compileShader
-which make it easy to create demos which are shader-using.
+which make it easy to create demos which are shader-using, and a
+ProgramCache which stores linked program binaries on disk so that later
+runs can skip compilation entirely.
 """
-import logging
+import logging, os, struct, hashlib, tempfile, collections, ctypes
 log = logging.getLogger( __name__ )
 from OpenGL import GL
 from OpenGL.GL.ARB import (
     shader_objects, fragment_shader, vertex_shader, vertex_program,
     geometry_shader4, separate_shader_objects, get_program_binary,
 )
+from OpenGL.raw.GL.KHR import parallel_shader_compile as _khr_parallel
+from OpenGL.raw.GL.ARB import parallel_shader_compile as _arb_parallel
+from OpenGL.raw.GL.VERSION import (
+    GL_2_0 as _GL_2_0, GL_3_0 as _GL_3_0, GL_4_1 as _GL_4_1, GL_4_3 as _GL_4_3,
+)
+from OpenGL.raw.GL import _types
 from OpenGL.extensions import alternate
 from OpenGL._bytes import bytes,unicode,as_8_bit
 
@@ -32,6 +40,12 @@ __all__ = [
     'ShaderCompilationError', 
     'ShaderValidationError', 
     'ShaderLinkError',
+    'ProgramCache',
+    'AsyncShaderProgram',
+    'compileProgramAsync',
+    'compileProgramsAsync',
+    'ProgramResource',
+    'ProgramBlock',
     # automatically added stuff here...
 ]
 
@@ -85,10 +99,127 @@ GL_COMPILE_STATUS = GL.GL_COMPILE_STATUS
 GL_LINK_STATUS = GL.GL_LINK_STATUS
 GL_FALSE = GL.GL_FALSE
 GL_TRUE = GL.GL_TRUE
+GL_COMPLETION_STATUS = _khr_parallel.GL_COMPLETION_STATUS_KHR
+glMaxShaderCompilerThreads = alternate(
+    'glMaxShaderCompilerThreads',
+    _khr_parallel.glMaxShaderCompilerThreadsKHR,
+    _arb_parallel.glMaxShaderCompilerThreadsARB,
+)
+
+ProgramResource = collections.namedtuple( 'ProgramResource', (
+    'name','index','type','size','location','offset','blockIndex',
+    'arrayStride','matrixStride',
+))
+ProgramBlock = collections.namedtuple( 'ProgramBlock', (
+    'name','index','binding','dataSize',
+))
+
+def _resourceProperties( program, interface, index, props ):
+    """Query props of one interface resource with glGetProgramResourceiv"""
+    count = len( props )
+    values = (_types.GLint * count)()
+    _GL_4_3.glGetProgramResourceiv(
+        program, interface, index, count, (_types.GLenum * count)( *props ),
+        count, None, values,
+    )
+    return list( values )
+
+def _resourceName( program, interface, index, length ):
+    name = ctypes.create_string_buffer( max( length, 1 ))
+    _GL_4_3.glGetProgramResourceName( program, interface, index, len(name), None, name )
+    return name.value.decode( 'utf-8' )
+
+def _resources( program, interface, props ):
+    """Yield (index,name,values) for every active resource of interface"""
+    count = _types.GLint( 0 )
+    _GL_4_3.glGetProgramInterfaceiv(
+        program, interface, _GL_4_3.GL_ACTIVE_RESOURCES, ctypes.byref( count ),
+    )
+    for index in range( count.value ):
+        values = _resourceProperties(
+            program, interface, index, (_GL_4_3.GL_NAME_LENGTH,)+tuple( props ),
+        )
+        yield index, _resourceName( program, interface, index, values[0] ), values[1:]
+
+def _activeVariables( program, countName, lengthName, query, locate ):
+    """Yield (index,name,type,size,location) via the GL 2.0 glGetActive* API"""
+    count, length = _types.GLint( 0 ), _types.GLint( 0 )
+    _GL_2_0.glGetProgramiv( program, countName, ctypes.byref( count ))
+    _GL_2_0.glGetProgramiv( program, lengthName, ctypes.byref( length ))
+    name = ctypes.create_string_buffer( max( length.value, 1 ))
+    size, type = _types.GLint( 0 ), _types.GLenum( 0 )
+    for index in range( count.value ):
+        query( program, index, len(name), None, ctypes.byref( size ), ctypes.byref( type ), name )
+        yield index, name.value.decode( 'utf-8' ), type.value, size.value, locate( program, name.value )
+
+_UNIFORM_PROPERTIES = (
+    _GL_4_3.GL_TYPE, _GL_4_3.GL_ARRAY_SIZE, _GL_4_3.GL_LOCATION, _GL_4_3.GL_OFFSET,
+    _GL_4_3.GL_BLOCK_INDEX, _GL_4_3.GL_ARRAY_STRIDE, _GL_4_3.GL_MATRIX_STRIDE,
+)
+_INPUT_PROPERTIES = ( _GL_4_3.GL_TYPE, _GL_4_3.GL_ARRAY_SIZE, _GL_4_3.GL_LOCATION )
+_BLOCK_PROPERTIES = ( _GL_4_3.GL_BUFFER_BINDING, _GL_4_3.GL_BUFFER_DATA_SIZE )
+
+# GL uniform type: (suffix,components) of the glUniform*v/glProgramUniform*v
+# entry point setting it, matrix suffixes use glUniformMatrix*fv
+_UNIFORM_TYPES = {
+    _GL_2_0.GL_FLOAT: ('1f',1), _GL_2_0.GL_FLOAT_VEC2: ('2f',2),
+    _GL_2_0.GL_FLOAT_VEC3: ('3f',3), _GL_2_0.GL_FLOAT_VEC4: ('4f',4),
+    _GL_2_0.GL_INT: ('1i',1), _GL_2_0.GL_INT_VEC2: ('2i',2),
+    _GL_2_0.GL_INT_VEC3: ('3i',3), _GL_2_0.GL_INT_VEC4: ('4i',4),
+    _GL_2_0.GL_BOOL: ('1i',1), _GL_2_0.GL_BOOL_VEC2: ('2i',2),
+    _GL_2_0.GL_BOOL_VEC3: ('3i',3), _GL_2_0.GL_BOOL_VEC4: ('4i',4),
+    _GL_2_0.GL_UNSIGNED_INT: ('1ui',1), _GL_3_0.GL_UNSIGNED_INT_VEC2: ('2ui',2),
+    _GL_3_0.GL_UNSIGNED_INT_VEC3: ('3ui',3), _GL_3_0.GL_UNSIGNED_INT_VEC4: ('4ui',4),
+    _GL_2_0.GL_FLOAT_MAT2: ('Matrix2f',4), _GL_2_0.GL_FLOAT_MAT3: ('Matrix3f',9),
+    _GL_2_0.GL_FLOAT_MAT4: ('Matrix4f',16),
+}
+_SAMPLER_PREFIXES = (
+    'GL_SAMPLER_','GL_INT_SAMPLER_','GL_UNSIGNED_INT_SAMPLER_',
+    'GL_IMAGE_','GL_INT_IMAGE_','GL_UNSIGNED_INT_IMAGE_',
+)
+_COMPONENT_TYPES = { 'f': _types.GLfloat, 'i': _types.GLint, 'ui': _types.GLuint }
+
+def _uniformSetter( type ):
+    """Retrieve (setter,components,ctype,matrix) for a GL uniform type"""
+    try:
+        suffix, components = _UNIFORM_TYPES[ type ]
+    except KeyError:
+        # opaque types (samplers and images) are set as a unit number
+        for name in dir( GL ):
+            if name.startswith( _SAMPLER_PREFIXES ) and getattr( GL, name ) == type:
+                suffix, components = _UNIFORM_TYPES[ type ] = ('1i',1)
+                break
+        else:
+            raise TypeError( """No typed setter for uniform type 0x%x"""%( type, ))
+    matrix = suffix.startswith( 'Matrix' )
+    if bool( _GL_4_1.glProgramUniform1fv ):
+        setter = getattr( _GL_4_1, 'glProgramUniform%sv'%( suffix, ))
+    else:
+        setter = getattr( _GL_3_0 if suffix.endswith( 'ui' ) else _GL_2_0, 'glUniform%sv'%( suffix, ))
+    ctype = _types.GLfloat if matrix else _COMPONENT_TYPES[ suffix[1:] ]
+    return setter, components, ctype, matrix
 
 class ShaderProgram( int ):
-    """Integer sub-class with context-manager operation"""
+    """Integer sub-class with context-manager operation
+
+    After linking (compileProgram, load, AsyncShaderProgram.result) the
+    program's active interface is enumerated once by introspect(), using
+    GL 4.3 / ARB_program_interface_query where available:
+
+        uniforms -- name: ProgramResource (array uniforms are also
+            listed without their "[0]" suffix)
+        attributes -- name: ProgramResource for the vertex inputs
+        uniformBlocks, storageBlocks -- name: ProgramBlock (empty without
+            program interface query)
+
+    along with uniformSetters (name: (location,array,setter,components,
+    ctype,matrix), resolved once per uniform), through which setUniform()
+    uploads, skipping the upload when the value equals the last one it
+    set.
+    """
     validated = False
+    uniforms = attributes = uniformBlocks = storageBlocks = None
+    uniformSetters = uniformValues = None
     def __enter__( self ):
         """Start use of the program"""
         glUseProgram( self )
@@ -138,14 +269,19 @@ class ShaderProgram( int ):
         returns (format,binaryData) for the shader program
         """
         from OpenGL.raw.GL._types import GLint,GLenum 
-        from OpenGL.arrays import GLbyteArray
+        from OpenGL.raw.GL.ARB import get_program_binary as raw_program_binary
+        from OpenGL.arrays import GLbyteArray, ArrayDatatype
         size = GLint()
         glGetProgramiv( self, get_program_binary.GL_PROGRAM_BINARY_LENGTH, size )
         result = GLbyteArray.zeros( (size.value,))
         size2 = GLint()
         format = GLenum()
-        get_program_binary.glGetProgramBinary( self, size.value, size2, format, result )
-        return format.value, result 
+        # the wrapped entry point allocates its own output array rather
+        # than filling result, so write into result via the raw function
+        raw_program_binary.glGetProgramBinary(
+            self, size.value, size2, format, ArrayDatatype.voidDataPointer( result ),
+        )
+        return format.value, result[:size2.value]
     def load( self, format, binary, validate=True ):
         """Attempt to load binary-format for a pre-compiled shader
         
@@ -155,8 +291,163 @@ class ShaderProgram( int ):
         if validate:
             self.check_validate()
         self.check_linked()
+        self.introspect()
+        return self
+
+    def introspect( self ):
+        """Enumerate the active uniforms, attributes and blocks (after linking)
+
+        Also forgets the values remembered by setUniform.
+        """
+        uniforms, attributes, uniformBlocks, storageBlocks = {}, {}, {}, {}
+        if bool( _GL_4_3.glGetProgramResourceiv ):
+            for index,name,values in _resources( self, _GL_4_3.GL_UNIFORM, _UNIFORM_PROPERTIES ):
+                uniforms[ name ] = ProgramResource( name, index, *values )
+            for index,name,values in _resources( self, _GL_4_3.GL_PROGRAM_INPUT, _INPUT_PROPERTIES ):
+                attributes[ name ] = ProgramResource( name, index, values[0], values[1], values[2], -1, -1, 0, 0 )
+            for index,name,values in _resources( self, _GL_4_3.GL_UNIFORM_BLOCK, _BLOCK_PROPERTIES ):
+                uniformBlocks[ name ] = ProgramBlock( name, index, *values )
+            for index,name,values in _resources( self, _GL_4_3.GL_SHADER_STORAGE_BLOCK, _BLOCK_PROPERTIES ):
+                storageBlocks[ name ] = ProgramBlock( name, index, *values )
+        else:
+            for index,name,type,size,location in _activeVariables(
+                self, _GL_2_0.GL_ACTIVE_UNIFORMS, _GL_2_0.GL_ACTIVE_UNIFORM_MAX_LENGTH,
+                _GL_2_0.glGetActiveUniform, _GL_2_0.glGetUniformLocation,
+            ):
+                uniforms[ name ] = ProgramResource( name, index, type, size, location, -1, -1, 0, 0 )
+            for index,name,type,size,location in _activeVariables(
+                self, _GL_2_0.GL_ACTIVE_ATTRIBUTES, _GL_2_0.GL_ACTIVE_ATTRIBUTE_MAX_LENGTH,
+                _GL_2_0.glGetActiveAttrib, _GL_2_0.glGetAttribLocation,
+            ):
+                attributes[ name ] = ProgramResource( name, index, type, size, location, -1, -1, 0, 0 )
+        for name,uniform in list( uniforms.items() ):
+            if name.endswith( '[0]' ):
+                uniforms.setdefault( name[:-3], uniform )
+        setters = {}
+        for name,uniform in uniforms.items():
+            if uniform.location < 0:
+                continue
+            try:
+                setter = _uniformSetter( uniform.type )
+            except TypeError:
+                # setUniform reports it, if it is ever set
+                continue
+            setters[ name ] = (uniform.location, uniform.size > 1) + setter
+        self.uniforms, self.attributes = uniforms, attributes
+        self.uniformBlocks, self.storageBlocks = uniformBlocks, storageBlocks
+        self.uniformSetters = setters
+        self.uniformValues = {}
         return self
 
+    def _elementSetter( self, name ):
+        """Resolve (and cache) the setter for array element name ("k[2]")
+
+        Array elements have consecutive locations from the array's base
+        location (required by GL 4.3 and done by every implementation).
+        """
+        base, bracket, index = name.rpartition( '[' )
+        if not bracket or not index.endswith( ']' ):
+            return None
+        try:
+            index = int( index[:-1] )
+        except ValueError:
+            return None
+        entry = self.uniformSetters.get( base )
+        uniform = self.uniforms.get( base )
+        if entry is None or not 0 <= index < uniform.size:
+            return None
+        entry = self.uniformSetters[ name ] = (entry[0]+index, True) + entry[2:]
+        return entry
+
+    def uniformLocation( self, name ):
+        """Cached location of uniform name (-1 if not active)"""
+        if self.uniforms is None:
+            self.introspect()
+        uniform = self.uniforms.get( name )
+        return -1 if uniform is None else uniform.location
+
+    def attributeLocation( self, name ):
+        """Cached location of vertex attribute name (-1 if not active)"""
+        if self.attributes is None:
+            self.introspect()
+        attribute = self.attributes.get( name )
+        return -1 if attribute is None else attribute.location
+
+    def setUniform( self, name, value, transpose=False ):
+        """Upload value to uniform name with the setter matching its GL type
+
+        value -- scalar, sequence or array; arrays of uniforms (and
+            matrices) take the flattened values of every element
+        transpose -- for matrices, whether value is row-major
+
+        Uses glProgramUniform* (GL 4.1 / separate shader objects) where
+        available, otherwise glUniform*, which requires the program to be
+        in use.  Uploads of the value last set through this method are
+        skipped; call forgetUniforms() if other code sets uniforms.
+
+        Elements of uniform arrays may be set individually ("k[2]"),
+        setting any part of an array forgets the remembered values of
+        the parts it overlaps.
+
+        returns whether an upload was made (False for inactive uniforms)
+        """
+        if self.uniforms is None:
+            self.introspect()
+        entry = self.uniformSetters.get( name ) or self._elementSetter( name )
+        if entry is None:
+            uniform = self.uniforms.get( name )
+            if uniform is not None and uniform.location >= 0:
+                _uniformSetter( uniform.type ) # raises TypeError
+            return False
+        location, array, setter, components, ctype, matrix = entry
+        if hasattr( value, 'ravel' ):
+            flat = tuple( value.ravel().tolist() )
+        elif isinstance( value, (list,tuple) ):
+            flat = tuple( _flatten( value ))
+        else:
+            flat = (value,)
+        key = (flat, transpose)
+        values = self.uniformValues
+        cached = values.get( location )
+        if cached is not None and cached[0] == key:
+            return False
+        count = len( flat ) // components
+        if not count or count * components != len( flat ):
+            raise ValueError( """Uniform %s takes multiples of %s values, got %s"""%(
+                name, components, len(flat),
+            ))
+        data = (ctype * len( flat ))( *flat )
+        arguments = (location, count)
+        if setter.__name__.startswith( 'glProgramUniform' ):
+            arguments = (self,) + arguments
+        if matrix:
+            arguments += (bool( transpose ),)
+        setter( *(arguments + (data,)) )
+        if array:
+            # each array element has its own location, drop remembered
+            # uploads overlapping [location,location+count)
+            stop = location + count
+            for other,(otherKey,otherCount) in list( values.items() ):
+                if other < stop and location < other + otherCount:
+                    del values[ other ]
+        values[ location ] = (key, count)
+        return True
+
+    def forgetUniforms( self ):
+        """Discard the values remembered by setUniform"""
+        self.uniformValues = {}
+
+def _flatten( values ):
+    for value in values:
+        if isinstance( value, (list,tuple) ):
+            for item in _flatten( value ):
+                yield item
+        elif hasattr( value, 'ravel' ):
+            for item in value.ravel().tolist():
+                yield item
+        else:
+            yield value
+
 def compileProgram(*shaders, **named):
     """Create a new program, attach shaders and validate
 
@@ -210,24 +501,118 @@ def compileProgram(*shaders, **named):
     if named.get('validate', True):
         program.check_validate()
     program.check_linked()
+    program.introspect()
     for shader in shaders:
         glDeleteShader(shader)
     return program
-def compileShader( source, shaderType ):
-    """Compile shader source of given type
+class AsyncShaderProgram( ShaderProgram ):
+    """Future-like ShaderProgram returned by compileProgramAsync
 
-    source -- GLSL source-code for the shader
-    shaderType -- GLenum GL_VERTEX_SHADER, GL_FRAGMENT_SHADER, etc,
+    The program id is usable as soon as it is returned, but compile/link
+    status has not been checked yet.  done() polls without blocking
+    (GL_COMPLETION_STATUS_KHR where KHR/ARB_parallel_shader_compile is
+    available, otherwise it reports True and the status query is simply
+    deferred); result() performs the checks, blocking if the driver has
+    not finished, and raises the compileProgram exceptions on failure.
+    """
+    resolved = False
+    def done( self ):
+        """Check (without stalling) whether the program has finished linking"""
+        if self.resolved:
+            return True
+        if self.parallel:
+            from OpenGL.raw.GL._types import GLint
+            status = GLint()
+            glGetProgramiv( self, GL_COMPLETION_STATUS, status )
+            return bool( status.value )
+        return True
+    def result( self ):
+        """Check compile/link (and optionally validate) status
 
-    returns GLuint compiled shader reference
-    raises RuntimeError when a compilation failure occurs
+        returns self once the program is ready for use
+        """
+        if self.resolved:
+            return self
+        try:
+            for shader,source,shaderType in self.shaders:
+                _checkCompiled( shader, source, shaderType )
+            self.check_linked()
+            if self.validate:
+                self.check_validate()
+            self.introspect()
+        except Exception:
+            self.resolved = True
+            self._release_shaders()
+            raise
+        self.resolved = True
+        self._release_shaders()
+        return self
+    def _release_shaders( self ):
+        for shader,source,shaderType in self.shaders:
+            glDeleteShader( shader )
+        self.shaders = ()
+    def __enter__( self ):
+        """Start use of the program (resolving it if necessary)"""
+        self.result()
+        return super( AsyncShaderProgram, self ).__enter__()
+
+def compileProgramsAsync( *programs, **named ):
+    """Submit several programs for compilation without waiting on any
+
+    programs -- sequences of (source,shaderType) pairs, one per program
+    threads (keyword only) -- if given, and parallel compilation is
+        available, passed to glMaxShaderCompilerThreads; 0xFFFFFFFF lets
+        the implementation choose
+    separable, validate (keyword only) -- as for compileProgram
+
+    All shaders are compiled, then all programs linked, before any status
+    is queried, so drivers may overlap the work.
+
+    returns list of AsyncShaderProgram, see its done()/result()
     """
-    if isinstance( source, (bytes,unicode)):
-        source = [ source ]
-    source = [ as_8_bit(s) for s in source ]
-    shader = glCreateShader(shaderType)
-    glShaderSource( shader, source )
-    glCompileShader( shader )
+    parallel = bool( glMaxShaderCompilerThreads )
+    threads = named.get( 'threads' )
+    if parallel and threads is not None:
+        glMaxShaderCompilerThreads( threads )
+    compiled = []
+    for shaders in programs:
+        submitted = []
+        for source,shaderType in shaders:
+            if isinstance( source, (bytes,unicode)):
+                source = [ source ]
+            source = [ as_8_bit(s) for s in source ]
+            shader = glCreateShader( shaderType )
+            glShaderSource( shader, source )
+            glCompileShader( shader )
+            submitted.append( (shader,source,shaderType) )
+        compiled.append( submitted )
+    result = []
+    for submitted in compiled:
+        program = glCreateProgram()
+        if named.get('separable'):
+            glProgramParameteri( program, separate_shader_objects.GL_PROGRAM_SEPARABLE, GL_TRUE )
+        if named.get('retrievable'):
+            glProgramParameteri( program, get_program_binary.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE )
+        for shader,source,shaderType in submitted:
+            glAttachShader( program, shader )
+        glLinkProgram( program )
+        program = AsyncShaderProgram( program )
+        program.shaders = submitted
+        program.parallel = parallel
+        program.validate = named.get( 'validate', True )
+        result.append( program )
+    return result
+def compileProgramAsync( *shaders, **named ):
+    """Submit a single program, see compileProgramsAsync
+
+    shaders -- (source,shaderType) pairs
+
+    returns AsyncShaderProgram
+    """
+    return compileProgramsAsync( shaders, **named )[0]
+
+def _checkCompiled( shader, source, shaderType ):
+    """Raise ShaderCompilationError if shader failed to compile"""
     result = glGetShaderiv( shader, GL_COMPILE_STATUS )
     if not(result):
         # TODO: this will be wrong if the user has
@@ -241,10 +626,251 @@ def compileShader( source, shaderType ):
             shaderType,
         )
     return shader
+def compileShader( source, shaderType ):
+    """Compile shader source of given type
+
+    source -- GLSL source-code for the shader
+    shaderType -- GLenum GL_VERTEX_SHADER, GL_FRAGMENT_SHADER, etc,
+
+    returns GLuint compiled shader reference
+    raises RuntimeError when a compilation failure occurs
+    """
+    if isinstance( source, (bytes,unicode)):
+        source = [ source ]
+    source = [ as_8_bit(s) for s in source ]
+    shader = glCreateShader(shaderType)
+    glShaderSource( shader, source )
+    glCompileShader( shader )
+    return _checkCompiled( shader, source, shaderType )
 
 class ShaderCompilationError(RuntimeError):
     """Raised when a shader compilation fails"""
 class ShaderValidationError(RuntimeError):
     """Raised when a program fails to validate"""
 class ShaderLinkError(RuntimeError):
-    """Raised when a shader link fails"""
\ No newline at end of file
+    """Raised when a shader link fails"""
+def _applyDefines( source, defines ):
+    """Insert #define lines into GLSL source (after any #version line)
+
+    source may be a single string or a sequence of segments, which the
+    GL concatenates, so they are joined before the #version search.
+    """
+    if not defines:
+        return source
+    if isinstance( source, (bytes,unicode) ):
+        source = as_8_bit( source )
+    else:
+        source = b''.join([ as_8_bit( segment ) for segment in source ])
+    lines = b''.join([
+        as_8_bit( '#define %s %s\n'%( key, value ))
+        for key,value in sorted( defines.items() )
+    ])
+    stripped = source.lstrip()
+    if stripped.startswith( b'#version' ):
+        prefix = source[:len(source)-len(stripped)]
+        version, _, rest = stripped.partition( b'\n' )
+        return prefix + version + b'\n' + lines + rest
+    return lines + source
+
+class ProgramCache( object ):
+    """On-disk cache of linked program binaries
+
+    Programs are keyed by a hash of their shader sources, shader types,
+    defines and link flags together with the GL_VENDOR, GL_RENDERER and
+    GL_VERSION of the current context, so a driver update simply misses.
+    A hit is loaded with glProgramBinary, a miss is compiled normally and
+    its binary (glGetProgramBinary) is stored.  If the driver rejects a
+    stored binary the entry is discarded and the program recompiled.
+
+    Entries are written atomically (temporary file + rename) and the
+    directory is kept under max_size bytes by evicting the least
+    recently used entries.  Without ARB_get_program_binary (or with no
+    supported binary formats) the cache simply compiles.
+
+    Usage:
+
+        cache = ProgramCache()
+        program = cache.compileProgram(
+            (vertexSource, GL_VERTEX_SHADER),
+            (fragmentSource, GL_FRAGMENT_SHADER),
+            defines = {'LIGHT_COUNT':4},
+        )
+
+    Attributes of note:
+
+        directory -- directory holding the cached binaries
+        max_size -- maximum total bytes of cached binaries
+        hits, misses, rejected -- counters for this instance
+    """
+    MAX_SIZE = 64 * 1024 * 1024
+    SUFFIX = '.glprogram'
+    HEADER = struct.Struct( '<4sI' )
+    MAGIC = b'PGLP'
+    def __init__( self, directory=None, max_size=MAX_SIZE ):
+        if directory is None:
+            directory = os.path.join(
+                os.environ.get( 'XDG_CACHE_HOME' ) or os.path.expanduser( '~/.cache' ),
+                'PyOpenGL', 'programs',
+            )
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = self.misses = self.rejected = 0
+
+    def available( self ):
+        """Determine whether the current context can cache program binaries"""
+        if not bool( get_program_binary.glProgramBinary ):
+            return False
+        from OpenGL.GL import limits
+        return limits.currentLimits().num_program_binary_formats > 0
+
+    def key( self, shaders, defines=None, **named ):
+        """Calculate the cache key for the given shaders in the current context
+
+        shaders -- sequence of (source,shaderType) pairs
+        """
+        digest = hashlib.sha256()
+        for constant in (GL.GL_VENDOR, GL.GL_RENDERER, GL.GL_VERSION):
+            digest.update( as_8_bit( GL.glGetString( constant ) or b'' ))
+            digest.update( b'\0' )
+        for source, shaderType in shaders:
+            if isinstance( source, (bytes,unicode)):
+                source = [ source ]
+            digest.update( as_8_bit( '%d:%d\0'%( int(shaderType), len(source) )))
+            for segment in source:
+                digest.update( as_8_bit( segment ))
+                digest.update( b'\0' )
+        for key,value in sorted( (defines or {}).items() ):
+            digest.update( as_8_bit( '%s=%s\0'%( key, value )))
+        digest.update( as_8_bit( repr(sorted(
+            (k,bool(v)) for (k,v) in named.items() if k != 'validate'
+        ))))
+        return digest.hexdigest()
+
+    def filename( self, key ):
+        """Path of the cache entry for key"""
+        return os.path.join( self.directory, key + self.SUFFIX )
+
+    def compileProgram( self, *shaders, **named ):
+        """Load (or compile and store) a program from (source,shaderType) pairs
+
+        defines (keyword only) -- mapping of preprocessor names to values,
+            inserted into every shader after its #version line
+        separable, validate (keyword only) -- as for compileProgram
+
+        returns ShaderProgram
+        raises the compileProgram exceptions on compile/link failures
+        """
+        defines = named.pop( 'defines', None )
+        validate = named.get( 'validate', True )
+        if not self.available():
+            return self._compile( shaders, defines, named )
+        key = self.key( shaders, defines, **named )
+        filename = self.filename( key )
+        program = self._load( filename, named )
+        if program is not None:
+            self.hits += 1
+            if validate:
+                program.check_validate()
+            return program
+        self.misses += 1
+        named['retrievable'] = True
+        program = self._compile( shaders, defines, named )
+        self._store( filename, *program.retrieve() )
+        return program
+
+    def _compile( self, shaders, defines, named ):
+        """Compile and link shaders without the cache"""
+        return compileProgram(*[
+            compileShader( _applyDefines( source, defines ) if defines else source, shaderType )
+            for source,shaderType in shaders
+        ], **named )
+
+    def _load( self, filename, named ):
+        """Try to create a program from a cache entry, None on miss/rejection"""
+        try:
+            with open( filename, 'rb' ) as fh:
+                data = fh.read()
+        except (IOError,OSError):
+            return None
+        header = self.HEADER.size
+        magic, format = self.HEADER.unpack( data[:header] ) if len(data) > header else (None,None)
+        if magic != self.MAGIC:
+            self._discard( filename )
+            return None
+        program = ShaderProgram( glCreateProgram() )
+        if named.get('separable'):
+            glProgramParameteri( program, separate_shader_objects.GL_PROGRAM_SEPARABLE, GL_TRUE )
+        try:
+            program.load( format, data[header:], validate=False )
+        except (ShaderLinkError, GL.GLError) as err:
+            log.info( 'Cached program binary rejected, recompiling: %s', err )
+            GL.glDeleteProgram( program )
+            self.rejected += 1
+            self._discard( filename )
+            return None
+        try:
+            # refresh access time for LRU eviction
+            os.utime( filename, None )
+        except OSError:
+            pass
+        return program
+
+    def _store( self, filename, format, binary ):
+        """Atomically write a cache entry then enforce the size bound"""
+        try:
+            if not os.path.isdir( self.directory ):
+                os.makedirs( self.directory )
+            handle, temporary = tempfile.mkstemp(
+                suffix='.tmp', dir=self.directory,
+            )
+            try:
+                with os.fdopen( handle, 'wb' ) as fh:
+                    fh.write( self.HEADER.pack( self.MAGIC, format ))
+                    fh.write( memoryview( binary ).tobytes() )
+                # os.replace is atomic on every platform, rename on posix
+                getattr( os, 'replace', os.rename )( temporary, filename )
+            except Exception:
+                self._discard( temporary )
+                raise
+        except (IOError,OSError) as err:
+            log.warning( 'Unable to store program binary in %s: %s', self.directory, err )
+            return False
+        self.evict()
+        return True
+
+    def _discard( self, filename ):
+        """Remove filename, ignoring failures"""
+        try:
+            os.remove( filename )
+        except OSError:
+            pass
+
+    def evict( self, max_size=None ):
+        """Remove least-recently-used entries until the cache fits max_size"""
+        max_size = self.max_size if max_size is None else max_size
+        entries = []
+        try:
+            names = os.listdir( self.directory )
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith( self.SUFFIX ):
+                path = os.path.join( self.directory, name )
+                try:
+                    stat = os.stat( path )
+                except OSError:
+                    continue
+                entries.append( (stat.st_mtime, stat.st_size, path) )
+        total = sum([ size for (_,size,_) in entries ])
+        removed = 0
+        for (_,size,path) in sorted( entries ):
+            if total <= max_size:
+                break
+            self._discard( path )
+            total -= size
+            removed += 1
+        return removed
+
+    def clear( self ):
+        """Remove every entry from the cache directory"""
+        return self.evict( 0 )
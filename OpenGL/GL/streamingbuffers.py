@@ -0,0 +1,286 @@
+"""Convenience API for buffers whose contents are regenerated every frame
+
+OpenGL.arrays.vbo.VBO is a good fit for data which changes occasionally,
+but geometry rebuilt on every frame (markers, labels, sweep geometry) pays
+for a Python-side copy into VBO.data plus a full glBufferData/
+glBufferSubData transfer on each bind.  StreamingBuffer instead hands
+out numpy views directly into GPU-visible memory.
+
+The buffer is split into a ring of equally-sized regions (three by
+default), one region per frame.  With GL 4.4 / ARB_buffer_storage the
+whole ring is allocated with glBufferStorage and mapped once with
+GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT; each region is guarded by a
+fence so that it is only rewritten once the GL has finished drawing from
+it.  Without buffer storage the buffer is orphaned (glBufferData with
+NULL) each time the ring wraps and the current region is mapped with
+GL_MAP_UNSYNCHRONIZED_BIT, which gives the same "never stall" behaviour
+on older drivers.
+
+Usage:
+
+    stream = streamingbuffers.StreamingBuffer( 1024*1024 )
+    ...
+    stream.begin_frame()
+    points, offset = stream.allocate( (count,3), 'f' )
+    points[:] = compute_positions()
+    stream.flush()
+    with stream:
+        glVertexPointer( 3, GL_FLOAT, 0, stream.pointer( offset ) )
+        glDrawArrays( GL_POINTS, 0, count )
+"""
+import ctypes
+from OpenGL.extensions import alternate
+from OpenGL.raw.GL.VERSION import GL_1_5, GL_3_0, GL_3_2, GL_4_4
+from OpenGL.raw.GL.ARB import buffer_storage as _buffer_storage
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'StreamingBuffer',
+)
+
+glBufferStorage = alternate( GL_4_4.glBufferStorage, _buffer_storage.glBufferStorage )
+
+class StreamingBuffer( object ):
+    """Ring-allocated, fence-guarded buffer for per-frame data
+
+    Attributes of note:
+
+        region_size -- bytes available to allocate() in each frame
+        regions -- number of frames the ring spans
+        persistent -- whether the persistent-mapped path is in use
+            (None until create() has run)
+        head -- allocation offset (bytes) within the current region
+    """
+    REGIONS = 3
+    WAIT_TIMEOUT = 1000000000 # 1s, in nanoseconds
+    def __init__(
+        self, region_size, target=GL_1_5.GL_ARRAY_BUFFER,
+        regions=REGIONS, persistent=None, alignment=16,
+    ):
+        """Initialise the buffer description (no GL calls are made)
+
+        region_size -- bytes of storage required per frame
+        target -- buffer binding target used for create/bind
+        regions -- number of regions in the ring, 3 is triple-buffering
+        persistent -- if False, always use the orphaning fallback, if None
+            use persistent mapping when glBufferStorage is available
+        alignment -- default alignment (bytes) of allocations
+        """
+        self.region_size = int(region_size)
+        self.target = target
+        self.regions = max((int(regions),1))
+        self.persistent = persistent
+        self.alignment = alignment
+        self.buffer = None
+        self.region = -1
+        self.head = 0
+        self.fences = [None] * self.regions
+        self._memory = None
+        self._mapped_start = 0
+        self._mapped_type = ctypes.c_ubyte * (self.region_size * self.regions)
+
+    @property
+    def total_size( self ):
+        """Size in bytes of the whole ring"""
+        return self.region_size * self.regions
+    @property
+    def base( self ):
+        """Byte offset of the current region within the buffer"""
+        return max((self.region,0)) * self.region_size
+
+    def create( self ):
+        """Allocate the GL buffer (and map it, if persistent)"""
+        if self.buffer is not None:
+            return self
+        from numpy import frombuffer
+        buffer = _types.GLuint()
+        GL_1_5.glGenBuffers( 1, ctypes.byref( buffer ))
+        self.buffer = buffer.value
+        GL_1_5.glBindBuffer( self.target, self.buffer )
+        if self.persistent is not False and bool( glBufferStorage ):
+            flags = (
+                GL_3_0.GL_MAP_WRITE_BIT |
+                GL_4_4.GL_MAP_PERSISTENT_BIT |
+                GL_4_4.GL_MAP_COHERENT_BIT
+            )
+            glBufferStorage( self.target, self.total_size, None, flags )
+            pointer = GL_3_0.glMapBufferRange( self.target, 0, self.total_size, flags )
+            if not pointer:
+                raise RuntimeError( """Unable to persistently map buffer %s"""%(self.buffer,))
+            self._memory = frombuffer( self._mapped_type.from_address( pointer ), 'B' )
+            self.persistent = True
+        else:
+            GL_1_5.glBufferData( self.target, self.total_size, None, GL_1_5.GL_STREAM_DRAW )
+            self.persistent = False
+        return self
+
+    def delete( self ):
+        """Release fences and the GL buffer"""
+        for i,fence in enumerate(self.fences):
+            if fence:
+                GL_3_2.glDeleteSync( fence )
+            self.fences[i] = None
+        if self.buffer is not None:
+            if self.persistent or self._memory is not None:
+                GL_1_5.glBindBuffer( self.target, self.buffer )
+                GL_1_5.glUnmapBuffer( self.target )
+            self._memory = None
+            GL_1_5.glDeleteBuffers( 1, ctypes.byref( _types.GLuint( self.buffer )))
+            self.buffer = None
+
+    def _wait( self, region ):
+        """Block until the GL has finished reading region (normally a no-op)"""
+        fence = self.fences[ region ]
+        if fence:
+            while GL_3_2.glClientWaitSync(
+                fence, GL_3_2.GL_SYNC_FLUSH_COMMANDS_BIT, self.WAIT_TIMEOUT
+            ) == GL_3_2.GL_TIMEOUT_EXPIRED:
+                pass
+            GL_3_2.glDeleteSync( fence )
+            self.fences[ region ] = None
+
+    def begin_frame( self ):
+        """Advance to the next region of the ring
+
+        Fences the region used by the previous frame (the draws sourcing
+        from it have been issued by now) and makes the next region
+        writable; only blocks if the GL is still reading that region from
+        `regions` frames ago.
+        """
+        if self.buffer is None:
+            self.create()
+        if not self.persistent and self._memory is not None:
+            self.flush()
+        if self.region >= 0 and self.persistent:
+            self.fences[ self.region ] = GL_3_2.glFenceSync(
+                GL_3_2.GL_SYNC_GPU_COMMANDS_COMPLETE, 0
+            )
+        self.region = (self.region + 1) % self.regions
+        self.head = 0
+        if self.persistent:
+            self._wait( self.region )
+        else:
+            if self.region == 0:
+                # orphan: the driver hands us fresh storage while the GL
+                # keeps reading the old one
+                GL_1_5.glBindBuffer( self.target, self.buffer )
+                GL_1_5.glBufferData( self.target, self.total_size, None, GL_1_5.GL_STREAM_DRAW )
+            self._map( 0 )
+        return self
+
+    def _map( self, start ):
+        """Map the current region from start to its end (fallback path)
+
+        Used at the start of a frame and again by allocate() after a
+        flush() within the frame; only the newly mapped range is
+        invalidated, so data flushed earlier in the frame is kept.
+        """
+        from numpy import frombuffer
+        GL_1_5.glBindBuffer( self.target, self.buffer )
+        size = self.region_size - start
+        pointer = GL_3_0.glMapBufferRange(
+            self.target, self.base + start, size,
+            GL_3_0.GL_MAP_WRITE_BIT |
+            GL_3_0.GL_MAP_INVALIDATE_RANGE_BIT |
+            GL_3_0.GL_MAP_UNSYNCHRONIZED_BIT,
+        )
+        if not pointer:
+            raise RuntimeError( """Unable to map buffer %s"""%(self.buffer,))
+        self._memory = frombuffer(
+            (ctypes.c_ubyte * size).from_address( pointer ), 'B'
+        )
+        self._mapped_start = start
+
+    def allocate( self, shape, dtype='B', alignment=None ):
+        """Reserve space in the current region
+
+        shape -- integer count or tuple shape of the requested array
+        dtype -- numpy dtype of the requested array
+        alignment -- byte alignment of the allocation, defaults to the
+            larger of the buffer's alignment and the dtype's item size
+
+        returns (array,offset) where array is a numpy view directly onto
+        the mapped storage and offset is the byte offset to pass to
+        gl*Pointer/glDraw* calls (see pointer())
+
+        raises ValueError if the region does not have room
+        """
+        from numpy import dtype as _dtype
+        if self.region < 0:
+            self.begin_frame()
+        dtype = _dtype( dtype )
+        if isinstance( shape, int ):
+            shape = (shape,)
+        count = 1
+        for dim in shape:
+            count *= dim
+        nbytes = count * dtype.itemsize
+        alignment = alignment or max((self.alignment,dtype.itemsize))
+        start = -(-self.head // alignment) * alignment
+        if start + nbytes > self.region_size:
+            raise ValueError(
+                """Allocation of %s bytes exceeds free space in %s byte region"""%(
+                    nbytes, self.region_size,
+                )
+            )
+        if self.persistent:
+            local = self.base + start
+        else:
+            if self._memory is None:
+                if not nbytes:
+                    from numpy import zeros
+                    return zeros( shape, dtype ), self.base + start
+                self._map( start )
+            local = start - self._mapped_start
+        self.head = start + nbytes
+        view = self._memory[local:local+nbytes].view( dtype ).reshape( shape )
+        return view, self.base + start
+
+    def write( self, data, alignment=None ):
+        """Copy an existing array into the current region
+
+        returns byte offset of the copied data
+        """
+        from numpy import asarray
+        data = asarray( data )
+        view, offset = self.allocate( data.shape, data.dtype, alignment )
+        view[...] = data
+        return offset
+
+    def flush( self ):
+        """Make the current region's writes visible to the GL
+
+        A no-op with persistent-coherent mapping, otherwise unmaps the
+        region; must be called before drawing from the fallback path.
+        Further allocate()/write() calls in the same frame map the
+        remainder of the region again.
+        """
+        if not self.persistent and self._memory is not None:
+            self._memory = None
+            GL_1_5.glBindBuffer( self.target, self.buffer )
+            GL_1_5.glUnmapBuffer( self.target )
+
+    def pointer( self, offset ):
+        """Produce a pointer argument for gl*Pointer calls at offset"""
+        return ctypes.c_void_p( offset )
+
+    def __int__( self ):
+        """Get our buffer id (creating it if necessary)"""
+        if self.buffer is None:
+            self.create()
+        return self.buffer
+
+    def bind( self ):
+        """Bind the buffer to its target"""
+        if self.buffer is None:
+            self.create()
+        GL_1_5.glBindBuffer( self.target, self.buffer )
+    def unbind( self ):
+        """Unbind the buffer (make normal array operations active)"""
+        GL_1_5.glBindBuffer( self.target, 0 )
+
+    __enter__ = bind
+    def __exit__( self, exc_type=None, exc_val=None, exc_tb=None ):
+        """Context manager exit"""
+        self.unbind()
+        return False # do not supress exceptions...
@@ -0,0 +1,602 @@
+"""Convenience API for texture objects which are updated frequently
+
+StreamingTexture keeps a single texture object alive for its whole
+lifetime and feeds it through a small ring of GL_PIXEL_UNPACK_BUFFER
+staging buffers.  Each upload is written into the next staging buffer
+(mapped with glMapBufferRange) while the GL may still be sourcing the
+previous upload from the other buffer, so the per-call conversion in
+OpenGL.GL.images and the synchronous client-memory transfer of a
+plain glTexSubImage2D call are both avoided.
+
+Only the regions registered with mark_dirty are transferred, so a
+heat-map style overlay where a handful of cells change each frame costs
+a handful of row copies rather than a whole image.
+
+Usage:
+
+    stream = textures.StreamingTexture( 256, 256, GL_RGBA )
+    ...
+    heat[ y:y+h, x:x+w ] = new_values
+    stream.mark_dirty( x, y, w, h )
+    stream.upload( heat )
+    with stream:
+        draw_textured_quad()
+
+Frames are numpy arrays (or anything numpy.asarray accepts without
+copying) of shape (height, width) or (height, width, components) in
+row-major order, i.e. row 0 is the first row passed to the GL.
+
+TextureManager owns the lifecycle of a set of (mostly static) textures
+identified by key.  Storage is allocated immutably with glTexStorage2D/3D,
+same-sized, same-format small images are packed as layers of shared
+GL_TEXTURE_2D_ARRAY textures (one bind serves every layer), and the
+estimated memory of all resident textures is kept under a budget by
+evicting the least-recently-used ones.  Evicted textures are reloaded
+from their source callback the next time they are used:
+
+    manager = textures.TextureManager( budget=64*1024*1024 )
+    manager.add( 'marker', lambda: load_png( 'marker.png' ))
+    ...
+    layer = manager.bind( 'marker', unit=0 ) # None unless packed
+    ...
+    manager.endFrame()
+"""
+import ctypes
+from collections import OrderedDict
+from OpenGL import images, arrays
+from OpenGL.extensions import alternate
+from OpenGL.GL import images as _images # registers the image-format tables
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_2, GL_1_3, GL_1_5, GL_2_1, GL_3_0, GL_4_2
+from OpenGL.raw.GL.ARB import texture_storage as _texture_storage
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'StreamingTexture',
+    'TextureManager',
+)
+
+# unpack state used for tightly packed uploads, restored afterwards so
+# that client-side transfers relying on the defaults are unaffected
+TIGHT_UNPACK = (
+    (GL_1_1.GL_UNPACK_ALIGNMENT, 1),
+    (GL_1_1.GL_UNPACK_ROW_LENGTH, 0),
+    (GL_1_1.GL_UNPACK_SKIP_ROWS, 0),
+    (GL_1_1.GL_UNPACK_SKIP_PIXELS, 0),
+)
+
+def _savePixelStore( ):
+    """Record the current TIGHT_UNPACK parameters and apply tight packing"""
+    saved = []
+    value = _types.GLint( 0 )
+    for pname,tight in TIGHT_UNPACK:
+        GL_1_1.glGetIntegerv( pname, ctypes.byref( value ))
+        saved.append( value.value )
+        if value.value != tight:
+            GL_1_1.glPixelStorei( pname, tight )
+    return saved
+
+def _restorePixelStore( saved ):
+    for (pname,tight),value in zip( TIGHT_UNPACK, saved ):
+        if value != tight:
+            GL_1_1.glPixelStorei( pname, value )
+
+class StreamingTexture( object ):
+    """Persistent texture uploaded through double-buffered unpack buffers
+
+    Attributes of note:
+
+        texture -- GLuint texture id (None until create() is called)
+        buffers -- GLuint pixel-unpack buffer ids
+        dirty -- list of (x,y,width,height) rectangles pending upload
+        full_upload_ratio -- once the dirty area exceeds this fraction of
+            the image a single whole-image transfer is used instead of one
+            transfer per rectangle
+    """
+    BUFFER_COUNT = 2
+    full_upload_ratio = 0.5
+    def __init__(
+        self, width, height,
+        format=GL_1_1.GL_RGBA, type=GL_1_1.GL_UNSIGNED_BYTE,
+        internalFormat=None, target=GL_1_1.GL_TEXTURE_2D,
+        buffers=BUFFER_COUNT,
+    ):
+        """Initialise the texture description (no GL calls are made)
+
+        width, height -- dimensions of the texture in pixels
+        format -- pixel format of the frames passed to upload
+        type -- storage type of the frames passed to upload
+        internalFormat -- GL internal format, defaults to format
+        target -- texture target, normally GL_TEXTURE_2D
+        buffers -- number of staging buffers in the ring, 2 gives
+            classic double-buffering
+        """
+        self.width = int(width)
+        self.height = int(height)
+        self.format = format
+        self.type = type
+        self.internalFormat = format if internalFormat is None else internalFormat
+        self.target = target
+        self.buffer_count = max((int(buffers),1))
+        components = images.formatToComponentCount( format )
+        arrayType = arrays.GL_CONSTANT_TO_ARRAY_TYPE[ images.TYPE_TO_ARRAYTYPE.get(type,type) ]
+        unit = ctypes.sizeof( arrayType.baseType )
+        if type in images.TIGHT_PACK_FORMATS:
+            self.pixel_size = unit
+        else:
+            self.pixel_size = unit * components
+        self.row_size = self.pixel_size * self.width
+        self.byte_size = self.row_size * self.height
+        self.texture = None
+        self.buffers = []
+        self.current = 0
+        self.dirty = []
+        self._mapped_type = ctypes.c_ubyte * self.byte_size
+
+    def create( self ):
+        """Allocate the texture storage and the staging buffers
+
+        Called automatically by upload/bind if not yet done; requires a
+        valid context.
+        """
+        if self.texture is not None:
+            return self
+        texture = _types.GLuint()
+        GL_1_1.glGenTextures( 1, ctypes.byref( texture ))
+        self.texture = texture.value
+        GL_1_1.glBindTexture( self.target, self.texture )
+        GL_1_1.glTexParameteri( self.target, GL_1_1.GL_TEXTURE_MIN_FILTER, GL_1_1.GL_LINEAR )
+        GL_1_1.glTexParameteri( self.target, GL_1_1.GL_TEXTURE_MAG_FILTER, GL_1_1.GL_LINEAR )
+        GL_1_1.glTexImage2D(
+            self.target, 0, self.internalFormat,
+            self.width, self.height, 0,
+            self.format, self.type, None,
+        )
+        ids = (_types.GLuint * self.buffer_count)()
+        GL_1_5.glGenBuffers( self.buffer_count, ids )
+        self.buffers = list(ids)
+        for buffer in self.buffers:
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, buffer )
+            GL_1_5.glBufferData(
+                GL_2_1.GL_PIXEL_UNPACK_BUFFER, self.byte_size, None, GL_1_5.GL_STREAM_DRAW
+            )
+        GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, 0 )
+        # the first upload has to cover the whole (undefined) image
+        self.dirty = [(0,0,self.width,self.height)]
+        return self
+
+    def delete( self ):
+        """Release the GL texture and staging buffers"""
+        if self.buffers:
+            ids = (_types.GLuint * len(self.buffers))( *self.buffers )
+            GL_1_5.glDeleteBuffers( len(self.buffers), ids )
+            self.buffers = []
+        if self.texture is not None:
+            GL_1_1.glDeleteTextures( 1, ctypes.byref( _types.GLuint( self.texture )))
+            self.texture = None
+
+    def __int__( self ):
+        """Get our texture id (creating it if necessary)"""
+        if self.texture is None:
+            self.create()
+        return self.texture
+
+    def mark_dirty( self, x=0, y=0, width=None, height=None ):
+        """Register a changed rectangle for the next upload
+
+        With no arguments the whole image is marked as changed. The
+        rectangle is clipped to the texture bounds.
+        """
+        if width is None:
+            width = self.width - x
+        if height is None:
+            height = self.height - y
+        x0,y0 = max((int(x),0)), max((int(y),0))
+        x1 = min((int(x)+int(width),self.width))
+        y1 = min((int(y)+int(height),self.height))
+        if x1 > x0 and y1 > y0:
+            self.dirty.append( (x0,y0,x1-x0,y1-y0) )
+
+    def _pending( self ):
+        """Determine the rectangles to transfer for the current dirty set"""
+        area = 0
+        for (x,y,w,h) in self.dirty:
+            area += w*h
+        if area >= self.full_upload_ratio * self.width * self.height:
+            return [(0,0,self.width,self.height)]
+        return self.dirty
+
+    def upload( self, frame, rects=None ):
+        """Transfer changed regions of frame into the texture
+
+        frame -- full-size image array, see module docstring for layout
+        rects -- optional sequence of (x,y,width,height) rectangles to
+            transfer in addition to those registered with mark_dirty
+
+        The regions are packed tightly into the next staging buffer and
+        the texture is updated from that buffer, the call returns without
+        waiting for the GL to consume the data.
+
+        returns number of bytes transferred
+        """
+        if rects:
+            for rect in rects:
+                self.mark_dirty( *rect )
+        if self.texture is None:
+            self.create()
+        if not self.dirty:
+            return 0
+        from numpy import asarray, frombuffer
+        frame = asarray( frame )
+        if frame.shape[:2] != (self.height,self.width) or frame.nbytes != self.byte_size:
+            raise ValueError(
+                """Frame of shape %s/%s bytes does not match %sx%s texture of %s bytes"""%(
+                    frame.shape, frame.nbytes, self.width, self.height, self.byte_size,
+                )
+            )
+        pending = self._pending()
+        buffer = self.buffers[ self.current ]
+        self.current = (self.current + 1) % len(self.buffers)
+        GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, buffer )
+        pointer = GL_3_0.glMapBufferRange(
+            GL_2_1.GL_PIXEL_UNPACK_BUFFER, 0, self.byte_size,
+            GL_3_0.GL_MAP_WRITE_BIT | GL_3_0.GL_MAP_INVALIDATE_BUFFER_BIT,
+        )
+        if not pointer:
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, 0 )
+            raise RuntimeError( """Unable to map pixel unpack buffer %s"""%(buffer,) )
+        staging = frombuffer( self._mapped_type.from_address( pointer ), 'B' )
+        pixels = frame.reshape( (self.height,self.width,-1) ).view( 'B' )
+        offsets = []
+        offset = 0
+        try:
+            for (x,y,w,h) in pending:
+                size = w * h * self.pixel_size
+                staging[offset:offset+size].reshape( (h,w*self.pixel_size) )[:] = \
+                    pixels[y:y+h,x:x+w].reshape( (h,w*self.pixel_size) )
+                offsets.append( offset )
+                offset += size
+        finally:
+            GL_1_5.glUnmapBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER )
+        saved = _savePixelStore()
+        try:
+            GL_1_1.glBindTexture( self.target, self.texture )
+            for (x,y,w,h),start in zip( pending, offsets ):
+                GL_1_1.glTexSubImage2D(
+                    self.target, 0, x, y, w, h, self.format, self.type, ctypes.c_void_p( start ),
+                )
+        finally:
+            _restorePixelStore( saved )
+            GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, 0 )
+        self.dirty = []
+        return offset
+
+    def bind( self ):
+        """Bind the texture to its target on the active texture unit"""
+        if self.texture is None:
+            self.create()
+        GL_1_1.glBindTexture( self.target, self.texture )
+    def unbind( self ):
+        """Unbind the texture from its target"""
+        GL_1_1.glBindTexture( self.target, 0 )
+
+    __enter__ = bind
+    def __exit__( self, exc_type=None, exc_val=None, exc_tb=None ):
+        """Context manager exit"""
+        self.unbind()
+        return False # do not supress exceptions...
+
+glTexStorage2D = alternate( GL_4_2.glTexStorage2D, _texture_storage.glTexStorage2D )
+glTexStorage3D = alternate( GL_4_2.glTexStorage3D, _texture_storage.glTexStorage3D )
+
+# sized internal formats for unsized GL_UNSIGNED_BYTE formats
+SIZED_FORMATS = {
+    GL_1_1.GL_RED: GL_3_0.GL_R8,
+    GL_3_0.GL_RG: GL_3_0.GL_RG8,
+    GL_1_1.GL_RGB: GL_1_1.GL_RGB8,
+    GL_1_1.GL_RGBA: GL_1_1.GL_RGBA8,
+}
+# bytes per texel of common sized internal formats, others are estimated
+# from the source data
+TEXEL_SIZES = {
+    GL_3_0.GL_R8: 1, GL_3_0.GL_RG8: 2, GL_1_1.GL_RGB8: 4, GL_1_1.GL_RGBA8: 4,
+    GL_2_1.GL_SRGB8: 4, GL_2_1.GL_SRGB8_ALPHA8: 4,
+    GL_3_0.GL_R16F: 2, GL_3_0.GL_RG16F: 4, GL_3_0.GL_RGBA16F: 8,
+    GL_3_0.GL_R32F: 4, GL_3_0.GL_RG32F: 8, GL_3_0.GL_RGBA32F: 16,
+}
+
+def _levelCount( width, height ):
+    """Number of levels in a full mipmap chain"""
+    return max( width, height ).bit_length()
+
+def _chainSize( width, height, levels, texelSize ):
+    """Estimated bytes of a levels-deep mipmap chain"""
+    total = 0
+    for level in range( levels ):
+        total += max( width>>level, 1 ) * max( height>>level, 1 ) * texelSize
+    return total
+
+def _allocate( target, internalFormat, width, height, levels, format, type, layers=None ):
+    """Generate and bind a texture with (preferably immutable) storage"""
+    texture = _types.GLuint()
+    GL_1_1.glGenTextures( 1, ctypes.byref( texture ))
+    GL_1_1.glBindTexture( target, texture.value )
+    if layers is None:
+        if glTexStorage2D:
+            glTexStorage2D( target, levels, internalFormat, width, height )
+        else:
+            for level in range( levels ):
+                GL_1_1.glTexImage2D(
+                    target, level, internalFormat,
+                    max( width>>level, 1 ), max( height>>level, 1 ), 0, format, type, None,
+                )
+    else:
+        if glTexStorage3D:
+            glTexStorage3D( target, levels, internalFormat, width, height, layers )
+        else:
+            for level in range( levels ):
+                GL_1_2.glTexImage3D(
+                    target, level, internalFormat,
+                    max( width>>level, 1 ), max( height>>level, 1 ), layers, 0, format, type, None,
+                )
+    GL_1_1.glTexParameteri( target, GL_1_2.GL_TEXTURE_MAX_LEVEL, levels-1 )
+    GL_1_1.glTexParameteri(
+        target, GL_1_1.GL_TEXTURE_MIN_FILTER,
+        GL_1_1.GL_LINEAR_MIPMAP_LINEAR if levels > 1 else GL_1_1.GL_LINEAR,
+    )
+    GL_1_1.glTexParameteri( target, GL_1_1.GL_TEXTURE_MAG_FILTER, GL_1_1.GL_LINEAR )
+    return texture.value
+
+class _ManagedTexture( object ):
+    """Book-keeping for one TextureManager entry
+
+    An unpacked entry is its own residency unit (texture is its GL id),
+    a packed one lives in layer of array, which is the residency unit.
+    """
+    def __init__( self, key, source, format, type, internalFormat, mipmaps, pack ):
+        self.key = key
+        self.source = source
+        self.format = format
+        self.type = type
+        self.internalFormat = internalFormat
+        self.mipmaps = mipmaps
+        self.pack = pack
+        self.width = self.height = None
+        self.texture = None
+        self.array = None
+        self.layer = None
+        self.bytes = 0
+        self.frame = -1
+        self.loads = 0
+    @property
+    def resident( self ):
+        return self.texture is not None or self.array is not None
+    def release( self ):
+        if self.texture is not None:
+            GL_1_1.glDeleteTextures( 1, ctypes.byref( _types.GLuint( self.texture )))
+            self.texture = None
+
+class _TextureArray( object ):
+    """A GL_TEXTURE_2D_ARRAY whose layers hold packed entries"""
+    def __init__( self, signature, texture, layers, bytes ):
+        self.signature = signature
+        self.texture = texture
+        self.free = list( range( layers-1, -1, -1 ))
+        self.members = set()
+        self.bytes = bytes
+        self.frame = -1
+    def release( self ):
+        for member in self.members:
+            member.array = member.layer = None
+        self.members.clear()
+        if self.texture is not None:
+            GL_1_1.glDeleteTextures( 1, ctypes.byref( _types.GLuint( self.texture )))
+            self.texture = None
+
+class TextureManager( object ):
+    """Keyed textures with immutable storage, layer packing and an LRU budget
+
+    Attributes of note:
+
+        budget -- bytes of (estimated) texture memory to stay under, None
+            for no limit
+        usage -- estimated bytes currently resident
+        packLimit -- images no larger than this in either dimension are
+            packed into texture arrays (0 disables packing)
+        layers -- number of layers allocated per texture array
+        frame -- frame counter advanced by endFrame()
+        evictions -- number of residency units evicted so far
+
+    Estimates count the full mipmap chain at the internal format's texel
+    size (RGB8 is assumed to be padded to 4 bytes); a texture array is
+    charged for all of its layers as soon as it is allocated.  Textures
+    used during the current frame are never evicted, so a frame whose
+    working set exceeds the budget temporarily exceeds it.
+
+    Packed entries are bound as GL_TEXTURE_2D_ARRAY and must be sampled
+    with a sampler2DArray at the layer returned by bind()/resolve().
+    """
+    LAYERS = 16
+    PACK_LIMIT = 256
+    def __init__( self, budget=None, packLimit=PACK_LIMIT, layers=LAYERS ):
+        self.budget = budget
+        self.packLimit = packLimit
+        self.layers = layers
+        self.entries = {}
+        self.arrays = {}
+        self.lru = OrderedDict()
+        self.usage = 0
+        self.frame = 0
+        self.evictions = 0
+
+    def __contains__( self, key ):
+        return key in self.entries
+
+    def add(
+        self, key, source,
+        format=GL_1_1.GL_RGBA, type=GL_1_1.GL_UNSIGNED_BYTE, internalFormat=None,
+        mipmaps=True, pack=True,
+    ):
+        """Register a texture, loaded from source() on first use
+
+        source -- callable returning the image as an array of shape
+            (height, width) or (height, width, components), called again
+            whenever the texture is reloaded after eviction
+        format, type -- pixel format/type of the source data
+        internalFormat -- sized internal format, defaults to the 8-bit
+            equivalent of format
+        mipmaps -- allocate and generate a full mipmap chain
+        pack -- allow packing into a texture array when small enough
+        """
+        if internalFormat is None:
+            internalFormat = SIZED_FORMATS.get( format )
+            if internalFormat is None or type != GL_1_1.GL_UNSIGNED_BYTE:
+                raise ValueError(
+                    """Need an explicit sized internalFormat for format 0x%x, type 0x%x"""%( format, type )
+                )
+        if key in self.entries:
+            self.remove( key )
+        self.entries[ key ] = _ManagedTexture(
+            key, source, format, type, internalFormat, mipmaps, pack,
+        )
+
+    def remove( self, key ):
+        """Release and forget the texture for key
+
+        raises KeyError for unknown keys
+        """
+        entry = self.entries.pop( key )
+        if entry.array is not None:
+            array = entry.array
+            array.members.discard( entry )
+            array.free.append( entry.layer )
+            entry.array = entry.layer = None
+            if not array.members:
+                self._drop( array )
+        elif entry.texture is not None:
+            self._drop( entry )
+
+    def _drop( self, unit ):
+        """Release a residency unit and stop accounting for it"""
+        if self.lru.pop( unit, None ) is not None:
+            self.usage -= unit.bytes
+        if isinstance( unit, _TextureArray ):
+            arrays = self.arrays.get( unit.signature, () )
+            if unit in arrays:
+                arrays.remove( unit )
+        unit.release()
+
+    def _makeRoom( self, bytes ):
+        """Evict least-recently-used units until bytes more fit the budget"""
+        if self.budget is None:
+            return
+        while self.lru and self.usage + bytes > self.budget:
+            unit = next( iter( self.lru ))
+            if unit.frame >= self.frame:
+                break
+            self._drop( unit )
+            self.evictions += 1
+
+    def _charge( self, unit ):
+        self.lru[ unit ] = True
+        self.usage += unit.bytes
+
+    def estimate( self, key ):
+        """Estimated bytes of key's texture (its layer share if packed), 0 if never loaded"""
+        return self.entries[ key ].bytes
+
+    def _load( self, entry ):
+        """(Re)load entry from its source into new or packed storage"""
+        from numpy import ascontiguousarray
+        data = ascontiguousarray( entry.source() )
+        height, width = data.shape[:2]
+        entry.width, entry.height = width, height
+        levels = _levelCount( width, height ) if entry.mipmaps else 1
+        texelSize = TEXEL_SIZES.get( entry.internalFormat ) or max( data.nbytes // (width*height), 1 )
+        entry.bytes = _chainSize( width, height, levels, texelSize )
+        GL_1_5.glBindBuffer( GL_2_1.GL_PIXEL_UNPACK_BUFFER, 0 )
+        saved = _savePixelStore()
+        try:
+            if entry.pack and width <= self.packLimit and height <= self.packLimit and self.layers > 1:
+                signature = (width, height, entry.internalFormat, levels)
+                arrays = self.arrays.setdefault( signature, [] )
+                for array in arrays:
+                    if array.free:
+                        break
+                else:
+                    bytes = entry.bytes * self.layers
+                    self._makeRoom( bytes )
+                    array = _TextureArray(
+                        signature,
+                        _allocate(
+                            GL_3_0.GL_TEXTURE_2D_ARRAY, entry.internalFormat, width, height,
+                            levels, entry.format, entry.type, layers=self.layers,
+                        ),
+                        self.layers, bytes,
+                    )
+                    arrays.append( array )
+                    self._charge( array )
+                entry.array = array
+                entry.layer = array.free.pop()
+                array.members.add( entry )
+                GL_1_1.glBindTexture( GL_3_0.GL_TEXTURE_2D_ARRAY, array.texture )
+                GL_1_2.glTexSubImage3D(
+                    GL_3_0.GL_TEXTURE_2D_ARRAY, 0, 0, 0, entry.layer, width, height, 1,
+                    entry.format, entry.type, data,
+                )
+                if levels > 1:
+                    GL_3_0.glGenerateMipmap( GL_3_0.GL_TEXTURE_2D_ARRAY )
+            else:
+                self._makeRoom( entry.bytes )
+                entry.texture = _allocate(
+                    GL_1_1.GL_TEXTURE_2D, entry.internalFormat, width, height,
+                    levels, entry.format, entry.type,
+                )
+                GL_1_1.glTexSubImage2D(
+                    GL_1_1.GL_TEXTURE_2D, 0, 0, 0, width, height, entry.format, entry.type, data,
+                )
+                if levels > 1:
+                    GL_3_0.glGenerateMipmap( GL_1_1.GL_TEXTURE_2D )
+                self._charge( entry )
+        finally:
+            _restorePixelStore( saved )
+        entry.loads += 1
+
+    def resolve( self, key ):
+        """Make key resident and mark it used this frame
+
+        returns (target, texture, layer), layer is None for unpacked
+        textures
+
+        raises KeyError for unknown keys
+        """
+        entry = self.entries[ key ]
+        if not entry.resident:
+            self._load( entry )
+        unit = entry.array or entry
+        unit.frame = entry.frame = self.frame
+        self.lru.move_to_end( unit )
+        if entry.array is not None:
+            return GL_3_0.GL_TEXTURE_2D_ARRAY, entry.array.texture, entry.layer
+        return GL_1_1.GL_TEXTURE_2D, entry.texture, None
+
+    def bind( self, key, unit=None ):
+        """Bind key's texture (on texture unit unit, default the active one)
+
+        returns the array layer for packed textures, otherwise None
+        """
+        target, texture, layer = self.resolve( key )
+        if unit is not None:
+            GL_1_3.glActiveTexture( GL_1_3.GL_TEXTURE0 + unit )
+        GL_1_1.glBindTexture( target, texture )
+        return layer
+
+    def endFrame( self ):
+        """Advance the frame counter and trim usage back to the budget"""
+        self.frame += 1
+        self._makeRoom( 0 )
+
+    def delete( self ):
+        """Release every texture (entries stay registered and reload on use)"""
+        for unit in list( self.lru ):
+            self._drop( unit )
+        self.arrays.clear()
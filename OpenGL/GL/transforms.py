@@ -0,0 +1,268 @@
+"""Client-side matrix stacks replacing the fixed-function matrix calls
+
+glMatrixMode/glLoadIdentity/gluPerspective/gluLookAt/glPushMatrix...
+are each a wrapped GL (or GLU) call, and the resulting matrices can only
+be seen from Python by reading them back with glGetDoublev.  MatrixStack
+keeps the stack in a preallocated (depth,4,4) float32 numpy array
+instead, with builders ported from the GLU semantics, and uploads the top
+of the stack with a single glLoadMatrixf (or glUniformMatrix4fv) only
+when it has actually changed.
+
+Matrices are stored the way GL expects them in memory (column-major),
+i.e. as numpy arrays they are the transpose of the textbook matrix and
+transform row vectors: clip = point.dot( modelview ).dot( projection ).
+This is the same layout glGetDoublev( GL_MODELVIEW_MATRIX ) returns, so
+stack.current can be passed straight to OpenGL.GLU's gluProjectArray.
+
+Usage:
+
+    projection = transforms.MatrixStack( GL_PROJECTION )
+    modelview = transforms.MatrixStack( GL_MODELVIEW )
+    ...
+    projection.loadIdentity()
+    projection.perspective( 45, width/float(height), 0.1, 1000.0 )
+    projection.upload()
+    ...
+    modelview.loadIdentity()
+    modelview.lookAt( (0,-400,300), (0,0,0), (0,0,1) )
+    modelview.upload()
+    with modelview.pushed():
+        modelview.translate( x, y, 0 )
+        modelview.upload()
+        draw()
+    modelview.upload()
+"""
+import math
+import numpy
+from OpenGL.raw.GL.VERSION import GL_1_1
+
+__all__ = (
+    'MatrixStack',
+    'identity',
+    'translation',
+    'scaling',
+    'rotation',
+    'lookAt',
+    'perspective',
+    'frustum',
+    'ortho',
+    'ortho2D',
+)
+
+def identity( ):
+    """New 4x4 float32 identity matrix"""
+    return numpy.identity( 4, dtype=numpy.float32 )
+
+def _layout( matrix ):
+    """Convert a textbook (row-major) matrix to GL memory layout"""
+    return numpy.ascontiguousarray( numpy.asarray( matrix, dtype=numpy.float32 ).T )
+
+def translation( x, y, z ):
+    """Matrix equivalent to glTranslatef( x, y, z )"""
+    result = identity()
+    result[3,:3] = x, y, z
+    return result
+
+def scaling( x, y, z ):
+    """Matrix equivalent to glScalef( x, y, z )"""
+    return numpy.diag( numpy.array( (x,y,z,1.0), dtype=numpy.float32 ))
+
+def rotation( angle, x, y, z ):
+    """Matrix equivalent to glRotatef( angle, x, y, z ), angle in degrees"""
+    axis = numpy.array( (x,y,z), dtype=numpy.float64 )
+    length = numpy.linalg.norm( axis )
+    if not length:
+        return identity()
+    x, y, z = axis / length
+    radians = math.radians( angle )
+    c, s = math.cos( radians ), math.sin( radians )
+    t = 1.0 - c
+    return _layout( [
+        [ t*x*x + c, t*x*y - s*z, t*x*z + s*y, 0.0 ],
+        [ t*x*y + s*z, t*y*y + c, t*y*z - s*x, 0.0 ],
+        [ t*x*z - s*y, t*y*z + s*x, t*z*z + c, 0.0 ],
+        [ 0.0, 0.0, 0.0, 1.0 ],
+    ] )
+
+def lookAt( eye, center, up ):
+    """Matrix equivalent to gluLookAt( *(eye+center+up) )"""
+    eye = numpy.asarray( eye, dtype=numpy.float64 )
+    forward = numpy.asarray( center, dtype=numpy.float64 ) - eye
+    forward /= numpy.linalg.norm( forward )
+    side = numpy.cross( forward, numpy.asarray( up, dtype=numpy.float64 ))
+    side /= numpy.linalg.norm( side )
+    up = numpy.cross( side, forward )
+    rotate = identity()
+    rotate[:3,0] = side
+    rotate[:3,1] = up
+    rotate[:3,2] = -forward
+    return translation( *-eye ).dot( rotate )
+
+def frustum( left, right, bottom, top, near, far ):
+    """Matrix equivalent to glFrustum( left, right, bottom, top, near, far )"""
+    width, height, depth = right-left, top-bottom, far-near
+    return _layout( [
+        [ 2.0*near/width, 0.0, (right+left)/width, 0.0 ],
+        [ 0.0, 2.0*near/height, (top+bottom)/height, 0.0 ],
+        [ 0.0, 0.0, -(far+near)/depth, -2.0*far*near/depth ],
+        [ 0.0, 0.0, -1.0, 0.0 ],
+    ] )
+
+def perspective( fovy, aspect, near, far ):
+    """Matrix equivalent to gluPerspective( fovy, aspect, near, far )
+
+    fovy is in degrees; like GLU, degenerate parameters (zero aspect or
+    depth range, or a 0/180 degree field of view) give the identity
+    """
+    radians = math.radians( fovy/2.0 )
+    sine = math.sin( radians )
+    depth = far - near
+    if depth == 0 or sine == 0 or aspect == 0:
+        return identity()
+    cotangent = math.cos( radians ) / sine
+    return _layout( [
+        [ cotangent/aspect, 0.0, 0.0, 0.0 ],
+        [ 0.0, cotangent, 0.0, 0.0 ],
+        [ 0.0, 0.0, -(far+near)/depth, -2.0*near*far/depth ],
+        [ 0.0, 0.0, -1.0, 0.0 ],
+    ] )
+
+def ortho( left, right, bottom, top, near, far ):
+    """Matrix equivalent to glOrtho( left, right, bottom, top, near, far )"""
+    width, height, depth = right-left, top-bottom, far-near
+    return _layout( [
+        [ 2.0/width, 0.0, 0.0, -(right+left)/width ],
+        [ 0.0, 2.0/height, 0.0, -(top+bottom)/height ],
+        [ 0.0, 0.0, -2.0/depth, -(far+near)/depth ],
+        [ 0.0, 0.0, 0.0, 1.0 ],
+    ] )
+
+def ortho2D( left, right, bottom, top ):
+    """Matrix equivalent to gluOrtho2D( left, right, bottom, top )"""
+    return ortho( left, right, bottom, top, -1.0, 1.0 )
+
+class MatrixStack( object ):
+    """Preallocated float32 matrix stack with change-tracked upload
+
+    Operations mirror the fixed-function ones (glLoadIdentity,
+    glMultMatrixf, glTranslatef, glPushMatrix...) and post-multiply the
+    top of the stack in the same way, but run entirely in numpy.
+
+    Attributes of note:
+
+        mode -- GL_MODELVIEW, GL_PROJECTION or GL_TEXTURE, the matrix
+            upload() loads into
+        stack -- (depth,4,4) float32 storage
+        depth -- index of the current top of stack
+    """
+    DEPTH = 32
+    def __init__( self, mode=GL_1_1.GL_MODELVIEW, depth=DEPTH ):
+        self.mode = mode
+        self.stack = numpy.zeros( (depth,4,4), dtype=numpy.float32 )
+        self.stack[0] = identity()
+        self.depth = 0
+        self.uploaded = None
+
+    @property
+    def current( self ):
+        """The top-of-stack matrix (a view, GL memory layout)"""
+        return self.stack[ self.depth ]
+
+    def loadIdentity( self ):
+        """Replace the top of the stack with the identity"""
+        self.current[:] = identity()
+        return self
+
+    def load( self, matrix ):
+        """Replace the top of the stack with matrix (GL memory layout)"""
+        self.current[:] = numpy.asarray( matrix, dtype=numpy.float32 ).reshape( (4,4) )
+        return self
+
+    def multiply( self, matrix ):
+        """Post-multiply the top of the stack by matrix as glMultMatrixf would"""
+        current = self.current
+        current[:] = numpy.dot( numpy.asarray( matrix, dtype=numpy.float32 ).reshape( (4,4) ), current )
+        return self
+
+    def translate( self, x, y, z ):
+        return self.multiply( translation( x, y, z ))
+    def scale( self, x, y, z ):
+        return self.multiply( scaling( x, y, z ))
+    def rotate( self, angle, x, y, z ):
+        return self.multiply( rotation( angle, x, y, z ))
+    def lookAt( self, eye, center, up ):
+        return self.multiply( lookAt( eye, center, up ))
+    def perspective( self, fovy, aspect, near, far ):
+        return self.multiply( perspective( fovy, aspect, near, far ))
+    def frustum( self, left, right, bottom, top, near, far ):
+        return self.multiply( frustum( left, right, bottom, top, near, far ))
+    def ortho( self, left, right, bottom, top, near, far ):
+        return self.multiply( ortho( left, right, bottom, top, near, far ))
+    def ortho2D( self, left, right, bottom, top ):
+        return self.multiply( ortho2D( left, right, bottom, top ))
+
+    def push( self ):
+        """Duplicate the top of the stack (glPushMatrix)
+
+        raises IndexError on overflow
+        """
+        if self.depth + 1 >= len( self.stack ):
+            raise IndexError( """Matrix stack overflow (depth %s)"""%( len(self.stack), ))
+        self.stack[ self.depth+1 ] = self.stack[ self.depth ]
+        self.depth += 1
+        return self
+
+    def pop( self ):
+        """Discard the top of the stack (glPopMatrix)
+
+        raises IndexError on underflow
+        """
+        if self.depth == 0:
+            raise IndexError( """Matrix stack underflow""" )
+        self.depth -= 1
+        return self
+
+    def pushed( self ):
+        """Context manager doing push() on entry and pop() on exit"""
+        return _Pushed( self )
+
+    def invalidate( self ):
+        """Force the next upload(), e.g. after other code changed GL's matrix"""
+        self.uploaded = None
+
+    def upload( self ):
+        """Load the top of the stack into the GL matrix for self.mode
+
+        Does nothing if the same values were the last ones uploaded,
+        otherwise issues glMatrixMode( mode ) and glLoadMatrixf, leaving
+        the matrix mode at GL_MODELVIEW as fixed-function code expects.
+
+        returns whether an upload was made
+        """
+        current = self.current
+        if self.uploaded is not None and numpy.array_equal( self.uploaded, current ):
+            return False
+        GL_1_1.glMatrixMode( self.mode )
+        GL_1_1.glLoadMatrixf( current )
+        if self.mode != GL_1_1.GL_MODELVIEW:
+            GL_1_1.glMatrixMode( GL_1_1.GL_MODELVIEW )
+        self.uploaded = current.copy()
+        return True
+
+    def uniform( self, location ):
+        """Upload the top of the stack to the mat4 uniform at location
+
+        Unlike upload() this is not change-tracked, as the target program
+        may have been switched since the last call.
+        """
+        from OpenGL.raw.GL.VERSION import GL_2_0
+        GL_2_0.glUniformMatrix4fv( location, 1, GL_1_1.GL_FALSE, self.current )
+
+class _Pushed( object ):
+    def __init__( self, stack ):
+        self.stack = stack
+    def __enter__( self ):
+        self.stack.push()
+        return self.stack
+    def __exit__( self, *args ):
+        self.stack.pop()
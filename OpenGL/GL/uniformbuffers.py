@@ -0,0 +1,360 @@
+"""Uniform/shader-storage block manager with std140/std430 packing
+
+Setting uniforms one glUniform* call at a time costs a wrapped call (and
+an array conversion) per value.  Uniform buffer objects (GL 3.1 /
+ARB_uniform_buffer_object) and shader storage buffers (GL 4.3 /
+ARB_shader_storage_buffer_object) instead let a whole block of values be
+uploaded as bytes and attached with glBindBufferRange.
+
+BlockLayout computes the byte layout of a block, either from a
+declarative schema using the std140/std430 rules, or from the offsets a
+linked program reports (see ShaderProgram.introspect).  A UniformBlock
+holds the block's bytes in a numpy array and exposes each member as a
+strided numpy view, so assigning block['colour'] = (1,0,0,1) writes the
+value at the right offset and marks that byte range dirty.
+
+UniformBufferManager owns the GL storage for any number of blocks:
+
+    streaming=True (default) -- blocks are sub-allocated once per frame
+        from one StreamingBuffer ring (aligned to the implementation's
+        offset alignment); blocks which have not changed keep their
+        previous allocation for as long as the ring guarantees it is
+        intact, so an unchanged block costs neither a copy nor a bind
+    streaming=False -- each block has a fixed slot in one buffer and
+        only its dirty byte range is re-uploaded with glBufferSubData
+
+Matrices are column-major (GL memory layout, as glUniformMatrix*fv with
+transpose False and OpenGL.GL.transforms); nested structs are not
+supported by the schema form.
+
+Usage:
+
+    manager = uniformbuffers.UniformBufferManager()
+    lights = manager.block( uniformbuffers.BlockLayout( [
+        ('colour','vec4'),
+        ('positions','vec3',8),
+        ('model','mat4'),
+    ] ), binding=2 )
+    ...
+    lights['colour'] = (1.0,0.5,0.0,1.0)
+    manager.upload() # once per frame, before drawing
+"""
+import ctypes
+from collections import namedtuple
+import numpy
+from OpenGL.raw.GL.VERSION import GL_1_5, GL_2_0, GL_3_0, GL_3_1, GL_4_3
+from OpenGL.raw.GL import _types
+from OpenGL.GL import streamingbuffers, limits
+
+__all__ = (
+    'BlockField',
+    'BlockLayout',
+    'UniformBlock',
+    'UniformBufferManager',
+)
+
+# GLSL type: (numpy scalar, rows (vector size), columns)
+TYPES = {
+    'float': ('<f4',1,1), 'vec2': ('<f4',2,1), 'vec3': ('<f4',3,1), 'vec4': ('<f4',4,1),
+    'int': ('<i4',1,1), 'ivec2': ('<i4',2,1), 'ivec3': ('<i4',3,1), 'ivec4': ('<i4',4,1),
+    'uint': ('<u4',1,1), 'uvec2': ('<u4',2,1), 'uvec3': ('<u4',3,1), 'uvec4': ('<u4',4,1),
+    'bool': ('<u4',1,1), 'bvec2': ('<u4',2,1), 'bvec3': ('<u4',3,1), 'bvec4': ('<u4',4,1),
+    'mat2': ('<f4',2,2), 'mat3': ('<f4',3,3), 'mat4': ('<f4',4,4),
+}
+# GL type enum (as reported by introspection): GLSL type
+GL_TYPES = {
+    GL_2_0.GL_FLOAT: 'float', GL_2_0.GL_FLOAT_VEC2: 'vec2',
+    GL_2_0.GL_FLOAT_VEC3: 'vec3', GL_2_0.GL_FLOAT_VEC4: 'vec4',
+    GL_2_0.GL_INT: 'int', GL_2_0.GL_INT_VEC2: 'ivec2',
+    GL_2_0.GL_INT_VEC3: 'ivec3', GL_2_0.GL_INT_VEC4: 'ivec4',
+    GL_2_0.GL_UNSIGNED_INT: 'uint', GL_3_0.GL_UNSIGNED_INT_VEC2: 'uvec2',
+    GL_3_0.GL_UNSIGNED_INT_VEC3: 'uvec3', GL_3_0.GL_UNSIGNED_INT_VEC4: 'uvec4',
+    GL_2_0.GL_BOOL: 'bool', GL_2_0.GL_BOOL_VEC2: 'bvec2',
+    GL_2_0.GL_BOOL_VEC3: 'bvec3', GL_2_0.GL_BOOL_VEC4: 'bvec4',
+    GL_2_0.GL_FLOAT_MAT2: 'mat2', GL_2_0.GL_FLOAT_MAT3: 'mat3', GL_2_0.GL_FLOAT_MAT4: 'mat4',
+}
+
+BlockField = namedtuple( 'BlockField', ('name','type','offset','shape','strides','extent') )
+
+def _roundUp( value, alignment ):
+    return -(-value // alignment) * alignment
+
+def _vectorAlignment( rows ):
+    """Base alignment (bytes) of a 4-byte-component vector"""
+    return 4 * (rows if rows != 3 else 4)
+
+class BlockLayout( object ):
+    """Byte layout of a uniform or storage block
+
+    Attributes of note:
+
+        fields -- ordered list of BlockField( name, type, offset, shape,
+            strides, extent ), shape/strides describe the numpy view of
+            the member (e.g. (8,3),(16,4) for a std140 vec3[8])
+        size -- total size of the block in bytes
+    """
+    def __init__( self, schema=(), std='std140', size=None ):
+        """Lay out schema, a sequence of (name,type) or (name,type,count)
+
+        std -- 'std140' (uniform blocks) or 'std430' (storage blocks)
+        size -- explicit block size, as reported by the GL
+        """
+        if std not in ('std140','std430'):
+            raise ValueError( """Unknown block layout %r"""%( std, ))
+        self.std = std
+        self.fields = []
+        maxAlignment = 16 if std == 'std140' else 4
+        offset = 0
+        for entry in schema:
+            name, type = entry[:2]
+            count = entry[2] if len(entry) > 2 else None
+            scalar, rows, columns = TYPES[ type ]
+            alignment = _vectorAlignment( rows )
+            if columns > 1 or count is not None:
+                # matrix columns and array elements are laid out as
+                # arrays, which std140 rounds up to vec4 alignment
+                if std == 'std140':
+                    alignment = _roundUp( alignment, 16 )
+            elementStride = alignment if columns > 1 else 4*rows
+            elementSize = elementStride * columns if columns > 1 else 4*rows
+            shape, strides = (), ()
+            if columns > 1:
+                shape, strides = (columns,rows), (elementStride,4)
+            elif rows > 1:
+                shape, strides = (rows,), (4,)
+            extent = elementSize
+            if count is not None:
+                arrayStride = _roundUp( elementSize, alignment )
+                shape, strides = (count,)+shape, (arrayStride,)+strides
+                extent = arrayStride * count
+            offset = _roundUp( offset, alignment )
+            self.fields.append( BlockField( name, type, offset, shape, strides, extent ))
+            offset += extent
+            maxAlignment = max( maxAlignment, alignment )
+        self.size = size if size is not None else _roundUp( offset, maxAlignment )
+
+    @classmethod
+    def fromProgram( cls, program, blockName ):
+        """Layout of uniform block blockName as linked in program
+
+        Uses the offsets and strides the GL reports (see
+        ShaderProgram.introspect), so it is correct for any layout
+        qualifier, including shared/packed.
+
+        raises KeyError if the program has no such active block
+        """
+        if program.uniformBlocks is None:
+            program.introspect()
+        block = program.uniformBlocks[ blockName ]
+        layout = cls( size=block.dataSize )
+        layout.std = None
+        seen = set()
+        for uniform in sorted( program.uniforms.values(), key=lambda u: u.offset ):
+            if uniform.blockIndex != block.index or uniform.index in seen:
+                continue
+            seen.add( uniform.index )
+            name = uniform.name
+            if name.endswith( '[0]' ):
+                name = name[:-3]
+            if name.startswith( blockName+'.' ):
+                name = name[len(blockName)+1:]
+            type = GL_TYPES[ uniform.type ]
+            scalar, rows, columns = TYPES[ type ]
+            if columns > 1:
+                shape, strides = (columns,rows), (uniform.matrixStride,4)
+                extent = uniform.matrixStride * columns
+            elif rows > 1:
+                shape, strides, extent = (rows,), (4,), 4*rows
+            else:
+                shape, strides, extent = (), (), 4
+            if uniform.size > 1 or uniform.name.endswith( '[0]' ):
+                shape, strides = (uniform.size,)+shape, (uniform.arrayStride,)+strides
+                extent = uniform.arrayStride * uniform.size
+            layout.fields.append( BlockField( name, type, uniform.offset, shape, strides, extent ))
+        return layout
+
+    def __repr__( self ):
+        return '%s(%s, size=%s)'%(
+            self.__class__.__name__,
+            ', '.join( '%s@%s'%( field.name, field.offset ) for field in self.fields ),
+            self.size,
+        )
+
+class UniformBlock( object ):
+    """Client-side bytes of one block plus per-member numpy views
+
+    Attributes of note:
+
+        layout -- the BlockLayout
+        binding -- the indexed binding point the block is attached to
+        data -- uint8 array of layout.size bytes
+        views -- name: strided numpy view of the member within data
+        dirtyStart, dirtyStop -- byte range changed since the last upload
+    """
+    def __init__( self, layout, binding ):
+        self.layout = layout
+        self.binding = binding
+        self.data = numpy.zeros( (layout.size,), dtype=numpy.uint8 )
+        self.views = {}
+        self.extents = {}
+        for field in layout.fields:
+            self.views[ field.name ] = numpy.ndarray(
+                field.shape, dtype=TYPES[ field.type ][0], buffer=self.data,
+                offset=field.offset, strides=field.strides,
+            )
+            self.extents[ field.name ] = (field.offset, field.offset+field.extent)
+        self.dirtyStart, self.dirtyStop = 0, layout.size
+        # where the current contents were last uploaded
+        self.offset = self.frame = None
+
+    @property
+    def dirty( self ):
+        return self.dirtyStop > self.dirtyStart
+
+    def __getitem__( self, name ):
+        """Retrieve member name's view (call touch() after writing through it)"""
+        return self.views[ name ]
+
+    def __setitem__( self, name, value ):
+        """Assign to member name, marking its bytes dirty"""
+        self.views[ name ][...] = value
+        self.touch( name )
+
+    def touch( self, name=None ):
+        """Mark member name (default the whole block) as changed"""
+        start, stop = self.extents[ name ] if name is not None else (0, self.layout.size)
+        if self.dirtyStop > self.dirtyStart:
+            start, stop = min( start, self.dirtyStart ), max( stop, self.dirtyStop )
+        self.dirtyStart, self.dirtyStop = start, stop
+
+    def clean( self ):
+        self.dirtyStart = self.dirtyStop = 0
+
+class UniformBufferManager( object ):
+    """GL storage and binding for a set of UniformBlocks
+
+    Attributes of note:
+
+        target -- GL_UNIFORM_BUFFER or GL_SHADER_STORAGE_BUFFER
+        blocks -- the managed UniformBlocks
+        streaming -- whether blocks are sub-allocated from a per-frame ring
+        frame -- number of upload()s performed
+    """
+    SIZE = 1 << 20
+    def __init__( self, size=SIZE, target=GL_3_1.GL_UNIFORM_BUFFER, streaming=True, regions=3 ):
+        self.size = size
+        self.target = target
+        self.streaming = streaming
+        self.regions = regions
+        self.blocks = []
+        self.frame = -1
+        self.ring = None
+        self.buffer = None
+        self.head = 0
+        self.alignment = None
+        self.bound = {}
+
+    def _offsetAlignment( self ):
+        if self.alignment is None:
+            current = limits.currentLimits()
+            if self.target == GL_4_3.GL_SHADER_STORAGE_BUFFER:
+                alignment = current.shader_storage_buffer_offset_alignment
+            else:
+                alignment = current.uniform_buffer_offset_alignment
+            self.alignment = max( alignment, 16 )
+        return self.alignment
+
+    def block( self, layout, binding ):
+        """Create a UniformBlock for layout attached at binding"""
+        block = UniformBlock( layout, binding )
+        if not self.streaming:
+            alignment = self._offsetAlignment()
+            start = _roundUp( self.head, alignment )
+            if start + layout.size > self.size:
+                raise ValueError( """Block of %s bytes exceeds free space in %s byte buffer"""%(
+                    layout.size, self.size,
+                ))
+            self.head = start + layout.size
+            block.offset = start
+        self.blocks.append( block )
+        return block
+
+    def remove( self, block ):
+        """Stop managing block (streaming slots are reclaimed per frame)"""
+        self.blocks.remove( block )
+
+    def _reusable( self, block ):
+        """Whether block's last ring allocation is still intact this frame"""
+        if block.frame is None:
+            return False
+        if self.ring.persistent:
+            # regions are only rewritten `regions` frames later
+            return self.frame - block.frame < self.regions
+        # the fallback path orphans the whole buffer when the ring wraps
+        return self.frame // self.regions == block.frame // self.regions
+
+    def upload( self ):
+        """Upload changed blocks and (re)bind every block's range
+
+        Call once per frame, before drawing.
+        """
+        self.frame += 1
+        if self.streaming:
+            if self.ring is None:
+                # every region must start on an aligned offset too
+                alignment = self._offsetAlignment()
+                self.ring = streamingbuffers.StreamingBuffer(
+                    self.size // self.regions // alignment * alignment,
+                    target=self.target, regions=self.regions, alignment=alignment,
+                )
+            self.ring.begin_frame()
+            for block in self.blocks:
+                if block.dirty or not self._reusable( block ):
+                    view, block.offset = self.ring.allocate( block.layout.size, 'B' )
+                    view[:] = block.data
+                    block.frame = self.frame
+                    block.clean()
+            self.ring.flush()
+            buffer = self.ring.buffer
+        else:
+            if self.buffer is None:
+                identifier = _types.GLuint( 0 )
+                GL_1_5.glGenBuffers( 1, ctypes.byref( identifier ))
+                self.buffer = identifier.value
+                GL_1_5.glBindBuffer( self.target, self.buffer )
+                GL_1_5.glBufferData( self.target, self.size, None, GL_1_5.GL_DYNAMIC_DRAW )
+            else:
+                GL_1_5.glBindBuffer( self.target, self.buffer )
+            for block in self.blocks:
+                if block.dirty:
+                    start, stop = block.dirtyStart, block.dirtyStop
+                    GL_1_5.glBufferSubData(
+                        self.target, block.offset+start, stop-start, block.data[start:stop],
+                    )
+                    block.clean()
+            buffer = self.buffer
+        bound = self.bound
+        for block in self.blocks:
+            key = (buffer, block.offset, block.layout.size)
+            if bound.get( block.binding ) != key:
+                GL_3_0.glBindBufferRange(
+                    self.target, block.binding, buffer, block.offset, block.layout.size,
+                )
+                bound[ block.binding ] = key
+
+    def invalidate( self ):
+        """Forget the remembered bindings, e.g. after other code rebinds"""
+        self.bound.clear()
+
+    def delete( self ):
+        """Release the GL buffer(s)"""
+        if self.ring is not None:
+            self.ring.delete()
+            self.ring = None
+        if self.buffer is not None:
+            GL_1_5.glDeleteBuffers( 1, ctypes.byref( _types.GLuint( self.buffer )))
+            self.buffer = None
+        self.bound.clear()
+        for block in self.blocks:
+            block.frame = None
+            block.touch()
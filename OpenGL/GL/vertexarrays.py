@@ -0,0 +1,274 @@
+"""Vertex array objects cached by vertex-format signature
+
+The gl*Pointer/glVertexAttribPointer wrappers re-specify (and convert,
+and store in contextdata) the full attribute state on every draw.  A
+VertexFormat instead describes the attributes declaratively, and
+vertexArray() creates one vertex array object per distinct format (per
+context), so that steady-state drawing costs a glBindVertexArray plus,
+when a buffer actually changed, a glBindVertexBuffer.
+
+With GL 4.3 / ARB_vertex_attrib_binding the format is specified once
+with glVertexAttribFormat and buffers are attached per binding point,
+so one VAO serves every set of buffers sharing the format.  Without it
+the buffer is part of the glVertexAttribPointer state, so VAOs are
+cached per (format, buffers, offsets) instead.
+
+Usage:
+
+    format = vertexarrays.VertexFormat( [
+        vertexarrays.VertexAttribute( 0, 3, GL_FLOAT ),
+        vertexarrays.VertexAttribute( 1, 4, GL_UNSIGNED_BYTE, normalized=True, offset=12 ),
+    ], strides=(16,) )
+    ...
+    vao = vertexarrays.vertexArray( format )
+    vao.bind( (vertexBuffer,), elements=indexBuffer )
+    glDrawElements( GL_TRIANGLES, count, GL_UNSIGNED_INT, None )
+"""
+import ctypes
+from collections import namedtuple
+from OpenGL import contextdata
+from OpenGL.raw.GL.VERSION import GL_1_1, GL_1_5, GL_2_0, GL_3_0, GL_3_3, GL_4_3
+from OpenGL.raw.GL import _types
+
+__all__ = (
+    'VertexAttribute',
+    'VertexFormat',
+    'VertexArray',
+    'vertexArray',
+    'invalidate',
+    'clearCache',
+)
+
+CONTEXT_KEY = 'OpenGL.GL.vertexarrays'
+
+INTEGER_TYPES = frozenset( (
+    GL_1_1.GL_BYTE, GL_1_1.GL_UNSIGNED_BYTE, GL_1_1.GL_SHORT,
+    GL_1_1.GL_UNSIGNED_SHORT, GL_1_1.GL_INT, GL_1_1.GL_UNSIGNED_INT,
+) )
+
+_VertexAttribute = namedtuple( 'VertexAttribute', (
+    'location','components','type','normalized','offset','divisor','binding','integer',
+))
+def VertexAttribute(
+    location, components, type=GL_1_1.GL_FLOAT, normalized=False, offset=0,
+    divisor=0, binding=0, integer=False,
+):
+    """Describe one vertex attribute
+
+    location -- attribute location in the program
+    components -- 1 to 4
+    type -- GL_FLOAT, GL_UNSIGNED_BYTE...
+    normalized -- map integer types to [0,1]/[-1,1] floats
+    offset -- byte offset of the attribute within its binding's vertex
+    divisor -- 0 for per-vertex data, N to advance once per N instances
+    binding -- index of the buffer (binding point) the attribute reads
+    integer -- pass integer types to int/uint shader inputs unconverted
+        (glVertexAttribIFormat/glVertexAttribIPointer)
+    """
+    if integer and type not in INTEGER_TYPES:
+        raise ValueError( """Integer attributes require an integer type""" )
+    return _VertexAttribute(
+        location, components, type, bool(normalized), offset, divisor, binding, bool(integer),
+    )
+
+class VertexFormat( object ):
+    """Hashable description of a complete vertex layout
+
+    Attributes of note:
+
+        attributes -- tuple of VertexAttribute
+        strides -- byte stride of each binding point (index = binding)
+        divisors -- instance divisor of each binding point
+        signature -- hashable key identifying the format
+    """
+    def __init__( self, attributes, strides ):
+        self.attributes = tuple( sorted( attributes, key=lambda a: a.location ))
+        self.strides = tuple( strides )
+        divisors = [None] * len( self.strides )
+        for attribute in self.attributes:
+            if attribute.binding >= len( divisors ):
+                raise ValueError( """Attribute %s uses binding %s, only %s strides given"""%(
+                    attribute.location, attribute.binding, len(divisors),
+                ))
+            current = divisors[ attribute.binding ]
+            if current is not None and current != attribute.divisor:
+                raise ValueError( """Attributes of binding %s have different divisors"""%(
+                    attribute.binding,
+                ))
+            divisors[ attribute.binding ] = attribute.divisor
+        self.divisors = tuple( divisor or 0 for divisor in divisors )
+        self.signature = (self.attributes, self.strides)
+
+    def __hash__( self ):
+        return hash( self.signature )
+    def __eq__( self, other ):
+        return isinstance( other, VertexFormat ) and self.signature == other.signature
+    def __ne__( self, other ):
+        return not self == other
+    def __repr__( self ):
+        return '%s(%r, strides=%r)'%( self.__class__.__name__, list(self.attributes), self.strides )
+
+def _bufferId( buffer ):
+    return 0 if buffer is None else int( buffer )
+
+class VertexArray( object ):
+    """A vertex array object configured for one VertexFormat
+
+    Attributes of note:
+
+        format -- the VertexFormat
+        vao -- the GL vertex array object
+        separate -- whether format and buffers are specified separately
+            (ARB_vertex_attrib_binding), otherwise the VAO is fixed to
+            the buffers it was created with
+        buffers -- (buffer,offset) currently attached to each binding
+        elements -- element array buffer currently attached
+    """
+    def __init__( self, format, separate=None, buffers=None, offsets=None ):
+        if separate is None:
+            separate = bool( GL_4_3.glVertexAttribFormat )
+        self.format = format
+        self.separate = separate
+        self.buffers = [None] * len( format.strides )
+        self.elements = None
+        vao = _types.GLuint( 0 )
+        GL_3_0.glGenVertexArrays( 1, ctypes.byref( vao ))
+        self.vao = vao.value
+        GL_3_0.glBindVertexArray( self.vao )
+        if separate:
+            self._specifyFormat()
+        else:
+            self._specifyPointers( buffers, offsets or (0,)*len(format.strides) )
+
+    def _specifyFormat( self ):
+        for attribute in self.format.attributes:
+            GL_2_0.glEnableVertexAttribArray( attribute.location )
+            if attribute.integer:
+                GL_4_3.glVertexAttribIFormat(
+                    attribute.location, attribute.components, attribute.type, attribute.offset,
+                )
+            else:
+                GL_4_3.glVertexAttribFormat(
+                    attribute.location, attribute.components, attribute.type,
+                    attribute.normalized, attribute.offset,
+                )
+            GL_4_3.glVertexAttribBinding( attribute.location, attribute.binding )
+        for binding,divisor in enumerate( self.format.divisors ):
+            GL_4_3.glVertexBindingDivisor( binding, divisor )
+
+    def _specifyPointers( self, buffers, offsets ):
+        format = self.format
+        for attribute in format.attributes:
+            buffer = _bufferId( buffers[ attribute.binding ] )
+            GL_1_5.glBindBuffer( GL_1_5.GL_ARRAY_BUFFER, buffer )
+            GL_2_0.glEnableVertexAttribArray( attribute.location )
+            pointer = ctypes.c_void_p( offsets[ attribute.binding ] + attribute.offset )
+            stride = format.strides[ attribute.binding ]
+            if attribute.integer:
+                GL_3_0.glVertexAttribIPointer(
+                    attribute.location, attribute.components, attribute.type, stride, pointer,
+                )
+            else:
+                GL_2_0.glVertexAttribPointer(
+                    attribute.location, attribute.components, attribute.type,
+                    attribute.normalized, stride, pointer,
+                )
+            if attribute.divisor:
+                GL_3_3.glVertexAttribDivisor( attribute.location, attribute.divisor )
+        for binding,buffer in enumerate( buffers ):
+            self.buffers[ binding ] = (_bufferId( buffer ), offsets[ binding ])
+        GL_1_5.glBindBuffer( GL_1_5.GL_ARRAY_BUFFER, 0 )
+
+    def bind( self, buffers=(), offsets=None, elements=None ):
+        """Bind the VAO, attaching buffers where they have changed
+
+        buffers -- buffer (id, or object with __int__ such as a VBO or
+            StreamingBuffer) per binding point
+        offsets -- byte offset of each binding's first vertex
+        elements -- element array buffer, None leaves it unchanged
+
+        For non-separate VAOs buffers/offsets must be those the VAO was
+        created with (vertexArray() takes care of this).  Attachments are
+        tracked here, so buffers bound to the VAO behind its back (e.g.
+        glBindBuffer( GL_ELEMENT_ARRAY_BUFFER ) while it is bound) are
+        not noticed.
+        """
+        GL_3_0.glBindVertexArray( self.vao )
+        if self.separate:
+            strides = self.format.strides
+            for binding,buffer in enumerate( buffers ):
+                current = (_bufferId( buffer ), offsets[ binding ] if offsets else 0)
+                if self.buffers[ binding ] != current:
+                    GL_4_3.glBindVertexBuffer( binding, current[0], current[1], strides[ binding ] )
+                    self.buffers[ binding ] = current
+        if elements is not None:
+            elements = _bufferId( elements )
+            if elements != self.elements:
+                GL_1_5.glBindBuffer( GL_1_5.GL_ELEMENT_ARRAY_BUFFER, elements )
+                self.elements = elements
+        return self
+
+    def unbind( self ):
+        GL_3_0.glBindVertexArray( 0 )
+
+    def invalidate( self ):
+        """Forget the tracked attachments, the next bind() re-attaches"""
+        if self.separate:
+            self.buffers = [None] * len( self.format.strides )
+        self.elements = None
+
+    def __enter__( self ):
+        GL_3_0.glBindVertexArray( self.vao )
+        return self
+    def __exit__( self, *args ):
+        GL_3_0.glBindVertexArray( 0 )
+
+    def delete( self ):
+        """Release the GL vertex array object"""
+        if self.vao is not None:
+            GL_3_0.glDeleteVertexArrays( 1, ctypes.byref( _types.GLuint( self.vao )))
+            self.vao = None
+
+def vertexArray( format, buffers=(), offsets=None, elements=None, context=None ):
+    """Retrieve the (cached) VertexArray for format, bound with buffers
+
+    Creates the VAO on first use of the format (or, without
+    ARB_vertex_attrib_binding, of the format/buffers/offsets
+    combination) in the current context.
+    """
+    cache = contextdata.getValue( CONTEXT_KEY, context )
+    if cache is None:
+        cache = {}
+        contextdata.setValue( CONTEXT_KEY, cache, context )
+    key = format.signature
+    vao = cache.get( key )
+    if vao is None and not bool( GL_4_3.glVertexAttribFormat ):
+        key = (format.signature, tuple( _bufferId( buffer ) for buffer in buffers ), tuple( offsets or () ))
+        vao = cache.get( key )
+        if vao is None:
+            vao = cache[ key ] = VertexArray(
+                format, separate=False, buffers=buffers,
+                offsets=offsets or (0,)*len(format.strides),
+            )
+    elif vao is None:
+        vao = cache[ key ] = VertexArray( format, separate=True )
+    return vao.bind( buffers, offsets, elements )
+
+def invalidate( context=None ):
+    """Forget the tracked attachments of every cached VertexArray
+
+    Call after deleting buffers which may be attached, as the GL may
+    hand out their names again for new buffers.
+    """
+    cache = contextdata.getValue( CONTEXT_KEY, context )
+    if cache:
+        for vao in cache.values():
+            vao.invalidate()
+
+def clearCache( context=None ):
+    """Delete every cached VertexArray of context (default current)"""
+    cache = contextdata.getValue( CONTEXT_KEY, context )
+    if cache:
+        for vao in cache.values():
+            vao.delete()
+        cache.clear()
@@ -0,0 +1,347 @@
+"""Pre-baked meshes for GLU quadric and NURBS primitives
+
+gluSphere, gluCylinder, gluDisk and gluNurbsSurface re-evaluate their
+geometry inside GLU (and, for NURBS, re-convert knots and control points
+through GLfloatArray.asArray) every time they are drawn.  The functions
+here evaluate the same primitives once with numpy at a requested
+tessellation and return a Mesh holding VBO-ready arrays:
+
+    vertices -- (N,3) float32 positions
+    normals -- (N,3) float32 unit normals
+    texcoords -- (N,2) float32 texture coordinates
+    indices -- (M,) uint32 element indices
+
+Results are cached keyed by the primitive's parameters, so a static
+shape costs one evaluation per process, and Mesh.draw() issues a single
+glDrawElements from buffer objects.
+
+Orientation follows GLU: spheres and cylinders are built around the
+z axis (cylinders from z=0 to z=height), disks lie in the z=0 plane
+facing +z, and partial-disk angles are in degrees clockwise from +y.
+
+Usage:
+
+    dome = meshes.sphere( 200.0, 48, 24 )
+    ring = meshes.disk( 148.0, 150.0, 96, 1 )
+    ...
+    dome.draw()
+    ring.draw()
+"""
+from OpenGL.raw import GLU as _simple
+from OpenGL import error
+
+__all__ = (
+    'Mesh',
+    'sphere',
+    'cylinder',
+    'disk',
+    'partialDisk',
+    'nurbsCurve',
+    'nurbsSurface',
+    'clearCache',
+)
+
+MESHES = {
+    # mapping from (primitive,parameters...) to Mesh
+}
+
+def clearCache( ):
+    """Discard all cached meshes (their GL buffers are released lazily)"""
+    MESHES.clear()
+
+def _cached( key, builder, *args ):
+    mesh = MESHES.get( key )
+    if mesh is None:
+        MESHES[ key ] = mesh = builder( *args )
+    return mesh
+
+class Mesh( object ):
+    """Indexed triangle (or line) mesh with lazily-created buffer objects
+
+    Attributes of note:
+
+        mode -- primitive type for glDrawElements (GL_TRIANGLES for
+            surfaces, GL_LINE_STRIP for curves)
+        interleaved -- (N,8) float32 array of position, normal, texcoord
+            as uploaded to the vertex buffer
+    """
+    STRIDE = 8*4
+    def __init__( self, vertices, normals, texcoords, indices, mode=None ):
+        import numpy
+        from OpenGL.raw.GL.VERSION import GL_1_1
+        self.vertices = numpy.ascontiguousarray( vertices, dtype=numpy.float32 )
+        self.normals = numpy.ascontiguousarray( normals, dtype=numpy.float32 )
+        self.texcoords = numpy.ascontiguousarray( texcoords, dtype=numpy.float32 )
+        self.indices = numpy.ascontiguousarray( indices, dtype=numpy.uint32 ).reshape( (-1,) )
+        self.mode = GL_1_1.GL_TRIANGLES if mode is None else mode
+        self.interleaved = numpy.hstack( (self.vertices,self.normals,self.texcoords) )
+        self.vbo = self.ibo = None
+
+    def __len__( self ):
+        """Number of indices drawn"""
+        return len( self.indices )
+
+    def buffers( self ):
+        """Retrieve (creating if necessary) the (vertex,index) VBO pair"""
+        if self.vbo is None:
+            from OpenGL.arrays import vbo
+            from OpenGL.raw.GL.VERSION import GL_1_5
+            self.vbo = vbo.VBO( self.interleaved, usage=GL_1_5.GL_STATIC_DRAW )
+            self.ibo = vbo.VBO(
+                self.indices, usage=GL_1_5.GL_STATIC_DRAW,
+                target=GL_1_5.GL_ELEMENT_ARRAY_BUFFER,
+            )
+        return self.vbo, self.ibo
+
+    def draw( self, normals=True, texcoords=False ):
+        """Draw the mesh with client-array pointers and one glDrawElements
+
+        Uses the legacy (fixed-function) vertex/normal/texcoord arrays,
+        as a drop-in for the GLU primitive; shader code should bind
+        buffers() to its own attribute locations instead.
+        """
+        from OpenGL import GL
+        vertexBuffer, indexBuffer = self.buffers()
+        with vertexBuffer:
+            with indexBuffer:
+                GL.glEnableClientState( GL.GL_VERTEX_ARRAY )
+                GL.glVertexPointer( 3, GL.GL_FLOAT, self.STRIDE, vertexBuffer )
+                if normals:
+                    GL.glEnableClientState( GL.GL_NORMAL_ARRAY )
+                    GL.glNormalPointer( GL.GL_FLOAT, self.STRIDE, vertexBuffer+12 )
+                if texcoords:
+                    GL.glEnableClientState( GL.GL_TEXTURE_COORD_ARRAY )
+                    GL.glTexCoordPointer( 2, GL.GL_FLOAT, self.STRIDE, vertexBuffer+24 )
+                try:
+                    GL.glDrawElements( self.mode, len(self.indices), GL.GL_UNSIGNED_INT, indexBuffer )
+                finally:
+                    GL.glDisableClientState( GL.GL_VERTEX_ARRAY )
+                    if normals:
+                        GL.glDisableClientState( GL.GL_NORMAL_ARRAY )
+                    if texcoords:
+                        GL.glDisableClientState( GL.GL_TEXTURE_COORD_ARRAY )
+
+    def delete( self ):
+        """Release the buffer objects"""
+        for buffer in (self.vbo,self.ibo):
+            if buffer is not None:
+                buffer.delete()
+        self.vbo = self.ibo = None
+
+def _gridIndices( rows, columns ):
+    """Triangle indices for a (rows+1)x(columns+1) vertex grid
+
+    Triangles are counter-clockwise when row index increases "up" and
+    column index increases to the "right" as seen from the front.
+    """
+    import numpy
+    row, column = numpy.meshgrid(
+        numpy.arange( rows, dtype=numpy.uint32 ),
+        numpy.arange( columns, dtype=numpy.uint32 ),
+        indexing='ij',
+    )
+    a = row*(columns+1) + column
+    b = a + 1
+    c = a + (columns+1)
+    d = c + 1
+    return numpy.stack( (a,b,d, a,d,c), axis=-1 ).reshape( (-1,) )
+
+def _sphere( radius, slices, stacks ):
+    import numpy
+    phi = numpy.linspace( numpy.pi, 0.0, stacks+1 )[:,None] # bottom to top
+    theta = numpy.linspace( 0.0, 2*numpy.pi, slices+1 )[None,:]
+    normals = numpy.stack( numpy.broadcast_arrays(
+        numpy.sin(phi)*numpy.cos(theta),
+        numpy.sin(phi)*numpy.sin(theta),
+        numpy.cos(phi),
+    ), axis=-1 ).reshape( (-1,3) )
+    s,t = numpy.meshgrid(
+        numpy.linspace( 0.0, 1.0, slices+1 ),
+        numpy.linspace( 0.0, 1.0, stacks+1 ),
+    )
+    texcoords = numpy.stack( (s.ravel(),t.ravel()), axis=-1 )
+    return Mesh( normals*radius, normals, texcoords, _gridIndices( stacks, slices ))
+def sphere( radius, slices, stacks ):
+    """Baked equivalent of gluSphere( quad, radius, slices, stacks )"""
+    return _cached( ('sphere',float(radius),int(slices),int(stacks)), _sphere, radius, slices, stacks )
+
+def _cylinder( base, top, height, slices, stacks ):
+    import numpy
+    z = numpy.linspace( 0.0, height, stacks+1 )[:,None]
+    radius = base + (top-base)*(z/height if height else 0*z)
+    theta = numpy.linspace( 0.0, 2*numpy.pi, slices+1 )[None,:]
+    x, y = numpy.cos(theta), numpy.sin(theta)
+    vertices = numpy.stack( numpy.broadcast_arrays(
+        radius*x, radius*y, z,
+    ), axis=-1 ).reshape( (-1,3) )
+    slope = (base-top)/height if height else 0.0
+    normals = numpy.stack( numpy.broadcast_arrays(
+        x + 0*z, y + 0*z, slope + 0*x*z,
+    ), axis=-1 ).reshape( (-1,3) )
+    normals /= numpy.linalg.norm( normals, axis=1 )[:,None]
+    s,t = numpy.meshgrid(
+        numpy.linspace( 0.0, 1.0, slices+1 ),
+        numpy.linspace( 0.0, 1.0, stacks+1 ),
+    )
+    texcoords = numpy.stack( (s.ravel(),t.ravel()), axis=-1 )
+    return Mesh( vertices, normals, texcoords, _gridIndices( stacks, slices ))
+def cylinder( base, top, height, slices, stacks ):
+    """Baked equivalent of gluCylinder( quad, base, top, height, slices, stacks )"""
+    return _cached(
+        ('cylinder',float(base),float(top),float(height),int(slices),int(stacks)),
+        _cylinder, base, top, height, slices, stacks,
+    )
+
+def _partialDisk( inner, outer, slices, loops, start, sweep ):
+    import numpy
+    radius = numpy.linspace( inner, outer, loops+1 )[:,None]
+    # GLU angles run clockwise from +y, with radius as the grid's rows
+    # that keeps _gridIndices counter-clockwise seen from +z
+    angle = numpy.radians( start + numpy.linspace( 0.0, sweep, slices+1 ))[None,:]
+    x = radius*numpy.sin( angle )
+    y = radius*numpy.cos( angle )
+    vertices = numpy.stack( numpy.broadcast_arrays( x, y, 0.0 ), axis=-1 ).reshape( (-1,3) )
+    normals = numpy.zeros( vertices.shape )
+    normals[:,2] = 1.0
+    scale = 2.0*outer if outer else 1.0
+    texcoords = vertices[:,:2]/scale + 0.5
+    return Mesh( vertices, normals, texcoords, _gridIndices( loops, slices ))
+def partialDisk( inner, outer, slices, loops, start, sweep ):
+    """Baked equivalent of gluPartialDisk( quad, inner, outer, slices, loops, start, sweep )"""
+    return _cached(
+        ('partialDisk',float(inner),float(outer),int(slices),int(loops),float(start),float(sweep)),
+        _partialDisk, inner, outer, slices, loops, start, sweep,
+    )
+def disk( inner, outer, slices, loops ):
+    """Baked equivalent of gluDisk( quad, inner, outer, slices, loops )"""
+    return partialDisk( inner, outer, slices, loops, 0.0, 360.0 )
+
+def _basis( knots, order, samples ):
+    """Evaluate all B-spline basis functions at samples (Cox-de Boor)
+
+    returns (len(samples),len(knots)-order) array
+    """
+    import numpy
+    knots = numpy.asarray( knots, dtype=numpy.float64 )
+    u = numpy.asarray( samples, dtype=numpy.float64 )[:,None]
+    left, right = knots[:-1][None,:], knots[1:][None,:]
+    basis = ((u >= left) & (u < right)).astype( numpy.float64 )
+    # the closing parameter value belongs to the last non-empty span
+    last = numpy.nonzero( knots[1:] > knots[:-1] )[0][-1]
+    basis[ u[:,0] >= knots[last+1], last ] = 1.0
+    for degree in range( 1, order ):
+        count = len(knots) - degree - 1
+        a = knots[:count][None,:]
+        b = knots[degree:degree+count][None,:]
+        c = knots[1:1+count][None,:]
+        d = knots[degree+1:degree+1+count][None,:]
+        with numpy.errstate( divide='ignore', invalid='ignore' ):
+            first = numpy.where( b > a, (u-a)/(b-a), 0.0 ) * basis[:,:count]
+            second = numpy.where( d > c, (d-u)/(d-c), 0.0 ) * basis[:,1:count+1]
+        basis = first + second
+    return basis
+
+def _domain( knots, order ):
+    return knots[order-1], knots[len(knots)-order]
+
+def _project( points ):
+    """Divide homogeneous (x,y,z,w) points down to (x,y,z)"""
+    if points.shape[-1] == 4:
+        return points[...,:3] / points[...,3:]
+    return points
+
+def _nurbsCurve( knots, control, samples ):
+    import numpy
+    knots = numpy.asarray( knots, dtype=numpy.float64 )
+    control = numpy.asarray( control, dtype=numpy.float64 )
+    order = len(knots) - len(control)
+    if order < 1:
+        raise error.GLUError( """Need more knots than control points""" )
+    start, stop = _domain( knots, order )
+    u = numpy.linspace( start, stop, samples )
+    # homogeneous (N,4) points are already weighted (wx,wy,wz,w), as for
+    # GL_MAP1_VERTEX_4, so blending then dividing by w is the rational curve
+    points = _project( _basis( knots, order, u ).dot( control ))
+    if points.shape[1] == 2:
+        points = numpy.hstack( (points,numpy.zeros( (len(points),1) )))
+    tangents = numpy.gradient( points, axis=0 )
+    length = numpy.linalg.norm( tangents, axis=1 )[:,None]
+    length[ length == 0 ] = 1.0
+    texcoords = numpy.zeros( (len(points),2) )
+    texcoords[:,0] = numpy.linspace( 0.0, 1.0, len(points) )
+    from OpenGL.raw.GL.VERSION import GL_1_1
+    return Mesh(
+        points, tangents/length, texcoords,
+        numpy.arange( len(points), dtype=numpy.uint32 ),
+        mode=GL_1_1.GL_LINE_STRIP,
+    )
+def nurbsCurve( knots, control, samples=64 ):
+    """Baked evaluation of a NURBS curve as a GL_LINE_STRIP mesh
+
+    knots -- knot vector, order is len(knots)-len(control) as for
+        gluNurbsCurve
+    control -- (N,2), (N,3) or homogeneous (N,4) control points
+    samples -- number of evaluated points
+
+    The mesh's "normals" are the unit tangents of the curve.
+    """
+    import numpy
+    knots = numpy.asarray( knots, dtype=numpy.float64 )
+    control = numpy.asarray( control, dtype=numpy.float64 )
+    return _cached(
+        ('nurbsCurve',knots.tobytes(),control.shape,control.tobytes(),int(samples)),
+        _nurbsCurve, knots, control, samples,
+    )
+
+def _nurbsSurface( sKnots, tKnots, control, sSamples, tSamples ):
+    import numpy
+    sKnots = numpy.asarray( sKnots, dtype=numpy.float64 )
+    tKnots = numpy.asarray( tKnots, dtype=numpy.float64 )
+    control = numpy.asarray( control, dtype=numpy.float64 )
+    if control.ndim != 3:
+        raise error.GLUError( """Need a 3-dimensional control array""" )
+    length, width, step = control.shape
+    sOrder = len(sKnots) - length
+    tOrder = len(tKnots) - width
+    if sOrder < 1 or tOrder < 1:
+        raise error.GLUError( """Invalid NURB structure""" )
+    sStart, sStop = _domain( sKnots, sOrder )
+    tStart, tStop = _domain( tKnots, tOrder )
+    sBasis = _basis( sKnots, sOrder, numpy.linspace( sStart, sStop, sSamples ))
+    tBasis = _basis( tKnots, tOrder, numpy.linspace( tStart, tStop, tSamples ))
+    points = _project( numpy.einsum( 'is,jt,std->ijd', sBasis, tBasis, control ))
+    du = numpy.gradient( points, axis=0 )
+    dv = numpy.gradient( points, axis=1 )
+    normals = numpy.cross( du, dv ).reshape( (-1,3) )
+    length = numpy.linalg.norm( normals, axis=1 )[:,None]
+    length[ length == 0 ] = 1.0
+    s,t = numpy.meshgrid(
+        numpy.linspace( 0.0, 1.0, tSamples ),
+        numpy.linspace( 0.0, 1.0, sSamples ),
+    )
+    texcoords = numpy.stack( (t.ravel(),s.ravel()), axis=-1 )
+    # rows run along s and columns along t, so s x t faces the front
+    indices = _gridIndices( sSamples-1, tSamples-1 )
+    indices = indices.reshape( (-1,3) )[:,::-1].reshape( (-1,) )
+    return Mesh( points.reshape( (-1,3) ), normals/length, texcoords, indices )
+def nurbsSurface( sKnots, tKnots, control, sSamples=32, tSamples=32 ):
+    """Baked evaluation of gluNurbsSurface( nurb, sKnots, tKnots, control, GL_MAP2_VERTEX_3/4 )
+
+    sKnots, tKnots -- knot vectors, orders are inferred from the knot and
+        control counts as for gluNurbsSurface
+    control -- (S,T,3) or homogeneous (S,T,4) control points
+    sSamples, tSamples -- evaluation grid size
+
+    Normals point along dP/ds x dP/dt, as with GL_AUTO_NORMAL.
+    """
+    import numpy
+    sKnots = numpy.asarray( sKnots, dtype=numpy.float64 )
+    tKnots = numpy.asarray( tKnots, dtype=numpy.float64 )
+    control = numpy.asarray( control, dtype=numpy.float64 )
+    return _cached(
+        (
+            'nurbsSurface',sKnots.tobytes(),tKnots.tobytes(),
+            control.shape,control.tobytes(),int(sSamples),int(tSamples),
+        ),
+        _nurbsSurface, sKnots, tKnots, control, int(sSamples), int(tSamples),
+    )
@@ -93,8 +93,82 @@ def gluUnProject4(
         raise ValueError( """Projection failed!""" )
     return objX.value, objY.value, objZ.value, objW.value
 
+def _matrices( model, proj, view ):
+    """Fetch (once) and normalise the projection parameters for the array forms"""
+    import numpy
+    if model is None:
+        model = GL.glGetDoublev( GL.GL_MODELVIEW_MATRIX )
+    if proj is None:
+        proj = GL.glGetDoublev( GL.GL_PROJECTION_MATRIX )
+    if view is None:
+        view = GL.glGetIntegerv( GL.GL_VIEWPORT )
+    # GL matrices are column-major, so as (4,4) row-major arrays they
+    # are the transpose of the mathematical matrix and points multiply
+    # from the left as row vectors
+    model = numpy.asarray( model, dtype=numpy.float64 ).reshape( (4,4) )
+    proj = numpy.asarray( proj, dtype=numpy.float64 ).reshape( (4,4) )
+    view = numpy.asarray( view, dtype=numpy.float64 ).reshape( (4,) )
+    return numpy.dot( model, proj ), view
+
+def _homogeneous( points ):
+    import numpy
+    points = numpy.asarray( points, dtype=numpy.float64 )
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError( """Expected an (N,3) array of points, got shape %s"""%( points.shape, ))
+    result = numpy.ones( (len(points),4), dtype=numpy.float64 )
+    result[:,:3] = points
+    return result
+
+def gluProjectArray( points, model=None, proj=None, view=None ):
+    """Vectorised gluProject over an (N,3) array of object coordinates
+
+    The model, projection and viewing matrices are fetched once (if not
+    provided) and all points are transformed with a single matrix
+    multiply instead of one GLU call per point.
+
+    returns (N,3) array of (winX,winY,winZ) doubles, rows for points
+    which GLU would reject (clip w == 0) are NaN
+    """
+    import numpy
+    matrix, view = _matrices( model, proj, view )
+    clip = numpy.dot( _homogeneous( points ), matrix )
+    w = clip[:,3:]
+    with numpy.errstate( divide='ignore', invalid='ignore' ):
+        ndc = numpy.where( w != 0.0, clip[:,:3]/w, numpy.nan )
+    ndc = ndc*0.5 + 0.5
+    ndc[:,0] = view[0] + ndc[:,0]*view[2]
+    ndc[:,1] = view[1] + ndc[:,1]*view[3]
+    return ndc
+
+def gluUnProjectArray( points, model=None, proj=None, view=None ):
+    """Vectorised gluUnProject over an (N,3) array of window coordinates
+
+    The combined matrix is inverted once for the whole array.
+
+    returns (N,3) array of (objX,objY,objZ) doubles, rows which GLU
+    would reject (object w == 0) are NaN
+
+    raises ValueError if the combined matrix is singular
+    """
+    import numpy
+    matrix, view = _matrices( model, proj, view )
+    try:
+        inverse = numpy.linalg.inv( matrix )
+    except numpy.linalg.LinAlgError:
+        raise ValueError( """Projection failed!""" )
+    ndc = _homogeneous( points )
+    ndc[:,0] = (ndc[:,0] - view[0])/view[2]
+    ndc[:,1] = (ndc[:,1] - view[1])/view[3]
+    ndc[:,:3] = ndc[:,:3]*2.0 - 1.0
+    result = numpy.dot( ndc, inverse )
+    w = result[:,3:]
+    with numpy.errstate( divide='ignore', invalid='ignore' ):
+        return numpy.where( w != 0.0, result[:,:3]/w, numpy.nan )
+
 __all__ = (
     'gluProject',
     'gluUnProject',
     'gluUnProject4',
+    'gluProjectArray',
+    'gluUnProjectArray',
 )
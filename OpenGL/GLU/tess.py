@@ -258,6 +258,178 @@ gluTessVertexBase = wrapper.wrapper(_simple.gluTessVertex).setInputArraySize(
     3,
 )
 
+# pointer-level gluTessVertex for the batch path, locations are addresses
+# into a caller-held contiguous double array (bare ctypes prototype, as
+# createBaseFunction would convert void pointers to array arguments)
+_gluTessVertexAddress = GLUtesselator.FUNCTION_TYPE(
+    None, ctypes.POINTER(GLUtesselator), ctypes.c_void_p, ctypes.c_void_p
+)(('gluTessVertex', GLU))
+
+
+class TessellationCache(object):
+    """LRU cache of tessellate() results keyed by contour content
+
+    Keys are a hash of the vertex/offset bytes plus the winding rule and
+    normal, so static shapes are tessellated once however often they are
+    submitted.  Cached arrays are marked read-only.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        from collections import OrderedDict
+
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def key(self, points, offsets, winding, normal):
+        import hashlib
+
+        digest = hashlib.sha1(points.tobytes())
+        digest.update(offsets.tobytes())
+        digest.update(repr((points.shape, int(winding), normal)).encode('ascii'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+    def store(self, key, result):
+        for array in result:
+            array.setflags(write=False)
+        self.entries[key] = result
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        self.entries.clear()
+
+
+CACHE = TessellationCache()
+
+
+def tessellate(
+    points,
+    offsets=None,
+    winding=_simple.GLU_TESS_WINDING_ODD,
+    normal=None,
+    cache=CACHE,
+):
+    """Triangulate a set of contours in one call
+
+    points -- (N,2) or (N,3) array of contour vertices, all contours
+        concatenated
+    offsets -- start index of each contour within points (an optional
+        final entry equal to N is allowed), default is a single contour
+    winding -- GLU_TESS_WINDING_* rule
+    normal -- optional (x,y,z) polygon normal passed to gluTessNormal,
+        (0,0,1) is a good choice for 2D data
+    cache -- TessellationCache to consult/populate, or None
+
+    Unlike the gluTessVertex/gluTessCallback route no per-vertex Python
+    objects are created: vertices are passed to GLU by address, and only
+    minimal ctypes callbacks collect the output indices.
+
+    returns (vertices,triangles) where vertices is a (V,3) float64 array,
+    points followed by any vertices created at intersections, and
+    triangles is a (T,3) uint32 array of indices into vertices
+
+    raises GLUError if the tessellator reports an error
+    """
+    import numpy
+    from OpenGL import error
+
+    points = numpy.asarray(points, dtype=numpy.float64)
+    if points.ndim != 2 or points.shape[1] not in (2, 3):
+        raise ValueError("""Require (N,2) or (N,3) points, got %s""" % (points.shape,))
+    if points.shape[1] == 2:
+        points = numpy.hstack((points, numpy.zeros((len(points), 1))))
+    points = numpy.ascontiguousarray(points)
+    if offsets is None:
+        offsets = [0]
+    offsets = numpy.asarray(offsets, dtype=numpy.int64).reshape((-1,))
+    if normal is not None:
+        normal = tuple([float(x) for x in normal])
+    key = None
+    if cache is not None:
+        key = cache.key(points, offsets, winding, normal)
+        result = cache.get(key)
+        if result is not None:
+            return result
+
+    bounds = offsets.tolist()
+    if not bounds or bounds[-1] != len(points):
+        bounds.append(len(points))
+    output = []
+    extra = []
+    errors = []
+    base = points.ctypes.data
+    stride = points.strides[0]
+    count = len(points)
+
+    def vertex(data):
+        output.append(data)
+
+    def combine(coords, vertex_data, weight, outData):
+        extra.append((coords[0], coords[1], coords[2]))
+        outData[0] = count + len(extra)
+
+    def edgeFlag(flag):
+        # registering an edge-flag callback restricts output to GL_TRIANGLES
+        pass
+
+    def report(code):
+        errors.append(code)
+
+    callbacks = []
+    tess = gluNewTess()
+    try:
+        for which, function in (
+            (_simple.GLU_TESS_VERTEX, vertex),
+            (_simple.GLU_TESS_COMBINE, combine),
+            (_simple.GLU_TESS_EDGE_FLAG, edgeFlag),
+            (_simple.GLU_TESS_ERROR, report),
+        ):
+            callback = GLUtesselator.CALLBACK_TYPES[which](function)
+            callbacks.append(callback)
+            GLUtesselator.CALLBACK_FUNCTION_REGISTRARS[which](tess, which, callback)
+        _simple.gluTessProperty(tess, _simple.GLU_TESS_WINDING_RULE, winding)
+        if normal is not None:
+            _simple.gluTessNormal(tess, *normal)
+        _simple.gluTessBeginPolygon(tess, None)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if stop <= start:
+                continue
+            _simple.gluTessBeginContour(tess)
+            for index in range(start, stop):
+                # data is index+1 as a NULL data pointer arrives as None
+                _gluTessVertexAddress(tess, base + index * stride, index + 1)
+            _simple.gluTessEndContour(tess)
+        _simple.gluTessEndPolygon(tess)
+    finally:
+        _simple.gluDeleteTess(tess)
+    if errors:
+        raise error.GLUError(
+            """Tessellation failed with GLU error %s""" % (errors[0],)
+        )
+    if extra:
+        vertices = numpy.vstack((points, numpy.array(extra, dtype=numpy.float64)))
+    else:
+        vertices = points.copy() if cache is not None else points
+    triangles = numpy.array(output, dtype=numpy.uint32).reshape((-1, 3)) - 1
+    result = (vertices, triangles)
+    if cache is not None:
+        return cache.store(key, result)
+    return result
+
+
 __all__ = (
     'gluNewTess',
     'gluGetTessProperty',
@@ -145,6 +145,14 @@ import occurs the flags should no longer be changed.
 
         Default: True
 
+    COLUMNAR_RENDER_MODE -- if True, glRenderMode returns the numpy-backed
+        OpenGL.GL.selection.SelectionHits and
+        OpenGL.GL.feedback.FeedbackRecords when leaving GL_SELECT and
+        GL_FEEDBACK mode, rather than lists of record objects.  Both
+        still support indexing/iteration to produce the record objects.
+
+        Default: False
+
     FORWARD_COMPATIBLE_ONLY -- only include OpenGL 3.1 compatible
         entry points.  Note that this will generally break most
         PyOpenGL code that hasn't been explicitly made "legacy free"
@@ -207,6 +215,7 @@ CONTEXT_CHECKING = environ_key("CONTEXT_CHECKING", False)
 FULL_LOGGING = environ_key("FULL_LOGGING", False)
 ALLOW_NUMPY_SCALARS = environ_key("ALLOW_NUMPY_SCALARS", False)
 UNSIGNED_BYTE_IMAGES_AS_STRING = environ_key("UNSIGNED_BYTE_IMAGES_AS_STRING", True)
+COLUMNAR_RENDER_MODE = environ_key("COLUMNAR_RENDER_MODE", False)
 MODULE_ANNOTATIONS = False
 TYPE_ANNOTATIONS = False
 
@@ -358,6 +367,8 @@ FormatHandler(
         "OpenGL.arrays._buffers.Py_buffer",
         _bi + ".memoryview",
         _bi + ".bytearray",
+        "array.array",
+        "mmap.mmap",
     ],
     isOutput=True,
 )
@@ -14,6 +14,7 @@ from OpenGL import (
     FULL_LOGGING,
     ALLOW_NUMPY_SCALARS,
     UNSIGNED_BYTE_IMAGES_AS_STRING,
+    COLUMNAR_RENDER_MODE,
     MODULE_ANNOTATIONS,
     TYPE_ANNOTATIONS,
 )
@@ -103,3 +103,39 @@ ReleaseBuffer = ctypes.pythonapi.PyBuffer_Release
 ReleaseBuffer.argtypes = [ BUFFER_POINTER ]
 ReleaseBuffer.restype = None
 
+IsContiguous = ctypes.pythonapi.PyBuffer_IsContiguous
+IsContiguous.argtypes = [ BUFFER_POINTER, ctypes.c_char ]
+IsContiguous.restype = ctypes.c_int
+
+# struct-module format codes, resolved by item-size as 'l', 'q' etc.
+# vary in size between platforms
+_SIGNED_BY_SIZE = { 1: GL_BYTE, 2: GL_SHORT, 4: GL_INT }
+_UNSIGNED_BY_SIZE = { 1: GL_UNSIGNED_BYTE, 2: GL_UNSIGNED_SHORT, 4: GL_UNSIGNED_INT, 8: GL_UNSIGNED_INT64 }
+_FLOAT_BY_SIZE = { 2: GL_HALF_FLOAT, 4: GL_FLOAT, 8: GL_DOUBLE }
+INTEGER_TYPES = set( _SIGNED_BY_SIZE.values() ) | set( _UNSIGNED_BY_SIZE.values() )
+
+def _baseFormat( format ):
+    """Strip byte-order/alignment prefix from a buffer format string"""
+    if isinstance( format, bytes ):
+        format = format.decode( 'latin-1' )
+    if format and format[0] in '@=<>!':
+        format = format[1:]
+    return format or 'B'
+
+def isUntyped( format ):
+    """Is the buffer format plain bytes (i.e. raw memory)?"""
+    return _baseFormat( format ) in ('B','b','c')
+
+def formatToGLType( format, itemsize ):
+    """Map a buffer format string to the GL data-type constant (or None)"""
+    format = _baseFormat( format )
+    if len(format) != 1:
+        return None
+    if format in 'efd':
+        return _FLOAT_BY_SIZE.get( itemsize )
+    if format in 'bhilqn':
+        return _SIGNED_BY_SIZE.get( itemsize )
+    if format in 'BHILQNc?':
+        return _UNSIGNED_BY_SIZE.get( itemsize )
+    return None
+
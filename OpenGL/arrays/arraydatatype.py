@@ -55,6 +55,10 @@ if ADT is None:
                             if hasattr(handler, "registerEquivalent"):
                                 handler.registerEquivalent(typ, base)
                             return handler
+                handler = self.buffer_handler(value)
+                if handler:
+                    self[typ] = handler
+                    return handler
                 print(self.keys())
                 raise TypeError(
                     """No array-type handler for type %s.%s (value: %s) registered"""
@@ -62,6 +66,21 @@ if ADT is None:
                 )
             return handler
 
+        def buffer_handler(self, value):
+            """Fallback handler for unregistered PEP 3118 buffer objects"""
+            from OpenGL.arrays import _buffers
+
+            if not _buffers.CheckBuffer(value):
+                return None
+            handler = self.handler_by_plugin_name("buffer")
+            if handler is None:
+                raise TypeError(
+                    """No array-type handler for buffer object of type %s """
+                    """(the "buffer" format handler failed to load)"""
+                    % (type(value).__name__,)
+                )
+            return handler()
+
         def handler_by_plugin_name(self, name):
             plugin = plugins.FormatHandler.by_name(name)
             if plugin:
@@ -10,6 +10,7 @@ from OpenGL.raw.GL import _types
 #from OpenGL.raw.GL.VERSION import GL_1_1
 from OpenGL.arrays import formathandler
 from OpenGL import _configflags
+from OpenGL import error
 from OpenGL import acceleratesupport
 _log = logging.getLogger( __name__ )
 try:
@@ -33,25 +34,28 @@ if sys.version_info[:2] > (2,6):
             BufferHandler = MemoryviewHandler
 if not BufferHandler:
     class BufferHandler( formathandler.FormatHandler ):
-        """Buffer-protocol data-type handler for OpenGL"""
+        """Buffer-protocol data-type handler for OpenGL
+
+        Any PEP 3118 buffer (memoryview, bytearray, array.array, mmap,
+        read-only bytes views...) is passed to the GL as a pointer to its
+        own memory, no intermediate array is ever created.  The buffer's
+        format string determines its GL data-type; untyped byte buffers
+        (format 'B', 'b' or 'c') are treated as raw memory and accepted
+        for any pointer type.  Where the GL would need a converted or
+        re-packed copy (typed buffer of the wrong type, non-contiguous
+        strides) an error.CopyError is raised instead of copying.
+        """
         isOutput=False
         ERROR_ON_COPY = _configflags.ERROR_ON_COPY
-        if sys.version_info[0] >= 3:
-            @classmethod
-            def from_param( cls, value, typeCode=None ):
-                if not isinstance( value, _buffers.Py_buffer ):
-                    value = cls.asArray( value )
-                    #raise TypeError( """Can't convert value to py-buffer in from_param""" )
-                # TODO: only do this IFF value.internal is None
-                return _types.GLvoidp( value.buf )
-#                return value
-        else:
-            @classmethod
-            def from_param( cls, value, typeCode=None ):
-                if not isinstance( value, _buffers.Py_buffer ):
-                    value = cls.asArray( value )
-                    #raise TypeError( """Can't convert value to py-buffer in from_param""" )
-                return value.buf
+        BUFFER_FLAGS = _buffers.PyBUF_STRIDES|_buffers.PyBUF_FORMAT
+        @classmethod
+        def from_param( cls, value, typeCode=None ):
+            if not isinstance( value, _buffers.Py_buffer ):
+                value = cls.asArray( value, typeCode )
+            elif typeCode is not None:
+                cls.checkType( value, typeCode )
+            # TODO: only do this IFF value.internal is None
+            return _types.GLvoidp( value.buf )
         def dataPointer( value ):
             if not isinstance( value, _buffers.Py_buffer ):
                 value = _buffers.Py_buffer.from_object( value )
@@ -69,30 +73,70 @@ if not BufferHandler:
         @classmethod
         def arrayToGLType( cls, value ):
             """Given a value, guess OpenGL type of the corresponding pointer"""
-            format = value.format 
-            if format in ARRAY_TO_GL_TYPE_MAPPING:
-                return ARRAY_TO_GL_TYPE_MAPPING[format]
-            raise TypeError( 'Unknown format: %r'%(format,))
+            if not isinstance( value, _buffers.Py_buffer ):
+                value = cls.asArray( value )
+            constant = _buffers.formatToGLType( value.format, value.itemsize )
+            if constant is None:
+                raise TypeError( 'Unknown format: %r'%(value.format,))
+            return constant
+        @classmethod
+        def checkType( cls, value, typeCode ):
+            """Raise CopyError if value's format doesn't match typeCode
+
+            Untyped (byte) buffers and untyped (void) pointers always match,
+            as do signed/unsigned integers of the same size.
+            """
+            if typeCode in BYTE_SIZES and not _buffers.isUntyped( value.format ):
+                constant = _buffers.formatToGLType( value.format, value.itemsize )
+                if constant != typeCode and not (
+                    constant in _buffers.INTEGER_TYPES and
+                    typeCode in _buffers.INTEGER_TYPES and
+                    BYTE_SIZES[constant] == BYTE_SIZES[typeCode]
+                ):
+                    raise error.CopyError(
+                        """Buffer of format %r passed, required buffer of type %r"""%(
+                            value.format, typeCode,
+                        )
+                    )
+            return value
         @classmethod
         def arraySize( cls, value, typeCode = None ):
             """Given a data-value, calculate ravelled size for the array"""
+            value = cls.asArray( value )
+            if typeCode in BYTE_SIZES and _buffers.isUntyped( value.format ):
+                return value.len // BYTE_SIZES[typeCode]
             return value.len // value.itemsize
         @classmethod
         def arrayByteCount( cls, value, typeCode = None ):
             """Given a data-value, calculate number of bytes required to represent"""
-            return value.len
+            return cls.asArray( value ).len
         @classmethod 
         def unitSize( cls, value, default=None ):
-            return value.dims[-1]
+            return cls.asArray( value ).dims[-1]
         @classmethod
         def asArray( cls, value, typeCode=None ):
-            """Convert given value to an array value of given typeCode"""
-            buf = _buffers.Py_buffer.from_object( value )
+            """Get a (zero-copy) Py_buffer view of value
+
+            raises error.CopyError if the buffer is not C-contiguous or
+            its format does not match typeCode
+            """
+            if isinstance( value, _buffers.Py_buffer ):
+                buf = value
+            else:
+                buf = _buffers.Py_buffer.from_object( value, cls.BUFFER_FLAGS )
+            if not _buffers.IsContiguous( buf, b'C' ):
+                raise error.CopyError(
+                    """Non-contiguous buffer passed (strides %s), would require a copy"""%(
+                        list(buf.dim_strides or ()),
+                    )
+                )
+            if typeCode is not None:
+                cls.checkType( buf, typeCode )
             return buf
         @classmethod
         def dimensions( cls, value, typeCode=None ):
             """Determine dimensions of the passed array value (if possible)"""
-            return value.dims
+            return cls.asArray( value ).dims
 
 ARRAY_TO_GL_TYPE_MAPPING = _buffers.ARRAY_TO_GL_TYPE_MAPPING
 BYTE_SIZES = _buffers.BYTE_SIZES
@@ -210,9 +210,13 @@ if NumpyHandler is None:
         def from_param( cls, instance, typeCode=None ):
             try:
                 pointer = cls.dataPointer( instance )
+                if not instance.flags.contiguous:
+                    # strided view, the GL would read the wrong memory
+                    raise TypeError( instance )
             except TypeError:
+                # asArray raises CopyError here if ERROR_ON_COPY is set
                 array = cls.asArray( instance, typeCode )
-                pp = cls.dataPointer( array )
+                pp = c_void_p( cls.dataPointer( array ) )
                 pp._temporary_array_ = (array,)
                 return pp
             else:
@@ -151,6 +151,8 @@ if VBO is None:
         """
         copied = False
         _no_cache_ = True # do not cache in context data arrays
+        # fraction of the buffer which, once dirty, is re-sent in one transfer
+        dirty_ratio = 0.5
         def __init__(
             self, data, usage='GL_DYNAMIC_DRAW',
             target='GL_ARRAY_BUFFER', size=None,
@@ -196,7 +198,7 @@ if VBO is None:
             self.set_array( data, size )
             self.target = target
             self.buffers = []
-            self._copy_segments = []
+            self._dirty_ranges = []
         _I_ = None
         implementation = property( get_implementation, )
         def resolve( self, value ):
@@ -237,43 +239,43 @@ if VBO is None:
                 raise NotImplemented( """Don't know how to map stepped arrays yet""" )
             # TODO: handle e.g. mapping character data into an integer data-set
             data = ArrayDatatype.asArray( array )
-            data_length = ArrayDatatype.arrayByteCount( array )
-            start = (slice.start or 0)
-            stop = (slice.stop or len(self.data))
-            if start < 0:
-                start += len(self.data)
-                start = max((start,0))
-            if stop < 0:
-                stop += len(self.data)
-                stop = max((stop,0))
+            start, stop = slice.indices( len(self.data) )[:2]
             self.data[ slice ] = data
             if self.copied and self.buffers:
-                if start-stop == len(self.data):
+                if start == 0 and stop == len(self.data):
                     # re-copy the whole data-set
                     self.copied = False
-                elif len(data):
-                    # now the fun part, we need to make the array match the
-                    # structure of the array we're going to copy into and make
-                    # the "size" parameter match the value we're going to copy in,
-                    # note that a 2D array (rather than a 1D array) may require
-                    # multiple mappings to copy into the memory area...
-
-                    # find the step size from the dimensions and base size...
+                    del self._dirty_ranges[:]
+                elif stop > start:
+                    # the GL only sees bytes, so record the byte-range of the
+                    # rows we touched, the data itself is read back out of
+                    # self.data (after merging) when we next bind, the
+                    # row stride comes from the data, self.size may be larger
                     size = ArrayDatatype.arrayByteCount( self.data[0] )
-                    #baseSize = ArrayDatatype.unitSize( data )
-                    # now create the start and distance values...
-                    start *= size
-                    stop *= size
-                    # wait until the last moment (bind) to copy the data...
-                    self._copy_segments.append(
-                        (start,(stop-start), data)
-                    )
+                    self._dirty_ranges.append( (start*size, stop*size) )
+        def dirty_ranges( self ):
+            """Merge pending byte-ranges into a minimal sorted set
+
+            Overlapping and adjacent ranges are coalesced, so a run of
+            per-element updates becomes a single glBufferSubData call.
+
+            returns list of (start,stop) byte offsets
+            """
+            merged = []
+            for start,stop in sorted( self._dirty_ranges ):
+                if merged and start <= merged[-1][1]:
+                    if stop > merged[-1][1]:
+                        merged[-1][1] = stop
+                else:
+                    merged.append( [start,stop] )
+            self._dirty_ranges[:] = [tuple(r) for r in merged]
+            return self._dirty_ranges
         def __len__( self ):
             """Delegate length/truth checks to our data-array"""
             return len( self.data )
         def __getattr__( self, key ):
             """Delegate failing attribute lookups to our data-array"""
-            if key not in ('data','usage','target','buffers', 'copied','_I_','implementation','_copy_segments' ):
+            if key not in ('data','usage','target','buffers', 'copied','_I_','implementation','_dirty_ranges' ):
                 return getattr( self.data, key )
             else:
                 raise AttributeError( key )
@@ -295,12 +297,22 @@ if VBO is None:
             """
             assert self.buffers, """Should do create_buffers before copy_data"""
             if self.copied:
-                if self._copy_segments:
-                    while self._copy_segments:
-                        start,size,data  = self._copy_segments.pop(0)
-                        dataptr = ArrayDatatype.voidDataPointer( data )
-                        self.implementation.glBufferSubData(self.target, start, size, dataptr)
-            else:
+                if self._dirty_ranges:
+                    ranges = self.dirty_ranges()
+                    dirty = 0
+                    for start,stop in ranges:
+                        dirty += stop-start
+                    if dirty > self.dirty_ratio * self.size:
+                        self.copied = False
+                    else:
+                        base = ArrayDatatype.dataPointer( self.data )
+                        for start,stop in ranges:
+                            self.implementation.glBufferSubData(
+                                self.target, start, stop-start,
+                                ctypes.c_void_p( base + start ),
+                            )
+                    del self._dirty_ranges[:]
+            if not self.copied:
                 if self.data is not None and self.size is None:
                     self.size = ArrayDatatype.arrayByteCount( self.data )
                 self.implementation.glBufferData(
@@ -310,6 +322,7 @@ if VBO is None:
                     self.usage,
                 )
                 self.copied = True
+                del self._dirty_ranges[:]
         def delete( self ):
             """Delete this buffer explicitly"""
             if self.buffers:
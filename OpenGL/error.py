@@ -6,6 +6,28 @@ such as TypeError or ValueError when appropriate.
 ErrorChecker is an _ErrorChecker instance that allows you
 to register a new error-checking function for use 
 throughout the system.
+
+Checking modes (for the GL error checker, see setCheckingMode):
+
+    IMMEDIATE -- glGetError after every call (the default)
+    DEFERRED -- no per-call glGetError, errors are only looked for
+        when checkErrors() is called, e.g. once per frame after the
+        buffer swap
+    SAMPLED -- glGetError after one in every N calls
+    DEBUG_OUTPUT -- no per-call glGetError, errors are raised from
+        the KHR_debug messages collected by OpenGL.GL.debugoutput
+        (which must be installed in the context), checked after each
+        call with a Python-level test of the message queue
+
+In the DEFERRED and SAMPLED modes a small ring of the most recent calls
+is kept.  glGetError only says that *some* call since the last check
+failed, so a late-detected GLError has no baseOperation, instead it
+reports the call it was detected after (detectedAfter) and the calls
+leading up to it (recentCalls).  To pin the error down, a DEFERRED
+checker that found an error checks the following frame (up to the next
+checkErrors() fence) IMMEDIATE-ly, so a recurring error is raised from
+the exact call.  The fullChecking() context manager temporarily
+switches back to IMMEDIATE checking for a region of code.
 """
 import logging
 _log = logging.getLogger( 'OpenGL.error' )
@@ -16,6 +38,12 @@ __all__ = (
     'GLerror','GLUerror','GLUTerror','ArgumentError',
 )
 
+IMMEDIATE = 'immediate'
+DEFERRED = 'deferred'
+SAMPLED = 'sampled'
+DEBUG_OUTPUT = 'debug_output'
+CHECKING_MODES = (IMMEDIATE, DEFERRED, SAMPLED, DEBUG_OUTPUT)
+
 class Error( Exception ):
     """Base class for all PyOpenGL-specific exception classes"""
 class NoContext( Error ):
@@ -57,7 +85,15 @@ class GLError( Error ):
         cArguments -- ctypes-level arguments to the operation,
             often raw integers for pointers and the like
         description -- OpenGL description of the error (textual)
+        detectedAfter -- for errors detected by deferred/sampled checking
+            (which have no baseOperation), the last call issued before
+            the check, not necessarily the one which failed
+        recentCalls -- for errors detected by deferred/sampled checking,
+            the (baseOperation,cArguments) calls issued since the last
+            check (oldest first, as far as the ring reaches)
     """
+    detectedAfter = None
+    recentCalls = None
     def __init__( 
         self, 
         err=None, 
@@ -82,10 +118,12 @@ class GLError( Error ):
         'err', 
         'description',
         'baseOperation',
+        'detectedAfter',
         'pyArgs', 
         'cArgs',
         'cArguments',
         'result', 
+        'recentCalls',
     )
     def __str__( self ):
         """Create a fully formatted representation of the error"""
@@ -112,6 +150,8 @@ class GLError( Error ):
                 'err=%s'%(self.err),
                 self.format_description( 'description', self.description ) or '',
                 self.format_baseOperation( 'baseOperation', self.baseOperation ) or '',
+                self.format_detectedAfter( 'detectedAfter', self.detectedAfter )
+                    if self.detectedAfter is not None else '',
             ] if x])
         )
     def format_description( self, property, value ):
@@ -151,6 +191,15 @@ class GLError( Error ):
             return '%s = %s'%( property, value.__name__ )
         else:
             return '%s = %r'%( property, value )
+    format_detectedAfter = format_baseOperation
+    def format_recentCalls( self, property, value ):
+        """Format the recent-call ring as a list of operation names"""
+        if not value:
+            return None
+        return '%s = [%s]'%( property, ', '.join([
+            getattr( operation, '__name__', repr(operation) )
+            for (operation,cArguments) in value
+        ]))
 
 class GLUError( Error ):
     """GLU error implementation class"""
@@ -192,6 +241,14 @@ if _configflags.ERROR_CHECKING:
                 else:
                     self._registeredChecker = self.nullGetError
                 self._currentChecker = self._registeredChecker
+                self._mode = IMMEDIATE
+                self._sampleRate = self._countdown = 1
+                self._history = 16
+                self._isolated = None
+                self._recent = []
+                self._recentIndex = 0
+                self._debugPending = ()
+                self._debugDispatch = None
             def __bool__( self ):
                 """We are "true" if we actually do anything"""
                 if self._registeredChecker is self.nullGetError:
@@ -225,6 +282,23 @@ if _configflags.ERROR_CHECKING:
                     sequence.  If you are calling glBegin/glEnd in C you 
                     should call onBegin and onEnd appropriately.
                 """
+                if self._mode is not IMMEDIATE:
+                    recent = self._recent
+                    index = self._recentIndex
+                    recent[index] = (baseOperation, cArguments)
+                    self._recentIndex = (index + 1) % len(recent)
+                    if self._mode is DEFERRED:
+                        return result
+                    if self._mode is DEBUG_OUTPUT:
+                        if self._debugPending:
+                            self._debugDispatch( baseOperation, cArguments, self._currentChecker )
+                        return result
+                    self._countdown -= 1
+                    if self._countdown > 0:
+                        return result
+                    self._countdown = self._sampleRate
+                    self.checkErrors()
+                    return result
                 err = self._currentChecker()
                 if err != self._noErrorResult:
                     raise self._errorClass(
@@ -234,6 +308,87 @@ if _configflags.ERROR_CHECKING:
                         baseOperation = baseOperation,
                     )
                 return result
+            def setMode( self, mode, sampleRate=100, history=None ):
+                """Choose when glGetError is called (see module docstring)
+
+                mode -- IMMEDIATE, DEFERRED, SAMPLED or DEBUG_OUTPUT
+                sampleRate -- for SAMPLED, check once every sampleRate calls
+                history -- number of recent calls remembered for reporting
+                    errors found by DEFERRED/SAMPLED checks, None keeps
+                    the current size (initially 16)
+
+                returns the previous (mode, sampleRate, history) for restoring
+                """
+                if mode not in CHECKING_MODES:
+                    raise ValueError( """Unknown error-checking mode %r"""%(mode,))
+                previous = (self._mode, self._sampleRate, self._history)
+                self._isolated = None
+                if history is not None:
+                    self._history = max((int(history),1))
+                history = self._history
+                if mode is not IMMEDIATE and (
+                    mode != self._mode or len(self._recent) != history
+                ):
+                    # calls recorded under another mode were already
+                    # checked (or never will be), don't blame them
+                    self._recent = [None] * history
+                    self._recentIndex = 0
+                self._sampleRate = self._countdown = max((int(sampleRate),1))
+                if mode == DEBUG_OUTPUT and self._debugDispatch is None:
+                    from OpenGL.GL import debugoutput
+                    self._debugPending = debugoutput.PENDING
+                    self._debugDispatch = debugoutput.dispatchPending
+                self._mode = CHECKING_MODES[ CHECKING_MODES.index( mode ) ]
+                return previous
+            def getMode( self ):
+                """Retrieve the current checking mode
+
+                IMMEDIATE while a DEFERRED checker is isolating an error
+                (i.e. for the frame after a late-detected error)
+                """
+                return self._mode
+            def recentCalls( self ):
+                """Retrieve the remembered calls since the last check, oldest first"""
+                index = self._recentIndex
+                ordered = self._recent[index:] + self._recent[:index]
+                return [call for call in ordered if call is not None]
+            def checkErrors( self ):
+                """Check for (and raise) any GL error raised since the last check
+
+                This is the "fence" for DEFERRED mode, it is a no-op
+                inside glBegin/glEnd.  The raised error has no
+                baseOperation (any of the calls since the last check may
+                have failed), detectedAfter is the most recently issued
+                call and recentCalls holds the ring.  After raising, a
+                DEFERRED checker checks IMMEDIATE-ly until the next
+                checkErrors(), so a recurring error is then raised from
+                the exact call.  Pending debug messages (from any mode
+                with a debugoutput pipeline installed) are dispatched
+                first, errors among them are labelled the same way.
+                """
+                if self._isolated is not None:
+                    # end of the IMMEDIATE-checked frame, back to DEFERRED
+                    self.setMode( *self._isolated )
+                recent = self.recentCalls()
+                self._recent = [None] * len(self._recent)
+                self._recentIndex = 0
+                failure = None
+                if self._debugPending:
+                    try:
+                        self._debugDispatch( None, None, self._currentChecker )
+                    except GLError as err:
+                        failure = err
+                if failure is None:
+                    err = self._currentChecker()
+                    if err != self._noErrorResult:
+                        failure = self._errorClass( err, None )
+                if failure is not None:
+                    if self._mode is not IMMEDIATE:
+                        failure.detectedAfter = recent[-1][0] if recent else None
+                        failure.recentCalls = recent
+                    if self._mode is DEFERRED:
+                        self._isolated = self.setMode( IMMEDIATE )
+                    raise failure
             def onBegin( self ):
                 """Called by glBegin to record the fact that glGetError won't work"""
                 self._currentChecker = self.nullGetError
@@ -242,6 +397,59 @@ if _configflags.ERROR_CHECKING:
                 self._currentChecker = self._registeredChecker
 else:
     _ErrorChecker = None
+
+def _glChecker():
+    """Retrieve the GL error checker (lazy, to avoid import loops)"""
+    from OpenGL.raw.GL import _errors
+    checker = _errors._error_checker
+    if not checker or not hasattr( checker, 'setMode' ):
+        return None
+    return checker
+
+def setCheckingMode( mode, sampleRate=100, history=None ):
+    """Set the GL error-checking mode (IMMEDIATE, DEFERRED, SAMPLED or DEBUG_OUTPUT)
+
+    Has no effect (returns None) if ERROR_CHECKING was disabled at
+    import, or with the OpenGL_accelerate error checker.
+
+    returns the previous (mode, sampleRate, history)
+    """
+    checker = _glChecker()
+    if checker is None:
+        return None
+    return checker.setMode( mode, sampleRate, history )
+
+def checkErrors():
+    """Raise any GL error pending from DEFERRED/SAMPLED checking
+
+    Call this at a natural fence in the application, e.g. after
+    swapping buffers at the end of each frame.
+    """
+    checker = _glChecker()
+    if checker is not None:
+        checker.checkErrors()
+
+class fullChecking( object ):
+    """Context manager enabling IMMEDIATE GL error checking for a region
+
+    Pending errors from before the region are raised on entry, so that
+    errors inside the region are attributed to the exact call.
+
+        with error.fullChecking():
+            suspicious_rendering_code()
+    """
+    previous = None
+    def __enter__( self ):
+        checker = _glChecker()
+        if checker is not None and checker.getMode() is not IMMEDIATE:
+            checker.checkErrors()
+            self.previous = checker.setMode( IMMEDIATE )
+        return self
+    def __exit__( self, exc_type=None, exc_val=None, exc_tb=None ):
+        if self.previous is not None:
+            _glChecker().setMode( *self.previous )
+            self.previous = None
+        return False
 # Compatibility with PyOpenGL 2.x series
 GLUerror = GLUError
 GLerror = GLError 
@@ -18,4 +18,4 @@ if _ErrorChecker:
         errorClass = EGLError,
     )
 else:
-    _ErrorChecker = None
+    _error_checker = None
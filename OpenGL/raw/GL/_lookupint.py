@@ -1,23 +1,39 @@
-"""Integer values looked up via glGetIntegerv( constant )"""
+"""Integer values looked up via glGetIntegerv( constant )
+
+Constants which are fixed implementation limits (see OpenGL.GL.limits)
+are answered from the current context's limits cache rather than
+re-queried on every coercion.
+"""
 import ctypes
 _get = None
 _get_float = None
+_limits = None
 
 class LookupInt( object ):
     def __init__( self, lookup, format=ctypes.c_int, calculation=None ):
-        self.lookup = lookup 
+        self.lookup = lookup
         self.format = format
         self.calculation = calculation
     def __int__( self ):
-        global _get
+        global _get, _limits
         if _get is None:
             from OpenGL.GL import glGetIntegerv
+            from OpenGL.GL import limits as _limits
             _get = glGetIntegerv
-        output = self.format()
-        _get( self.lookup, output )
+        value = None
+        if self.lookup in _limits.CACHED and self.format is ctypes.c_int:
+            try:
+                value = _limits.currentLimits().get( self.lookup )
+            except _limits.error.Error:
+                # no context bookkeeping available, query directly
+                value = None
+        if value is None:
+            output = self.format()
+            _get( self.lookup, output )
+            value = output.value
         if self.calculation:
-            return self.calculation( output.value )
-        return output.value
+            return self.calculation( value )
+        return value
     __long__ = __int__
     def __eq__( self, other ):
         return int(self) == other
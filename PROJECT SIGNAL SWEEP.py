@@ -3,11 +3,13 @@ import os
 import math
 import asyncio
 import threading
+import numpy
 import simpleaudio as sa
 from bleak import BleakScanner
 from OpenGL.GL import *
 from OpenGL.GLUT import *
 from OpenGL.GLU import *
+from OpenGL.GL import picking, transforms, textures
 
 # Localization Setup
 languages = {
@@ -55,6 +57,26 @@ devices = []
 known_devices = {}
 data_lock = threading.Lock()
 
+# Device picking (offscreen ID buffer, see OpenGL.GL.picking)
+picker = None
+picking_dirty = True
+pick_addresses = []  # pick id - 1 -> device address
+hovered_device = None
+selected_device = None
+hover_position = None  # latest mouse position, picked once per frame
+
+# Heatmap layer: one texel per 50x50 grid cell, streamed into a texture
+# (see OpenGL.GL.textures) and drawn as a single quad
+heat_cell = 50
+heat_origin = -radius // heat_cell  # cell keys run from floor(-radius/cell)
+heat_cells = radius // heat_cell - heat_origin + 1  # ... to floor(radius/cell)
+heat_pixels = numpy.zeros((heat_cells, heat_cells, 4), dtype=numpy.uint8)
+heat_texture = None
+
+# Client-side matrices (see OpenGL.GL.transforms), uploaded only on change
+projection = transforms.MatrixStack(GL_PROJECTION)
+modelview = transforms.MatrixStack(GL_MODELVIEW)
+
 # Determine script directory and set beep file path
 script_dir = os.path.dirname(os.path.abspath(__file__))
 beep_path = os.path.join(script_dir, "beep.wav")
@@ -68,7 +90,7 @@ if not os.path.isfile(beep_path):
 sound_wave = sa.WaveObject.from_wave_file(beep_path)
 
 async def scan_devices():
-    global devices, known_devices
+    global devices, known_devices, picking_dirty
     scanner = BleakScanner()
     found_devices = await scanner.discover()
 
@@ -95,18 +117,25 @@ async def scan_devices():
 
         # Update device list
         devices = sorted(new_devices, key=lambda x: x[1], reverse=True)
+        picking_dirty = True
     
     print(f"Total Devices: {len(devices)}")
     for name, rssi, address in devices:
         print(f"Device: {name}, RSSI: {rssi}, Address: {address}")
 
 def reshape(w, h):
+    global picker, picking_dirty
     glViewport(0, 0, w, h)
-    glMatrixMode(GL_PROJECTION)
-    glLoadIdentity()
-    gluPerspective(45, (w / h) if h != 0 else 1, 0.1, 1000.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+    if picker is None:
+        picker = picking.PickBuffer(w, h)
+    else:
+        picker.resize(w, h)
+    picking_dirty = True
+    projection.loadIdentity()
+    projection.perspective(45, (w / h) if h != 0 else 1, 0.1, 1000.0)
+    projection.upload()
+    modelview.loadIdentity()
+    modelview.upload()
 
 def midpoint_circle(x0, y0, r):
     x = 0
@@ -227,34 +256,108 @@ def draw_sweep_line(angle):
     midpoint_line(center_x, center_y, 0, x_end, y_end, 0)
 
 def draw_heatmap():
+    global heat_texture
     c = get_colors()
     with data_lock:
         current_devices = list(devices)
     heatmap = {}
     for idx, (name, rssi, address) in enumerate(current_devices):
-        # Simple grid-based heatmap
+        # Simple grid-based heatmap, weak signals (RSSI < -100) are kept
+        # on the grid's edge
         angle = math.radians(45 * idx)
-        distance = max(radius - ((rssi + 100) * 2), 0)
+        distance = min(max(radius - ((rssi + 100) * 2), 0), radius)
         x = int(distance * math.cos(angle))
         y = int(distance * math.sin(angle))
-        key = (x // 50, y // 50)
+        key = (x // heat_cell, y // heat_cell)
         heatmap[key] = heatmap.get(key, 0) + 1
 
-    glEnable(GL_BLEND)
-    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    # Rebuild the cell colours, only changed cells are uploaded
+    colors = c["heatmap_colors"]
+    frame = numpy.zeros_like(heat_pixels)
     for (gx, gy), count in heatmap.items():
         intensity = min(count / 5.0, 1.0)
-        if intensity > 0:
-            color = c["heatmap_colors"][min(int(intensity * len(c["heatmap_colors"])), len(c["heatmap_colors"]) - 1)]
-            glColor4f(color[0], color[1], color[2], intensity * 0.5)
-            glBegin(GL_QUADS)
-            glVertex3f(gx * 50, gy * 50, -1)
-            glVertex3f((gx + 1) * 50, gy * 50, -1)
-            glVertex3f((gx + 1) * 50, (gy + 1) * 50, -1)
-            glVertex3f(gx * 50, (gy + 1) * 50, -1)
-            glEnd()
+        color = colors[min(int(intensity * len(colors)), len(colors) - 1)]
+        frame[gy - heat_origin, gx - heat_origin] = [
+            int(round(component * 255)) for component in (color[0], color[1], color[2], intensity * 0.5)
+        ]
+    if heat_texture is None:
+        heat_texture = textures.StreamingTexture(heat_cells, heat_cells)
+        heat_texture.create()
+        with heat_texture:
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        heat_pixels[:] = frame
+        heat_texture.upload(heat_pixels)
+    else:
+        for gy, gx in zip(*numpy.nonzero((frame != heat_pixels).any(axis=2))):
+            heat_texture.mark_dirty(int(gx), int(gy), 1, 1)
+        if heat_texture.dirty:
+            heat_pixels[:] = frame
+            heat_texture.upload(heat_pixels)
+
+    low = heat_origin * heat_cell
+    high = (heat_origin + heat_cells) * heat_cell
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glDepthMask(GL_FALSE)  # empty cells are transparent, do not hide later overlays
+    glEnable(GL_TEXTURE_2D)
+    glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_REPLACE)
+    with heat_texture:
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex3f(low, low, -1)
+        glTexCoord2f(1, 0); glVertex3f(high, low, -1)
+        glTexCoord2f(1, 1); glVertex3f(high, high, -1)
+        glTexCoord2f(0, 1); glVertex3f(low, high, -1)
+        glEnd()
+    glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+    glDisable(GL_TEXTURE_2D)
+    glDepthMask(GL_TRUE)
     glDisable(GL_BLEND)
 
+def device_position(idx, rssi):
+    # Map RSSI to distance (closer (stronger signal) means closer to center)
+    distance = max(radius - ((rssi + 100) * 2), 0)
+    # Spread devices around radar
+    angle = math.radians(45 * idx)
+    return int(distance * math.cos(angle)), int(distance * math.sin(angle))
+
+def draw_device_ids():
+    # Render each device marker with its pick ID as the color
+    global pick_addresses
+    with data_lock:
+        current_devices = list(devices)
+    pick_addresses = [address for name, rssi, address in current_devices[:20]]
+    glPointSize(14)  # generous hit area around the 8px markers
+    glBegin(GL_POINTS)
+    for idx, (name, rssi, address) in enumerate(current_devices[:20]):
+        glColor3ub(*picking.idToColor(idx + 1))
+        glVertex3i(*device_position(idx, rssi), 0)
+    glEnd()
+    glPointSize(1)
+
+def render_picking():
+    global picking_dirty
+    if picker is not None and (picking_dirty or picker.dirty):
+        picking_dirty = False
+        with picker:
+            draw_device_ids()
+
+def resolve_picks():
+    global hovered_device, selected_device, hover_position
+    if picker is None:
+        return
+    if hover_position is not None:
+        picker.request(hover_position[0], picker.height - hover_position[1] - 1, "hover")
+        hover_position = None
+    for tag, pick_id in picker.poll():
+        address = pick_addresses[pick_id - 1] if 0 < pick_id <= len(pick_addresses) else None
+        if tag == "hover":
+            hovered_device = address
+        elif tag == "click" and address is not None:
+            selected_device = address
+            name, rssi = known_devices.get(address, ("Unknown Device", 0))
+            print(f"Selected device: {name} ({address}), RSSI: {rssi}")
+
 def draw_devices():
     global devices, blink_state
     c = get_colors()
@@ -269,13 +372,7 @@ def draw_devices():
     glPointSize(8)
     glBegin(GL_POINTS)
     for idx, (name, rssi, address) in enumerate(current_devices[:20]):  # Limiting to 20 devices
-        # Map RSSI to distance (closer (stronger signal) means closer to center)
-        distance = max(radius - ((rssi + 100) * 2), 0)
-        
-        # Spread devices around radar
-        angle = math.radians(45 * idx)
-        x = int(distance * math.cos(angle))
-        y = int(distance * math.sin(angle))
+        x, y = device_position(idx, rssi)
 
         # Set color based on blink state
         if blink_state:
@@ -289,14 +386,16 @@ def draw_devices():
     # Draw device labels
     glColor3f(*c["text_color"])
     for idx, (name, rssi, address) in enumerate(current_devices[:20]):
-        distance = max(radius - ((rssi + 100) * 2), 0)
-        angle = math.radians(45 * idx)
-        x = int(distance * math.cos(angle))
-        y = int(distance * math.sin(angle))
+        x, y = device_position(idx, rssi)
         glRasterPos3f(x + 10, y + 10, 0)
         text = _("device_label", name[:8], rssi)
         for ch in text:
             glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
+        # Hover tooltip / selection details
+        if address in (hovered_device, selected_device):
+            glRasterPos3f(x + 10, y - 5, 0)
+            for ch in f"{name} [{address}]":
+                glutBitmapCharacter(GLUT_BITMAP_HELVETICA_12, ord(ch))
     
     # Restore OpenGL state
     glPopAttrib()
@@ -305,14 +404,14 @@ def draw_buttons_2d():
     c = get_colors()
 
     # Switch to orthographic projection for 2D buttons
-    glMatrixMode(GL_PROJECTION)
-    glPushMatrix()
-    glLoadIdentity()
-    gluOrtho2D(-width / 2, width / 2, -height / 2, height / 2)
+    projection.push()
+    projection.loadIdentity()
+    projection.ortho2D(-width / 2, width / 2, -height / 2, height / 2)
+    projection.upload()
 
-    glMatrixMode(GL_MODELVIEW)
-    glPushMatrix()
-    glLoadIdentity()
+    modelview.push()
+    modelview.loadIdentity()
+    modelview.upload()
 
     # Disable depth testing for UI elements
     glDisable(GL_DEPTH_TEST)
@@ -395,11 +494,10 @@ def draw_buttons_2d():
 
     # Restore projection and modelview matrices
     glEnable(GL_DEPTH_TEST)
-    glPopMatrix()
-
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
+    modelview.pop()
+    modelview.upload()
+    projection.pop()
+    projection.upload()
 
 def fill_rectangle(x_min, x_max, y_min, y_max, z, color):
     glColor3f(*color)
@@ -424,14 +522,19 @@ def display():
     c = get_colors()
     glClearColor(*c["background"], 1.0)
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-    glLoadIdentity()
 
     # Set camera
-    gluLookAt(0, -400, 300, 0, 0, 0, 0, 0, 1)
+    modelview.loadIdentity()
+    modelview.lookAt((0, -400, 300), (0, 0, 0), (0, 0, 1))
+    modelview.upload()
 
     # Enable depth testing
     glEnable(GL_DEPTH_TEST)
 
+    # Refresh the pick ID buffer if devices moved, then apply finished picks
+    render_picking()
+    resolve_picks()
+
     draw_radar()
     draw_sweep_line(math.radians(sweep_angle))
     draw_devices()
@@ -479,6 +582,14 @@ def on_mouse_click(button, state, mx, my):
             close_application()
             return
 
+        # Otherwise try to select a device (resolved on the next frame)
+        if picker is not None:
+            picker.request(mx, picker.height - my - 1, "click")
+
+def on_mouse_motion(mx, my):
+    global hover_position
+    hover_position = (mx, my)
+
 def on_keyboard(key, x, y):
     global color_mode, sweep_speed
     if key in [b'm', b'M']:
@@ -522,6 +633,7 @@ def main():
     glutDisplayFunc(display)
     glutReshapeFunc(reshape)
     glutMouseFunc(on_mouse_click)
+    glutPassiveMotionFunc(on_mouse_motion)
     glutKeyboardFunc(on_keyboard)
     glutSpecialFunc(on_special)
     glutTimerFunc(int(1000 / 60), update, 0)  # Start at 60 FPS
@@ -0,0 +1,73 @@
+"""Offscreen GL context shared by the benchmark scripts
+
+The benchmarks need a current context but no window: with EGL available
+(PYOPENGL_PLATFORM=egl, e.g. Mesa with EGL_PLATFORM=surfaceless) a
+surfaceless desktop GL context is created, otherwise a hidden GLUT window
+is used.  Drawing benchmarks render into a framebuffer object.
+
+Run the scripts from the repository root so that the bundled OpenGL
+package is imported:
+
+    PYOPENGL_PLATFORM=egl EGL_PLATFORM=surfaceless python benchmarks/<script>.py
+"""
+import ctypes
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__ ))))
+
+def context( ):
+    """Create and make current an offscreen context"""
+    if os.environ.get( 'PYOPENGL_PLATFORM' ) == 'egl':
+        from OpenGL import EGL
+        display = EGL.eglGetDisplay( EGL.EGL_DEFAULT_DISPLAY )
+        EGL.eglInitialize( display, None, None )
+        EGL.eglBindAPI( EGL.EGL_OPENGL_API )
+        config = EGL.EGLConfig()
+        count = EGL.EGLint()
+        EGL.eglChooseConfig(
+            display,
+            (EGL.EGLint * 3)( EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT, EGL.EGL_NONE ),
+            ctypes.byref( config ), 1, ctypes.byref( count ),
+        )
+        context = EGL.eglCreateContext( display, config, EGL.EGL_NO_CONTEXT, None )
+        EGL.eglMakeCurrent( display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context )
+        return context
+    from OpenGL import GLUT
+    GLUT.glutInit()
+    GLUT.glutInitDisplayMode( GLUT.GLUT_RGBA | GLUT.GLUT_DEPTH )
+    window = GLUT.glutCreateWindow( b'benchmark' )
+    GLUT.glutHideWindow()
+    return window
+
+def framebuffer( width, height ):
+    """Bind an RGBA8 + depth framebuffer object of the given size"""
+    from OpenGL import GL
+    fbo = GL.glGenFramebuffers( 1 )
+    GL.glBindFramebuffer( GL.GL_FRAMEBUFFER, fbo )
+    for format, attachment in (
+        (GL.GL_RGBA8, GL.GL_COLOR_ATTACHMENT0),
+        (GL.GL_DEPTH_COMPONENT24, GL.GL_DEPTH_ATTACHMENT),
+    ):
+        buffer = GL.glGenRenderbuffers( 1 )
+        GL.glBindRenderbuffer( GL.GL_RENDERBUFFER, buffer )
+        GL.glRenderbufferStorage( GL.GL_RENDERBUFFER, format, width, height )
+        GL.glFramebufferRenderbuffer( GL.GL_FRAMEBUFFER, attachment, GL.GL_RENDERBUFFER, buffer )
+    GL.glViewport( 0, 0, width, height )
+    return fbo
+
+def timed( function, repeat=20, warmup=2 ):
+    """Seconds per call of function(), GL work included (glFinish)"""
+    from OpenGL import GL
+    for i in range( warmup ):
+        function()
+    GL.glFinish()
+    start = time.perf_counter()
+    for i in range( repeat ):
+        function()
+    GL.glFinish()
+    return (time.perf_counter() - start) / repeat
+
+def report( label, seconds, extra='' ):
+    print( '%-44s %9.3f ms %s'%( label, seconds*1e3, extra ))
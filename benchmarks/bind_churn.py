@@ -0,0 +1,66 @@
+"""Texture bind churn: 1000 draws of 8 textures each, wrappers against BindingTable
+
+Each frame binds the textures of 1000 draws, every draw using one of 50
+materials of 8 textures (units 0-7, units 0 and 1 shared by every
+material), issued as:
+
+    glActiveTexture + glBindTexture wrappers   (8 pairs per draw)
+    BindingTable, per-unit fallback            (changed units only)
+    BindingTable, multi-bind                   (one glBindTextures per draw)
+    BindingTable, multi-bind, draws sorted     (by material)
+
+Only the binding is timed, no drawing, reporting time per frame and the
+binding calls the table issued per frame.
+"""
+import _context
+_context.context()
+import random
+from OpenGL import GL
+from OpenGL.GL import bindingtables
+
+DRAWS = 1000
+UNITS = 8
+MATERIALS = 50
+textures = list( GL.glGenTextures( 64 ))
+for texture in textures:
+    GL.glBindTexture( GL.GL_TEXTURE_2D, texture )
+    GL.glTexImage2D( GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, 4, 4, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None )
+GL.glBindTexture( GL.GL_TEXTURE_2D, 0 )
+
+random.seed( 1 )
+materials = [
+    textures[:2] + random.sample( textures[2:], UNITS-2 )
+    for index in range( MATERIALS )
+]
+draws = [ random.choice( materials ) for index in range( DRAWS ) ]
+
+def wrappers():
+    for material in draws:
+        for unit,texture in enumerate( material ):
+            GL.glActiveTexture( GL.GL_TEXTURE0 + unit )
+            GL.glBindTexture( GL.GL_TEXTURE_2D, texture )
+    GL.glActiveTexture( GL.GL_TEXTURE0 )
+
+def tabled( table, draws ):
+    def frame():
+        for material in draws:
+            table.textures( 0, material )
+            table.apply()
+    return frame
+
+_context.report( 'glActiveTexture+glBindTexture wrappers', _context.timed( wrappers ))
+for label, multiBind, order in (
+    ('BindingTable, per-unit fallback', False, draws),
+    ('BindingTable, multi-bind', None, draws),
+    ('BindingTable, multi-bind, draws sorted', None, sorted( draws, key=id )),
+):
+    table = bindingtables.BindingTable( multiBind=multiBind )
+    if multiBind is None and not table.multiBind:
+        label += ' (unavailable, fallback)'
+    frame = tabled( table, order )
+    seconds = _context.timed( frame, repeat=20, warmup=1 )
+    table.calls = 0
+    frame()
+    _context.report( label, seconds, '%d calls/frame'%( table.calls, ))
+    table.invalidate()
+GL.glDeleteTextures( textures )
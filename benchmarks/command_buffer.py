@@ -0,0 +1,64 @@
+"""10k-vertex immediate-mode frames: wrapped calls against CommandBuffer
+
+Each frame draws 10000 coloured points (a glColor3f + glVertex3f pair,
+or glColor3fv + glVertex3fv, per point) between glBegin/glEnd into a
+small framebuffer, issued:
+
+    through the OpenGL.GL wrappers            (the radar's current style)
+    CommandBuffer.execute(), replay loop      (un-compiled buffer)
+    CommandBuffer.execute(), display list     (after compile())
+
+Recording is done once, outside the timed frames, and reported
+separately.
+"""
+import _context
+_context.context()
+_context.framebuffer( 64, 64 )
+import time
+import numpy
+from OpenGL import GL
+from OpenGL.GL import commandbuffers
+
+COUNT = 10000
+rng = numpy.random.default_rng( 0 )
+points = [ tuple( p ) for p in rng.uniform( -1, 1, (COUNT,3) ).tolist() ]
+colours = [ tuple( c ) for c in rng.uniform( 0, 1, (COUNT,3) ).tolist() ]
+
+def immediate():
+    GL.glBegin( GL.GL_POINTS )
+    for colour, point in zip( colours, points ):
+        GL.glColor3f( *colour )
+        GL.glVertex3f( *point )
+    GL.glEnd()
+def immediateVectors():
+    GL.glBegin( GL.GL_POINTS )
+    for colour, point in zip( colours, points ):
+        GL.glColor3fv( colour )
+        GL.glVertex3fv( point )
+    GL.glEnd()
+
+def record( vectors ):
+    buffer = commandbuffers.CommandBuffer()
+    buffer.glBegin( GL.GL_POINTS )
+    for colour, point in zip( colours, points ):
+        if vectors:
+            buffer.glColor3fv( colour )
+            buffer.glVertex3fv( point )
+        else:
+            buffer.glColor3f( *colour )
+            buffer.glVertex3f( *point )
+    buffer.glEnd()
+    return buffer
+
+for vectors, label, wrapped in (
+    (False, 'glColor3f/glVertex3f', immediate),
+    (True, 'glColor3fv/glVertex3fv', immediateVectors),
+):
+    start = time.perf_counter()
+    buffer = record( vectors )
+    _context.report( '%s record once'%( label, ), time.perf_counter() - start )
+    _context.report( '%s wrapped'%( label, ), _context.timed( wrapped ))
+    _context.report( '%s replay'%( label, ), _context.timed( buffer.execute ))
+    if buffer.compile():
+        _context.report( '%s display list'%( label, ), _context.timed( buffer.execute ))
+    buffer.delete()
@@ -0,0 +1,58 @@
+"""10k draws per frame: per-draw wrapped calls against DrawBatch
+
+Each frame draws 10000 single-point draws (one per cell of a 100x100
+framebuffer) from a VBO, issued as:
+
+    glDrawArrays per draw                 (wrapped call per draw)
+    DrawBatch, multi-draw-indirect        (one glMultiDrawArraysIndirect)
+    DrawBatch, 100 updates per frame      (dirty range re-uploaded first)
+    DrawBatch, no indirect                (glMultiDrawArrays fallback)
+
+reporting time per frame.
+"""
+import _context
+_context.context()
+_context.framebuffer( 100, 100 )
+import numpy
+from OpenGL import GL
+from OpenGL.GL import drawbatches
+from OpenGL.arrays import vbo
+
+DRAWS = 10000
+cells = numpy.arange( DRAWS )
+points = numpy.column_stack((
+    (cells % 100 + 0.5) / 50 - 1, (cells // 100 + 0.5) / 50 - 1, numpy.zeros( DRAWS ),
+)).astype( 'f4' )
+vertices = vbo.VBO( points )
+vertices.bind()
+GL.glEnableClientState( GL.GL_VERTEX_ARRAY )
+GL.glVertexPointer( 3, GL.GL_FLOAT, 0, vertices )
+
+def perDraw():
+    for first in range( DRAWS ):
+        GL.glDrawArrays( GL.GL_POINTS, first, 1 )
+
+def batched( indirect ):
+    batch = drawbatches.DrawBatch( GL.GL_POINTS, capacity=DRAWS, indirect=indirect )
+    handles = [ batch.add( 1, first=first ) for first in range( DRAWS ) ]
+    return batch, handles
+
+_context.report( 'glDrawArrays per draw, %d draws'%( DRAWS, ), _context.timed( perDraw ))
+
+batch, handles = batched( None )
+label = 'DrawBatch, multi-draw-indirect' if bool( drawbatches.glMultiDrawArraysIndirect ) else 'DrawBatch, no indirect available'
+_context.report( label, _context.timed( batch.draw ))
+updated = handles[::100]
+def updating():
+    for handle in updated:
+        batch.update( handle, instanceCount=1 )
+    batch.draw()
+_context.report( 'DrawBatch, 100 updates per frame', _context.timed( updating ))
+batch.delete()
+
+batch, handles = batched( False )
+_context.report( 'DrawBatch, no indirect (glMultiDrawArrays)', _context.timed( batch.draw ))
+batch.delete()
+GL.glDisableClientState( GL.GL_VERTEX_ARRAY )
+vertices.unbind()
+vertices.delete()
@@ -0,0 +1,54 @@
+"""Overhead of the GL error-checking modes
+
+Times a frame of 10000 wrapped glColor4f calls (cheap for the driver,
+so the per-call checking cost dominates) with the checker in each mode:
+
+    IMMEDIATE      glGetError after every call (the default)
+    DEFERRED       one glGetError per frame, at checkErrors()
+    SAMPLED        glGetError after every 100th call
+    DEBUG_OUTPUT   KHR_debug pipeline test after each call (if available)
+
+plus, in a child process, ERROR_CHECKING disabled at import (no checker
+at all) as the lower bound.
+"""
+import os
+import subprocess
+import sys
+import _context
+_context.context()
+from OpenGL import GL, error
+
+CALLS = 10000
+def frame():
+    for i in range( CALLS ):
+        GL.glColor4f( 1.0, 0.5, 0.25, 1.0 )
+    error.checkErrors()
+
+def report( label, seconds ):
+    _context.report( label, seconds, '%6.2f us/call'%( seconds * 1e6 / CALLS, ))
+
+if os.environ.get( 'PYOPENGL_ERROR_CHECKING' ):
+    report( 'ERROR_CHECKING disabled', _context.timed( frame, repeat=100 ))
+    sys.exit( 0 )
+
+modes = [
+    ('IMMEDIATE', error.IMMEDIATE, {}),
+    ('DEFERRED', error.DEFERRED, {}),
+    ('SAMPLED 1-in-100', error.SAMPLED, { 'sampleRate': 100 }),
+]
+try:
+    from OpenGL.GL import debugoutput
+    debugoutput.install()
+except Exception:
+    pass
+else:
+    modes.append( ('DEBUG_OUTPUT', error.DEBUG_OUTPUT, {}) )
+for label, mode, options in modes:
+    error.setCheckingMode( mode, **options )
+    report( label, _context.timed( frame, repeat=100 ))
+error.setCheckingMode( error.IMMEDIATE )
+sys.stdout.flush()
+subprocess.call(
+    [sys.executable] + sys.argv,
+    env=dict( os.environ, PYOPENGL_ERROR_CHECKING='0' ),
+)
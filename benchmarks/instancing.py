@@ -0,0 +1,101 @@
+"""100k instances: per-object uniforms + draw against InstancedMesh
+
+Each frame moves and draws 100000 small triangles, each with its own
+transform, colour and scale, into a 64x64 framebuffer:
+
+    per-object loop           glUniformMatrix4fv/glUniform4fv/glUniform3fv
+                              + glDrawArrays per instance
+    InstancedMesh             update() of every transform + draw()
+      update+upload only      numpy write + ranged glBufferSubData
+      draw only               the single instanced draw
+
+reporting time per frame.  The per-object loop is timed over a single
+frame as it takes seconds.
+"""
+import _context
+_context.context()
+_context.framebuffer( 64, 64 )
+import numpy
+from OpenGL import GL
+from OpenGL.GL import shaders, instancing
+
+INSTANCES = 100000
+FRAGMENT = """#version 330
+in vec4 shade;
+out vec4 colour;
+void main() { colour = shade; }
+"""
+def program( vertex ):
+    return shaders.compileProgram(
+        shaders.compileShader( vertex, GL.GL_VERTEX_SHADER ),
+        shaders.compileShader( FRAGMENT, GL.GL_FRAGMENT_SHADER ),
+    )
+instanced = program( """#version 330
+layout(location=0) in vec3 position;
+layout(location=4) in mat4 transform;
+layout(location=8) in vec4 color;
+layout(location=9) in vec3 scale;
+out vec4 shade;
+void main() { gl_Position = transform * vec4( position * scale, 1.0 ); shade = color; }
+""" )
+uniforms = program( """#version 330
+layout(location=0) in vec3 position;
+uniform mat4 transform;
+uniform vec4 color;
+uniform vec3 scale;
+out vec4 shade;
+void main() { gl_Position = transform * vec4( position * scale, 1.0 ); shade = color; }
+""" )
+
+rng = numpy.random.default_rng( 0 )
+triangle = numpy.array( [(-1,-1,0),(1,-1,0),(0,1,0)], 'f4' )
+transforms = numpy.tile( numpy.identity( 4, 'f4' ), (INSTANCES,1,1) )
+transforms[:,3,:2] = rng.uniform( -1, 1, (INSTANCES,2) )
+colors = rng.uniform( 0, 1, (INSTANCES,4) ).astype( 'f4' )
+scales = numpy.full( (INSTANCES,3), 0.01, 'f4' )
+
+GL.glUseProgram( uniforms )
+locations = [
+    GL.glGetUniformLocation( uniforms, name ) for name in ('transform','color','scale')
+]
+vao = GL.glGenVertexArrays( 1 )
+GL.glBindVertexArray( vao )
+buffer = GL.glGenBuffers( 1 )
+GL.glBindBuffer( GL.GL_ARRAY_BUFFER, buffer )
+GL.glBufferData( GL.GL_ARRAY_BUFFER, triangle.nbytes, triangle, GL.GL_STATIC_DRAW )
+GL.glEnableVertexAttribArray( 0 )
+GL.glVertexAttribPointer( 0, 3, GL.GL_FLOAT, False, 0, None )
+def perObject():
+    transforms[:,3,:2] += 0.001
+    transform, color, scale = locations
+    for index in range( INSTANCES ):
+        GL.glUniformMatrix4fv( transform, 1, False, transforms[index] )
+        GL.glUniform4fv( color, 1, colors[index] )
+        GL.glUniform3fv( scale, 1, scales[index] )
+        GL.glDrawArrays( GL.GL_TRIANGLES, 0, 3 )
+_context.report(
+    'per-object loop, %d instances'%( INSTANCES, ),
+    _context.timed( perObject, repeat=1, warmup=0 ),
+)
+GL.glBindVertexArray( 0 )
+GL.glDeleteVertexArrays( 1, [vao] )
+GL.glDeleteBuffers( 1, [buffer] )
+
+GL.glUseProgram( instanced )
+mesh = instancing.InstancedMesh( triangle )
+mesh.update( { 'transform': transforms, 'color': colors, 'scale': scales } )
+mesh.draw()
+def update():
+    transforms[:,3,:2] += 0.001
+    mesh.update( { 'transform': transforms } )
+def frame():
+    update()
+    mesh.draw()
+def updateUpload():
+    update()
+    mesh.upload()
+_context.report( 'InstancedMesh update+draw', _context.timed( frame, repeat=10 ))
+_context.report( '  update+upload only', _context.timed( updateUpload, repeat=10 ))
+_context.report( '  draw only', _context.timed( mesh.draw, repeat=10 ))
+mesh.delete()
+GL.glUseProgram( 0 )
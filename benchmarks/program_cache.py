@@ -0,0 +1,107 @@
+"""Start-up cost of 50 shader programs with and without ProgramCache
+
+Builds 50 distinct programs (one vertex/fragment pair compiled with 50
+different #define sets) as an application would at start-up:
+
+    compileProgram                  plain compile + link (+ validate)
+    ProgramCache, cold              empty cache directory: compile, link
+                                    and store every binary
+    ProgramCache, warm              every program loaded with
+                                    glProgramBinary from the directory
+
+reporting time for the whole set.  The cache lives in a temporary
+directory removed afterwards.  Each pass salts the sources with a
+random comment so that a driver's own shader cache (e.g. Mesa's) does
+not turn the compiling passes into hits.  Drivers with no program
+binary formats fall back to compiling in every pass.
+"""
+import _context
+_context.context()
+import shutil
+import tempfile
+import time
+import uuid
+from OpenGL import GL
+from OpenGL.GL import shaders
+
+PROGRAMS = 50
+VERTEX = """#version 330
+// SALT
+in vec3 position;
+in vec3 normal;
+uniform mat4 mvp;
+out vec3 shade;
+void main() {
+    float light = max( dot( normalize( normal ), vec3( 0.0, 0.0, 1.0 )), 0.0 );
+    shade = vec3( light ) * float( VARIANT + 1 ) / float( PROGRAMS );
+    gl_Position = mvp * vec4( position * SCALE, 1.0 );
+}
+"""
+FRAGMENT = """#version 330
+in vec3 shade;
+out vec4 colour;
+void main() {
+    vec3 result = shade;
+    for ( int i = 0; i < VARIANT % 8; ++i ) {
+        result = result * 0.9 + vec3( 0.01 * float( i ));
+    }
+    colour = vec4( result, 1.0 );
+}
+"""
+variants = [
+    { 'VARIANT': index, 'PROGRAMS': PROGRAMS, 'SCALE': '%.1f'%( 1.0 + index ) }
+    for index in range( PROGRAMS )
+]
+
+def salted( salt ):
+    return VERTEX.replace( 'SALT', salt ), FRAGMENT
+
+def plain( salt ):
+    vertex, fragment = salted( salt )
+    programs = []
+    for defines in variants:
+        programs.append( shaders.compileProgram(
+            shaders.compileShader( shaders._applyDefines( vertex, defines ), GL.GL_VERTEX_SHADER ),
+            shaders.compileShader( shaders._applyDefines( fragment, defines ), GL.GL_FRAGMENT_SHADER ),
+        ))
+    return programs
+
+def cached( cache, salt ):
+    vertex, fragment = salted( salt )
+    programs = []
+    for defines in variants:
+        programs.append( cache.compileProgram(
+            (vertex, GL.GL_VERTEX_SHADER),
+            (fragment, GL.GL_FRAGMENT_SHADER),
+            defines=defines,
+        ))
+    return programs
+
+def startup( function, *args ):
+    GL.glFinish()
+    start = time.perf_counter()
+    programs = function( *args )
+    GL.glFinish()
+    seconds = time.perf_counter() - start
+    for program in programs:
+        GL.glDeleteProgram( program )
+    return seconds
+
+directory = tempfile.mkdtemp( prefix='program-cache-' )
+try:
+    cache = shaders.ProgramCache( directory )
+    if not cache.available():
+        print( 'No program binary formats, ProgramCache falls back to compiling' )
+    _context.report( 'compileProgram, %d programs'%( PROGRAMS, ), startup( plain, uuid.uuid4().hex ))
+    salt = uuid.uuid4().hex
+    _context.report(
+        'ProgramCache cold, %d programs'%( PROGRAMS, ), startup( cached, cache, salt ),
+        '%d misses'%( cache.misses, ),
+    )
+    warm = shaders.ProgramCache( directory )
+    _context.report(
+        'ProgramCache warm, %d programs'%( PROGRAMS, ), startup( cached, warm, salt ),
+        '%d hits %d rejected'%( warm.hits, warm.rejected ),
+    )
+finally:
+    shutil.rmtree( directory, ignore_errors=True )
@@ -0,0 +1,78 @@
+"""Parsing 100k selection hits / feedback records, per-object against columnar
+
+Builds synthetic buffers shaped like glRenderMode's output and parses
+them with:
+
+    GLSelectRecord.fromArray  against  SelectionHits.fromArray
+        100k hits with one name each (strided fast path) and with 1-3
+        names each (count walk + numpy gather)
+    parseFeedback  against  parseFeedbackColumnar
+        100k GL_3D_COLOR points (strided fast path) and a mixed stream
+        of points, lines, polygons and pass-through markers
+
+A context is created as the feedback parsers consult the context's
+limits (GL_INDEX_MODE) and registered feedback type.
+"""
+import _context
+_context.context()
+import numpy
+from OpenGL import GL
+from OpenGL.GL import selection, feedback
+
+HITS = 100000
+rng = numpy.random.default_rng( 0 )
+
+def selectBuffer( counts ):
+    """Selection buffer with hits of the given name-stack depths"""
+    records = []
+    for count in counts:
+        records.extend( [count, rng.integers( 0, 2**32-1 ), rng.integers( 0, 2**32-1 )] )
+        records.extend( rng.integers( 0, 1000, count ).tolist() )
+    return numpy.array( records, dtype=numpy.uint32 )
+
+uniform = selectBuffer( numpy.ones( HITS, dtype=int ))
+mixed = selectBuffer( rng.integers( 1, 4, HITS ))
+for label, buffer in (('1 name', uniform), ('1-3 names', mixed)):
+    _context.report(
+        'GLSelectRecord.fromArray, %s'%( label, ),
+        _context.timed( lambda: selection.GLSelectRecord.fromArray( buffer, HITS ), repeat=3, warmup=1 ),
+    )
+    _context.report(
+        'SelectionHits.fromArray, %s'%( label, ),
+        _context.timed( lambda: selection.SelectionHits.fromArray( buffer, HITS ), repeat=20 ),
+    )
+
+# register GL_3D_COLOR as the context's feedback type
+registered = (GL.GLfloat * 16)()
+GL.glFeedbackBuffer( 16, GL.GL_3D_COLOR, registered )
+VERTEX = 7 # x,y,z + RGBA
+
+def vertices( count ):
+    return rng.uniform( 0, 1, count*VERTEX ).tolist()
+points = []
+for i in range( HITS ):
+    points.append( float( GL.GL_POINT_TOKEN ))
+    points.extend( vertices( 1 ))
+mixedStream = []
+for kind in rng.integers( 0, 4, HITS ):
+    if kind == 0:
+        mixedStream.append( float( GL.GL_POINT_TOKEN ))
+        mixedStream.extend( vertices( 1 ))
+    elif kind == 1:
+        mixedStream.append( float( GL.GL_LINE_TOKEN ))
+        mixedStream.extend( vertices( 2 ))
+    elif kind == 2:
+        mixedStream.extend( [float( GL.GL_POLYGON_TOKEN ), 3.0] )
+        mixedStream.extend( vertices( 3 ))
+    else:
+        mixedStream.extend( [float( GL.GL_PASS_THROUGH_TOKEN ), 1.0] )
+for label, stream in (('points', points), ('mixed', mixedStream)):
+    buffer = numpy.array( stream, dtype=numpy.float32 )
+    _context.report(
+        'parseFeedback, 100k %s'%( label, ),
+        _context.timed( lambda: feedback.parseFeedback( buffer, len(buffer) ), repeat=3, warmup=1 ),
+    )
+    _context.report(
+        'parseFeedbackColumnar, 100k %s'%( label, ),
+        _context.timed( lambda: feedback.parseFeedbackColumnar( buffer, len(buffer) ), repeat=20 ),
+    )
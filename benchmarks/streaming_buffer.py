@@ -0,0 +1,53 @@
+"""Per-frame geometry through StreamingBuffer against VBO.set_array()
+
+Each frame regenerates N points (numpy) and transfers them to a buffer,
+measured alone and followed by drawing them as GL_POINTS into a small
+framebuffer, through:
+
+    VBO.set_array() + bind()          (copy into VBO.data, glBufferSubData)
+    StreamingBuffer, persistent map   (GL 4.4 buffer storage)
+    StreamingBuffer, orphan fallback  (glBufferData NULL + unsynchronized map)
+"""
+import _context
+_context.context()
+_context.framebuffer( 64, 64 )
+import numpy
+from OpenGL import GL
+from OpenGL.arrays import vbo
+from OpenGL.GL import streamingbuffers
+
+rng = numpy.random.default_rng( 0 )
+GL.glEnableClientState( GL.GL_VERTEX_ARRAY )
+
+for count in (1000, 10000, 100000):
+    points = rng.uniform( -1, 1, (count,3) ).astype( 'f4' )
+    buffer = vbo.VBO( points, usage=GL.GL_STREAM_DRAW )
+    def withVBO( draw ):
+        points[:,2] += 0.0001
+        buffer.set_array( points )
+        buffer.bind()
+        if draw:
+            GL.glVertexPointer( 3, GL.GL_FLOAT, 0, buffer )
+            GL.glDrawArrays( GL.GL_POINTS, 0, count )
+        buffer.unbind()
+    results = [ ('VBO.set_array()+bind()', withVBO) ]
+    for persistent, label in ((None, 'StreamingBuffer persistent'), (False, 'StreamingBuffer orphaning')):
+        stream = streamingbuffers.StreamingBuffer( points.nbytes, persistent=persistent )
+        def withStream( draw, stream=stream ):
+            stream.begin_frame()
+            view, offset = stream.allocate( points.shape, 'f4' )
+            numpy.add( points, 0.0001, out=view )
+            stream.flush()
+            stream.bind()
+            if draw:
+                GL.glVertexPointer( 3, GL.GL_FLOAT, 0, stream.pointer( offset ))
+                GL.glDrawArrays( GL.GL_POINTS, 0, count )
+            stream.unbind()
+        results.append( (label, withStream) )
+    for draw in (False, True):
+        for label, function in results:
+            _context.report(
+                '%s, %d points%s'%( label, count, ' + draw' if draw else '' ),
+                _context.timed( lambda: function( draw ), repeat=50 ),
+            )
+    buffer.delete()
@@ -0,0 +1,43 @@
+"""Upload throughput of StreamingTexture against plain glTexSubImage2D
+
+Compares, for a 1024x1024 RGBA8 image, a whole-image glTexSubImage2D
+from client memory through the wrapper with StreamingTexture uploading
+the whole image and uploading 64 dirty 32x32 cells (a heat-map style
+partial update), reporting time per upload and MB/s of image data
+transferred.
+"""
+import _context
+_context.context()
+import numpy
+from OpenGL import GL
+from OpenGL.GL import textures
+
+SIZE = 1024
+image = numpy.random.default_rng( 0 ).integers( 0, 255, (SIZE,SIZE,4), dtype=numpy.uint8 )
+megabytes = image.nbytes / 1e6
+
+plain = GL.glGenTextures( 1 )
+GL.glBindTexture( GL.GL_TEXTURE_2D, plain )
+GL.glTexImage2D( GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, SIZE, SIZE, 0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None )
+def texSubImage():
+    GL.glBindTexture( GL.GL_TEXTURE_2D, plain )
+    GL.glTexSubImage2D( GL.GL_TEXTURE_2D, 0, 0, 0, SIZE, SIZE, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, image )
+
+stream = textures.StreamingTexture( SIZE, SIZE )
+stream.create()
+def streamFull():
+    stream.mark_dirty()
+    stream.upload( image )
+
+cells = [ (x*128, y*128, 32, 32) for x in range( 8 ) for y in range( 8 ) ]
+cellMegabytes = len( cells ) * 32 * 32 * 4 / 1e6
+def streamCells():
+    stream.upload( image, rects=cells )
+
+for label, function, size in (
+    ('glTexSubImage2D whole image (wrapper)', texSubImage, megabytes),
+    ('StreamingTexture whole image', streamFull, megabytes),
+    ('StreamingTexture 64 dirty 32x32 cells', streamCells, cellMegabytes),
+):
+    seconds = _context.timed( function )
+    _context.report( label, seconds, '%8.1f MB/s'%( size / seconds ))
@@ -0,0 +1,58 @@
+"""Tessellating a 10k-vertex polygon: GLU callbacks against tessellate()
+
+The polygon is a concave (but simple) "wobbly star" outline
+of 10000 vertices, triangulated per frame with:
+
+    gluTessVertex + Python callbacks   (the classic GLUtesselator route,
+                                        collecting triangle vertices)
+    tessellate, no cache               (batch API, vertices by address)
+    tessellate, cached                 (static shape, content-hash hit)
+
+reporting time per tessellation and the triangle count produced.
+"""
+import _context
+_context.context()
+import numpy
+from OpenGL import GLU
+from OpenGL.GLU import tess
+
+COUNT = 10000
+angles = numpy.linspace( 0, 2*numpy.pi, COUNT, endpoint=False )
+radii = 1.0 + 0.3 * numpy.sin( angles * 37 ) + 0.1 * numpy.sin( angles * 401 )
+points = numpy.column_stack((
+    radii * numpy.cos( angles ), radii * numpy.sin( angles ), numpy.zeros( COUNT ),
+))
+vertexList = points.tolist()
+
+def callbacks():
+    output = []
+    tesselator = GLU.gluNewTess()
+    GLU.gluTessCallback( tesselator, GLU.GLU_TESS_VERTEX_DATA, lambda vertex, data: data.append( vertex ))
+    GLU.gluTessCallback( tesselator, GLU.GLU_TESS_COMBINE, lambda coords, vertices, weight: coords )
+    # an edge flag callback restricts the output to GL_TRIANGLES
+    GLU.gluTessCallback( tesselator, GLU.GLU_TESS_EDGE_FLAG_DATA, lambda flag, data: None )
+    GLU.gluTessBeginPolygon( tesselator, output )
+    GLU.gluTessBeginContour( tesselator )
+    for vertex in vertexList:
+        GLU.gluTessVertex( tesselator, vertex, vertex )
+    GLU.gluTessEndContour( tesselator )
+    GLU.gluTessEndPolygon( tesselator )
+    GLU.gluDeleteTess( tesselator )
+    return len( output ) // 3
+
+def uncached():
+    return len( tess.tessellate( points, cache=None )[1] )
+
+cache = tess.TessellationCache()
+def cached():
+    return len( tess.tessellate( points, cache=cache )[1] )
+
+for label, function in (
+    ('gluTessVertex + callbacks, 10k vertices', callbacks),
+    ('tessellate, no cache', uncached),
+    ('tessellate, cached', cached),
+):
+    _context.report(
+        label, _context.timed( function, repeat=5, warmup=1 ),
+        '%d triangles'%( function(), ),
+    )
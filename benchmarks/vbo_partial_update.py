@@ -0,0 +1,56 @@
+"""Partial VBO updates: slice assignment followed by bind()
+
+A 100k-vertex (3 float) VBO receives, per frame, a batch of small slice
+assignments before being bound (which uploads the pending changes):
+
+    per-vertex run    1000 consecutive single-vertex assignments
+    scattered         UPDATES single-vertex assignments at random rows
+    blocks            10 assignments of 100 vertices
+
+reporting time per frame (assignments + bind + glFinish).  UPDATES is
+10000 unless given as the first command line argument.  Run against
+an older OpenGL.arrays.vbo to compare the per-slice upload queue with
+the merged dirty-range upload.
+"""
+import _context
+_context.context()
+import sys
+import numpy
+from OpenGL import GL
+from OpenGL.arrays import vbo
+
+COUNT = 100000
+UPDATES = int( sys.argv[1] ) if sys.argv[1:] else 10000
+rng = numpy.random.default_rng( 0 )
+points = rng.uniform( -1, 1, (COUNT,3) ).astype( 'f4' )
+row = numpy.ones( (1,3), 'f4' )
+block = numpy.ones( (100,3), 'f4' )
+scattered = rng.integers( 0, COUNT, UPDATES )
+
+buffer = vbo.VBO( points.copy(), usage=GL.GL_DYNAMIC_DRAW )
+buffer.bind()
+buffer.unbind()
+
+def perVertexRun():
+    for index in range( 5000, 6000 ):
+        buffer[ index:index+1 ] = row
+    buffer.bind()
+    buffer.unbind()
+def scatteredRows():
+    for index in scattered:
+        buffer[ index:index+1 ] = row
+    buffer.bind()
+    buffer.unbind()
+def blocks():
+    for index in range( 0, COUNT, COUNT//10 ):
+        buffer[ index:index+100 ] = block
+    buffer.bind()
+    buffer.unbind()
+
+for label, function in (
+    ('1000 per-vertex assignments, one run', perVertexRun),
+    ('%d scattered single-vertex assignments'%( UPDATES, ), scatteredRows),
+    ('10 assignments of 100 vertices', blocks),
+):
+    _context.report( label, _context.timed( function ))
+buffer.delete()
@@ -0,0 +1,66 @@
+"""64MB glBufferData/glTexImage2D uploads from various buffer sources
+
+Uploads the same 64MB payload (a 4096x4096 RGBA8 image) from a numpy
+array, bytes, bytearray, memoryview, array.array and an anonymous mmap
+through the wrapped glBufferData and glTexImage2D, reporting time per
+upload and the peak Python-side allocation during the call (tracemalloc),
+which is ~0 when the source memory is handed to the GL directly and
+~64MB when the wrapper made an intermediate copy.  Source labels given
+on the command line restrict the run to those sources.
+"""
+import _context
+_context.context()
+import array
+import mmap
+import sys
+import tracemalloc
+import numpy
+from OpenGL import GL
+
+SIZE = 4096
+image = numpy.random.default_rng( 0 ).integers( 0, 255, (SIZE,SIZE,4), dtype=numpy.uint8 )
+payload = image.tobytes()
+mapped = mmap.mmap( -1, len( payload ))
+mapped.write( payload )
+sources = (
+    ('numpy array', image),
+    ('bytes', payload),
+    ('bytearray', bytearray( payload )),
+    ('memoryview', memoryview( payload )),
+    ("array.array('B')", array.array( 'B', payload )),
+    ('mmap', mapped),
+)
+
+buffer = GL.glGenBuffers( 1 )
+GL.glBindBuffer( GL.GL_ARRAY_BUFFER, buffer )
+texture = GL.glGenTextures( 1 )
+GL.glBindTexture( GL.GL_TEXTURE_2D, texture )
+
+def peak( function ):
+    """Peak megabytes allocated (Python/numpy) during function()"""
+    tracemalloc.start()
+    function()
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result / 2.0**20
+
+for label, source in sources:
+    if sys.argv[1:] and label not in sys.argv[1:]:
+        continue
+    def bufferData( source=source ):
+        GL.glBufferData( GL.GL_ARRAY_BUFFER, len( payload ), source, GL.GL_STATIC_DRAW )
+    def texImage( source=source ):
+        GL.glTexImage2D(
+            GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, SIZE, SIZE, 0,
+            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, source,
+        )
+    for name, function in (('glBufferData', bufferData), ('glTexImage2D', texImage)):
+        try:
+            seconds = _context.timed( function, repeat=10, warmup=1 )
+        except Exception as err:
+            print( '%-44s failed: %s'%( '%s %s'%( name, label ), err.__class__.__name__ ))
+            continue
+        _context.report(
+            '%s %s'%( name, label ), seconds,
+            'peak alloc %6.1f MB'%( peak( function ), ),
+        )
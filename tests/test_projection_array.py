@@ -0,0 +1,76 @@
+"""gluProjectArray/gluUnProjectArray against per-point gluProject/gluUnProject"""
+import math
+import pytest
+numpy = pytest.importorskip( 'numpy' )
+from OpenGL.GLU import projection
+from OpenGL.raw import GLU as _simple
+
+if not _simple.gluProject:
+    pytest.skip( 'GLU library not available', allow_module_level=True )
+
+# relative to the window/object coordinate magnitudes (~1e3), per-point
+# GLU and the vectorised forms differ only in summation order
+TOLERANCE = 1e-9
+
+def perspective( fovy, aspect, near, far ):
+    f = 1.0/math.tan( math.radians( fovy )/2.0 )
+    matrix = numpy.zeros( (4,4) )
+    matrix[0,0] = f/aspect
+    matrix[1,1] = f
+    matrix[2,2] = (far+near)/(near-far)
+    matrix[2,3] = 2.0*far*near/(near-far)
+    matrix[3,2] = -1.0
+    # GL memory (column-major) layout
+    return matrix.T.copy()
+
+def modelview( angle, offset ):
+    c, s = math.cos( angle ), math.sin( angle )
+    matrix = numpy.array( [
+        [c, 0.0, s, offset[0]],
+        [0.0, 1.0, 0.0, offset[1]],
+        [-s, 0.0, c, offset[2]],
+        [0.0, 0.0, 0.0, 1.0],
+    ] )
+    return matrix.T.copy()
+
+MODEL = modelview( 0.3, (0.5, -0.25, -20.0) )
+PROJ = perspective( 60.0, 4.0/3.0, 0.5, 100.0 )
+VIEW = numpy.array( [10, 20, 800, 600], dtype=numpy.int32 )
+
+@pytest.fixture
+def points():
+    rng = numpy.random.default_rng( 0 )
+    return rng.uniform( -5.0, 5.0, (500,3) )
+
+def test_project_matches_per_point( points ):
+    result = projection.gluProjectArray( points, MODEL, PROJ, VIEW )
+    expected = numpy.array( [
+        projection.gluProject( x, y, z, MODEL, PROJ, VIEW ) for (x,y,z) in points
+    ] )
+    assert result.shape == (len(points),3)
+    numpy.testing.assert_allclose( result, expected, rtol=TOLERANCE, atol=TOLERANCE )
+
+def test_unproject_matches_per_point( points ):
+    window = projection.gluProjectArray( points, MODEL, PROJ, VIEW )
+    result = projection.gluUnProjectArray( window, MODEL, PROJ, VIEW )
+    expected = numpy.array( [
+        projection.gluUnProject( x, y, z, MODEL, PROJ, VIEW ) for (x,y,z) in window
+    ] )
+    numpy.testing.assert_allclose( result, expected, rtol=TOLERANCE, atol=TOLERANCE )
+    numpy.testing.assert_allclose( result, points, rtol=TOLERANCE, atol=TOLERANCE )
+
+def test_project_zero_w_is_nan():
+    # a point on the eye plane has clip w == 0, which GLU rejects
+    eye = numpy.array( [[0.0, 0.0, 0.0]] )
+    result = projection.gluProjectArray( eye, numpy.identity( 4 ), PROJ, VIEW )
+    assert numpy.isnan( result ).all()
+    with pytest.raises( ValueError ):
+        projection.gluProject( 0.0, 0.0, 0.0, numpy.identity( 4 ), PROJ, VIEW )
+
+def test_unproject_singular_raises():
+    with pytest.raises( ValueError ):
+        projection.gluUnProjectArray( [[0.0, 0.0, 0.5]], numpy.zeros( (4,4) ), PROJ, VIEW )
+
+def test_shape_checked():
+    with pytest.raises( ValueError ):
+        projection.gluProjectArray( [1.0, 2.0, 3.0], MODEL, PROJ, VIEW )